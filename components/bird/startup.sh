@@ -209,6 +209,7 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
 
 # configure ecmp
 if [ "$ECMP" = "l3" ]; then
@@ -314,6 +315,17 @@ echo -e "\timport none;" >> $FILE
 echo -e "\texport all;" >> $FILE
 echo "}" >> $FILE
 
+# ready once every OSPF interface has elected a designated router and no adjacency is forming; see logs/$HOSTNAME/ready
+(
+    until birdc show ospf interface 2> /dev/null | grep -q "State: " \
+        && ! birdc show ospf interface | grep -q "State: Waiting" \
+        && ! birdc show ospf neighbors | grep -qE "Init|ExStart|Exchange|Loading"; do
+        sleep 1  # seconds
+    done
+
+    echo "{\"name\": \"$HOSTNAME\", \"type\": \"router\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+) &
+
 # run
 trap "exit 0" SIGTERM
 
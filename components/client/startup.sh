@@ -209,6 +209,9 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
+# markers of recreated containers are removed by `make up`; any marker of a dependency is current,
+# even one older than this container, ex. a directory authority left running
 
 # setup tor
 # configured for a single interface
@@ -335,6 +338,9 @@ fi
 #   Request from hidden server: `$TOR_CURL <Server Hostname>/<Page>`
 #       - The `hostname` can be found at: `logs/${SERVER}/hostname`
 
+# ready once configured
+echo "{\"name\": \"$HOSTNAME\", \"type\": \"client\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+
 # run
 trap "exit 0" SIGTERM
 
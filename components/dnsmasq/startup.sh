@@ -213,6 +213,7 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
 
 # setup hosts
 for HOST_NAME in $HOST_NAMES; do
@@ -242,6 +243,15 @@ if [ "$QUERY_LOG" = "true" ]; then
     echo "log-facility=/app/logs/$HOSTNAME/dnsmasq.log  # requires absolute path" >> $FILE
 fi
 
+# ready once dnsmasq answers; see logs/$HOSTNAME/ready
+(
+    until dig +time=1 +tries=1 @127.0.0.1 localhost 2> /dev/null | grep -q "status: NOERROR"; do
+        sleep 1  # seconds
+    done
+
+    echo "{\"name\": \"$HOSTNAME\", \"type\": \"dns\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+) &
+
 # run
 trap "exit 0" SIGTERM
 
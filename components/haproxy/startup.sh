@@ -209,6 +209,7 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
 
 # setup bird
 # advertise all known routes, but do not import any routes
@@ -382,6 +383,24 @@ elif [ "$TYPE" = "l5" ]; then
     done
 fi
 
+# ready once a backend serves a page with 200, and OSPF has converged if advertising; see logs/$HOSTNAME/ready
+# a page of components/nginx/www, as nginx/startup.sh
+(
+    until [ "$(curl -s -o /dev/null -w "%{http_code}" http://127.0.0.1/40.html 2> /dev/null)" = "200" ]; do
+        sleep 1  # seconds
+    done
+
+    if [ "$ADVERTISE" = "true" ]; then
+        until birdc show ospf interface 2> /dev/null | grep -q "State: " \
+            && ! birdc show ospf interface | grep -q "State: Waiting" \
+            && ! birdc show ospf neighbors | grep -qE "Init|ExStart|Exchange|Loading"; do
+            sleep 1  # seconds
+        done
+    fi
+
+    echo "{\"name\": \"$HOSTNAME\", \"type\": \"lb\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+) &
+
 # run
 trap "exit 0" SIGTERM
 
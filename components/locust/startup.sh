@@ -209,14 +209,12 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
 
 # setup locust
 FILE="locustfile.py"
 
 echo "from locust import FastHttpUser, between, task" > $FILE
-echo "from time import sleep" >> $FILE
-echo "" >> $FILE  # new line
-echo "sleep(60)  # seconds; allow routers time to configure" >> $FILE
 echo "" >> $FILE  # new line
 echo "class WebsiteUser(FastHttpUser):" >> $FILE
 echo -e "\thost = '$PROTO://$TARGET'" >> $FILE
@@ -242,6 +240,14 @@ echo -e "\t@task(1)" >> $FILE
 echo -e "\tdef close(self):" >> $FILE
 echo -e "\t\tself.client.client.close()" >> $FILE
 
+# ready once the target answers; at most 60 seconds, routes may take time to converge
+for _ in $(seq 30); do
+    curl -s -o /dev/null --max-time 1 $PROTO://$TARGET 2> /dev/null && break
+    sleep 1  # seconds
+done
+
+echo "{\"name\": \"$HOSTNAME\", \"type\": \"tgen\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+
 # run
 trap "exit 0" SIGTERM
 
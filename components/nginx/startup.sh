@@ -209,6 +209,9 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
+# markers of recreated containers are removed by `make up`; any marker of a dependency is current,
+# even one older than this container, ex. a directory authority left running
 
 # setup tor
 # configured for a single interface
@@ -418,6 +421,16 @@ echo -e "\t\ttry_files \$uri \$uri/ =404;" >> $FILE
 echo -e "\t}" >> $FILE
 echo "}" >> $FILE
 
+# ready once nginx serves a page with 200; see logs/$HOSTNAME/ready
+# a page of www/ rather than /, which depends upon the index
+(
+    until [ "$(curl -s -o /dev/null -w "%{http_code}" http://127.0.0.1/40.html 2> /dev/null)" = "200" ]; do
+        sleep 1  # seconds
+    done
+
+    echo "{\"name\": \"$HOSTNAME\", \"type\": \"http\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+) &
+
 # run
 trap "exit 0" SIGTERM
 
@@ -209,6 +209,9 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
+# markers of recreated containers are removed by `make up`; any marker of a dependency is current,
+# even one older than this container, ex. a directory authority left running
 
 # setup tor
 # configured for a single interface
@@ -340,5 +343,5 @@ else
     sleep infinity &
 fi
 
-echo "" > logs/$HOSTNAME/ready
+echo "{\"name\": \"$HOSTNAME\", \"type\": \"tor\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
 wait $!
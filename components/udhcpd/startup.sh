@@ -209,6 +209,7 @@ echo "--verbose" >> $HOME/.curlrc
 # setup logs
 mkdir -p logs/$HOSTNAME/
 chmod 666 logs/$HOSTNAME/
+rm -f logs/$HOSTNAME/ready  # written once ready, see below
 
 # setup dhcp
 # configured for a single interface
@@ -261,6 +262,15 @@ for IFACE in $IFACES; do
     fi
 done
 
+# ready once udhcpd is running; see logs/$HOSTNAME/ready
+(
+    until pidof udhcpd > /dev/null; do
+        sleep 1  # seconds
+    done
+
+    echo "{\"name\": \"$HOSTNAME\", \"type\": \"dhcp\", \"time\": $(date +%s)}" > logs/$HOSTNAME/ready
+) &
+
 # run
 trap "exit 0" SIGTERM
 
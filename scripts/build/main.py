@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from os import environ, path as os_path, walk
+from subprocess import run, PIPE, STDOUT
+from sys import argv
+from time import perf_counter
+
+
+COMPONENTS = "components"
+BASE = "base"  # the image every component is built from; see components/base
+LABEL = "build.hash"  # the hash of the context of the image
+MAX_WORKERS = 8  # the maximum number of images built at once
+
+
+def context_hash(directory: str, parent: str = "") -> str:
+    """
+    @params:
+        - directory: The build context.
+        - parent: Optional. The hash of the image built from; ex. the base image.
+    @returns: The hash of the name and contents of every file in the context, and the parent.
+    """
+
+    digest = sha256(parent.encode())
+
+    for root, directories, files in walk(directory):
+        directories.sort()  # walked in order
+
+        for file in sorted(files):
+            path = os_path.join(root, file)
+            digest.update(os_path.relpath(path, directory).encode() + b"\0")
+
+            with open(path, "rb") as f:
+                digest.update(sha256(f.read()).digest())
+
+    return digest.hexdigest()
+
+
+def built_hash(name: str) -> str:
+    """
+    @returns: The context hash of the image, or "" if the image does not exist.
+    """
+
+    result = run(["docker", "image", "inspect", "-f", f'{{{{ index .Config.Labels "{LABEL}" }}}}', name],
+                 stdout=PIPE, stderr=STDOUT, text=True)
+
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def build(name: str, digest: str, force: bool) -> tuple[str, bool, int, str, float]:
+    """
+    @params:
+        - name: The name of the component; the image is tagged with the name.
+        - digest: The context hash of the component.
+        - force: Build even if the context is unchanged.
+    @returns: (name, built, status, output, seconds)
+    """
+
+    if not force and built_hash(name) == digest:
+        return (name, False, 0, "", 0.0)
+
+    timer = perf_counter()
+    result = run(["docker", "build", "-t", name, "--label", f"{LABEL}={digest}", os_path.join(COMPONENTS, name)],
+                 stdout=PIPE, stderr=STDOUT, text=True, env={**environ, "DOCKER_BUILDKIT": "1"})
+
+    return (name, True, result.returncode, result.stdout, perf_counter() - timer)
+
+
+def report(name: str, built: bool, status: int, output: str, seconds: float):
+    if not built:
+        print(f"{name}: unchanged")
+    elif status == 0:
+        print(f"{name}: built in {seconds:.1f} seconds")
+    else:
+        print(f"{name}: failed with status {status}:\n{output}")
+
+
+def main():
+    force = "--force" in argv[1:]
+    names = [arg for arg in argv[1:] if not arg.startswith("--")]
+
+    components = sorted(name for name in next(walk(COMPONENTS))[1]
+                        if os_path.exists(os_path.join(COMPONENTS, name, "Dockerfile")) and name != BASE)
+    names = names or components
+
+    for name in names:
+        if name not in components:
+            print(f"error: {name} is not a component; options: {', '.join(components)}")
+            exit(1)
+
+    timer = perf_counter()
+
+    # every component is built from the base, so a change to the base changes every component
+    base = context_hash(os_path.join(COMPONENTS, BASE))
+    result = build(BASE, base, force)
+    report(*result)
+
+    if result[2] != 0:
+        exit(1)
+
+    with ThreadPoolExecutor(MAX_WORKERS) as executor:
+        results = [*executor.map(
+            lambda name: build(name, context_hash(os_path.join(COMPONENTS, name), base), force), names)]
+
+    for result in results:
+        report(*result)
+
+    failed = [name for name, _, status, _, _ in results if status != 0]
+    built = sum(built for _, built, _, _, _ in results)
+    print(f"info: {built} of {len(results)} images built in {perf_counter() - timer:.1f} seconds")
+
+    if failed:
+        print(f"error: {', '.join(failed)} failed")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
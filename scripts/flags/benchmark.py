@@ -0,0 +1,83 @@
+from os import remove
+from random import Random
+from struct import pack
+from sys import argv
+from time import perf_counter
+
+from src.decoder import decode, decode_scapy
+from src.flows import FlowTable
+from src.tally import read
+
+
+# Writes a synthetic capture of HTTP connections, then reads the capture with each decoder.
+# Reports packets/sec for each decoder and verifies that both decoders produce the same tallies.
+
+
+PATH = "benchmark.pcap"
+
+
+def write_pcap(path: str, connections: int, seed: int = 0):
+    random = Random(seed)
+    time = 1_700_000_000 * 1_000_000  # us
+
+    with open(path, "wb") as file:
+        file.write(pack("<IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+
+        for i in range(connections):
+            client = (0xac100000 + i % 250 + 3, 40_000 + i % 20_000)
+            server = (0xb6000002, 80)
+            seq, ack = random.getrandbits(32), random.getrandbits(32)
+
+            request = b"GET /40.html HTTP/1.1\r\nHost: 182.0.0.2\r\n\r\n"
+            response = b"HTTP/1.1 200 OK\r\nContent-Length: 40\r\n\r\n" + b"x" * 40
+
+            segments = [
+                (client, server, seq, 0, 0x02, b""),
+                (server, client, ack, seq + 1, 0x12, b""),
+                (client, server, seq + 1, ack + 1, 0x10, b""),
+                (client, server, seq + 1, ack + 1, 0x18, request),
+                (client, server, seq + 1, ack + 1, 0x18, request),  # retransmission
+                (server, client, ack + 1, seq + 1 + len(request), 0x18, response),
+                (client, server, seq + 1 + len(request), ack + 1 + len(response), 0x11, b""),
+                (server, client, ack + 1 + len(response), seq + 2 + len(request), 0x11, b""),
+                (client, server, seq + 2 + len(request), ack + 2 + len(response), 0x10, b""),
+            ]
+
+            for (src, sport), (dst, dport), s, a, flags, payload in segments:
+                time += random.randrange(1, 2_000)
+
+                tcp = pack("!HHIIBBHHH", sport, dport, s & 0xffffffff, a & 0xffffffff,
+                           5 << 4, flags, 64240, 0, 0)
+                ip = pack("!BBHHHBBHII", 0x45, 0, 20 + len(tcp) + len(payload), 0, 0x4000,
+                          64, 6, 0, src, dst)
+                frame = b"\x02" * 6 + b"\x04" * 6 + b"\x08\x00" + ip + tcp + payload
+
+                file.write(pack("<IIII", time // 1_000_000, time % 1_000_000,
+                                len(frame), len(frame)))
+                file.write(frame)
+
+
+def benchmark(name: str, packets, width: int) -> dict:
+    timer = perf_counter()
+    flags, _, count = read(packets, 0, 0, width, FlowTable())
+    timer = perf_counter() - timer
+
+    print(f"{name}: {count} packets in {timer:.3f} seconds ({count / timer:.0f} packets/sec)")
+    return flags
+
+
+if __name__ == "__main__":
+    connections = int(argv[1]) if len(argv) > 1 else 10_000
+    width = 10 * 1_000  # us
+
+    write_pcap(PATH, connections)
+
+    fast = benchmark("decode", decode(PATH), width)
+
+    try:
+        slow = benchmark("decode_scapy", decode_scapy(PATH), width)
+        assert fast == slow, "decoders disagree"
+    except ImportError:
+        print("info: scapy is not installed; skipping decode_scapy")
+
+    remove(PATH)
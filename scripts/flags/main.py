@@ -1,198 +1,260 @@
-
-# silence scapy startup warnings
-import logging
-logging.getLogger("scapy.runtime").setLevel(logging.ERROR)  # nopep8
-
-from sys import argv
-from scapy.all import PcapReader, Ether, IP, TCP
-from scapy.layers.http import HTTPRequest, HTTPResponse
+from os import cpu_count, path as os_path
+from socket import if_nameindex
+from sys import argv, path as sys_path, stdin
+from time import perf_counter
+
+from src.decoder import decode, decode_scapy, decode_socket, decode_stream
+from src.flows import FlowTable
+from src.live import stream
+from src.parallel import analyze, expand
+from src.tally import read
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from shared.writer import Column, Writer, format_of
+
+
+# " PSH/ACK" keeps the header of existing csvs
+COLUMNS = [Column("Time (s)", float, "{:.3f}")] \
+    + [Column(name) for name in [
+        "Total", "SYN", "SYN/ACK", "ACK and PSH/ACK", "ACK", " PSH/ACK",
+        "0-Length ACK", "0-Window ACK", "HTTP Request", "Total HTTP Request Size",
+        "Average HTTP Request Size", "Retransmitted HTTP Request",
+        "Total Retransmitted HTTP Request Size", "Average Retransmitted HTTP Request Size",
+        "HTTP Response", "Total HTTP Response Size", "Average HTTP Response Size",
+        "Retransmitted HTTP Response", "Total Retransmitted HTTP Response Size",
+        "Average Retransmitted HTTP Response Size", "FIN", "FIN/ACK", "RST"]] \
+    + [Column("Estimated Number of Connections", float)]
 
 
 def main():
     start, end = 0, 0  # by unit of precision; 0 unbounded
-    precision = 0  # ms
+    precisions = []  # ms
     input = ""  # to pcap
-    output = ""  # csv
-
-    if len(argv) == 4:
-        precision = int(argv[1])
-        input = argv[2]
-        output = argv[3]
-    elif len(argv) == 6:
-        start = int(argv[1])
-        end = int(argv[2])
-        precision = int(argv[3])
-        input = argv[4]
-        output = argv[5]
+    output = ""  # csv, parquet, or arrow by extension
+
+    options = [arg for arg in argv[1:] if arg.startswith("--")]
+    args = [arg for arg in argv[1:] if not arg.startswith("--")]
+
+    if len(args) == 3:
+        precisions = [*map(int, args[0].split(","))]
+        input = args[1]
+        output = args[2]
+    elif len(args) == 5:
+        start = int(args[0])
+        end = int(args[1])
+        precisions = [int(args[2])]
+        input = args[3]
+        output = args[4]
     else:
         print("Options:")
-        print(f"\t- python {argv[0]} precision input output")
-        print(f"\t- python {argv[0]} start end precision input output")
+        print(f"\t- python {argv[0]} [--scapy] [--numpy] [--verbose] precision input output")
+        print(f"\t- python {argv[0]} [--scapy] [--numpy] [--verbose] start end precision input output")
+        print("\t- with --numpy, precision may be a list, ex. 10,100,1000")
+        print("\t- input may be a directory or a glob, ex. 'logs/*/dump.pcap'")
+        print("\t- parallel: [--jobs=N] [--chunks=N] [--per-file]")
+        print("\t- output may be .csv, .parquet, or .arrow; parquet and arrow require pyarrow")
+        print(f"\t- live: python {argv[0]} --live precision input output")
+        print("\t\t- input may be - for a pcap stream on stdin, ex. `tcpdump -U -w - | ...`, or an interface")
+        print("\t\t- output may be - for csv on stdout")
         exit(1)
 
+    if "--live" in options:
+        if len(args) != 3 or len(precisions) != 1:
+            print("error: --live requires a single precision and no start or end")
+            exit(1)
+
+        analyze_live(input, precisions[0], output)
+        return
+
+    if len(precisions) > 1 and "--numpy" not in options:
+        print("error: multiple precisions require --numpy")
+        exit(1)
+
+    paths = expand(input)
+    jobs = int(option(options, "--jobs", cpu_count()))
+    chunks = int(option(options, "--chunks", 1))
+
+    if len(paths) != 1 or paths[0] != input or option(options, "--jobs") or chunks > 1:
+        if "--scapy" in options or "--numpy" in options:
+            print("error: parallel analysis does not support --scapy or --numpy")
+            exit(1)
+
+        analyze_parallel(paths, start, end, precisions[0], output, jobs, chunks, options)
+        return
+
+    packets = decode_scapy(input) if "--scapy" in options else decode(input)
+    table = FlowTable()
+
+    if "--numpy" in options:
+        from src.aggregate import collect, aggregate
+
+        timer = perf_counter()
+        columns = collect(packets, table, start, end, precisions[0] * 1_000)
+        timer = perf_counter() - timer
+
+        if "--verbose" in options:
+            report(columns._count, timer, table)
+
+        for precision in precisions:
+            path = output
+            if len(precisions) > 1:  # ex. output.csv to output-10ms.csv
+                stem, dot, suffix = output.rpartition(".")
+                path = f"{stem}-{precision}ms{dot}{suffix}" if dot else f"{output}-{precision}ms"
+
+            tallies, connections, _ = aggregate(columns, start, end, precision * 1_000)
+            write_columns(path, tallies, connections, start, precision / 1_000)
+        return
+
+    precision = precisions[0]
     unit = precision / 1_000
-    shift = 1_000 / precision
+    width = precision * 1_000  # us
+
+    timer = perf_counter()
+    flags, end, count = read(packets, start, end, width, table)
+    timer = perf_counter() - timer
 
-    pcap = PcapReader(input)
-    flags, end = read(pcap, start, end, shift)
+    if "--verbose" in options:
+        report(count, timer, table)
 
     write(output, flags, start, end, unit)
 
 
-def read(pcap: PcapReader, start: int, end: int, shift: float) -> tuple[dict, int]:
-    flags = {}
-    table = {}
+def option(options: list[str], name: str, default: object = None) -> object:
+    """
+    @params:
+        - options: The command line options, ex. ["--jobs=4", "--verbose"].
+        - name: The name of the option, ex. "--jobs".
+        - default: The value if the option is not present.
+    @returns: The value of the option.
+    """
 
-    packet = pcap.read_packet()
-    offset = int(packet.time * shift)
+    for option in options:
+        if option.startswith(f"{name}="):
+            return option.split("=", 1)[1]
+    return default
 
-    if start == 0:  # .read_packet() removes packet from pcap
-        add_packet(flags, table, packet, 0)
 
-    time = 0
-    for packet in pcap:
-        time = int(packet.time * shift) - offset
-        if end != 0 and end < time:
-            break
+def analyze_parallel(paths: list[str], start: int, end: int, precision: int, output: str,
+                     jobs: int, chunks: int, options: list[str]):
+    unit = precision / 1_000
+    width = precision * 1_000  # us
+
+    if not paths:
+        print("error: no pcap files found")
+        exit(1)
 
-        if start <= time:
-            add_packet(flags, table, packet, time)
+    per_file = "--per-file" in options
 
-    if end != 0 and end < time:
-        return (flags, end)  # time is 1 index off
-    return (flags, time)
+    timer = perf_counter()
+    results = analyze(paths, start, end, width, jobs, chunks, not per_file)
+    timer = perf_counter() - timer
 
+    for name, flags, last, count, summaries in results:
+        path = output
+        if per_file:  # ex. output.csv to output-client-0.csv
+            stem, dot, suffix = output.rpartition(".")
+            path = f"{stem}-{name}{dot}{suffix}" if dot else f"{output}-{name}"
 
-def add_packet(flags: dict, table: dict, packet: Ether, time: int) -> None:
-    if TCP not in packet:
-        return
+        if "--verbose" in options:
+            print(f"{name or output}: read {count} packets in {timer:.3f} seconds")
+            for summary in summaries:
+                print(f"\t{summary}")
 
-    if time not in flags:
-        flags[time] = {"Total": 0, "SYN": 0, "SYN/ACK": 0, "ACK and PSH/ACK": 0, "ACK": 0, "PSH/ACK": 0,
-                       "0-Length ACK": 0, "0-Window ACK": 0, "HTTP Request": 0, "Total HTTP Request Size": 0,
-                       "Retransmitted HTTP Request": 0, "Total Retransmitted HTTP Request Size": 0,
-                       "HTTP Response": 0, "Total HTTP Response Size": 0, "Retransmitted HTTP Response": 0,
-                       "Total Retransmitted HTTP Response Size": 0, "FIN": 0, "FIN/ACK": 0, "RST": 0}
-
-    flags[time]["Total"] += 1
-
-    if packet[TCP].flags == "S":
-        flags[time]["SYN"] += 1
-    elif packet[TCP].flags == "SA":
-        flags[time]["SYN/ACK"] += 1
-    elif packet[TCP].flags == "A" or packet[TCP].flags == "PA":
-        flags[time]["ACK and PSH/ACK"] += 1
-        if packet[TCP].flags == "A":
-            flags[time]["ACK"] += 1
-        elif packet[TCP].flags == "PA":
-            flags[time]["PSH/ACK"] += 1
-
-        if packet[TCP].window == 0:
-            flags[time]["0-Window ACK"] += 1
-        elif length(packet) == 0:
-            flags[time]["0-Length ACK"] += 1
-
-        hash = (packet[IP].src, packet[IP].dst,
-                packet[TCP].sport, packet[TCP].dport)
-        position = (packet[TCP].seq, packet[TCP].ack)
-
-        if HTTPRequest in packet:
-            flags[time]["HTTP Request"] += 1
-            flags[time]["Total HTTP Request Size"] += length(packet)
-
-            if hash not in table:
-                table[hash] = []
-
-            if position in table[hash]:
-                flags[time]["Retransmitted HTTP Request"] += 1
-                flags[time]["Total Retransmitted HTTP Request Size"] += \
-                    length(packet)
-            else:
-                table[hash].append(position)
-
-        elif HTTPResponse in packet:
-            flags[time]["HTTP Response"] += 1
-            flags[time]["Total HTTP Response Size"] += length(packet)
-
-            if hash not in table:
-                table[hash] = []
-
-            if position in table[hash]:
-                flags[time]["Retransmitted HTTP Response"] += 1
-                flags[time]["Total Retransmitted HTTP Response Size"] += \
-                    length(packet)
-            else:
-                table[hash].append(position)
-
-    elif packet[TCP].flags == "F":
-        flags[time]["FIN"] += 1
-    elif packet[TCP].flags == "FA":
-        flags[time]["FIN/ACK"] += 1
-    elif packet[TCP].flags == "R":
-        flags[time]["RST"] += 1
-
-
-# len(packet[TCP].payload) return unencoded length
-def length(packet: Ether) -> int:
-    ip_length = packet[IP].len
-    ip_header_length = packet[IP].ihl * 4
-    tcp_header_length = packet[TCP].dataofs * 4
-    return ip_length - ip_header_length - tcp_header_length
+        write(path, flags, start, last, unit)
 
 
-def write(output: str, flags: dict, start: int, end: int, unit: int):
-    with open(output, "w") as file:
-        file.write("Time (s),Total,SYN,SYN/ACK,ACK and PSH/ACK,ACK, PSH/ACK,"
-                   + "0-Length ACK,0-Window ACK,HTTP Request,Total HTTP Request Size,"
-                   + "Average HTTP Request Size,Retransmitted HTTP Request,"
-                   + "Total Retransmitted HTTP Request Size,Average Retransmitted HTTP Request Size,"
-                   + "HTTP Response,Total HTTP Response Size,Average HTTP Response Size,"
-                   + "Retransmitted HTTP Response,Total Retransmitted HTTP Response Size,"
-                   + "Average Retransmitted HTTP Response Size,FIN,FIN/ACK,RST,"
-                   + "Estimated Number of Connections\n")
+def analyze_live(input: str, precision: int, output: str):
+    unit = precision / 1_000
+    width = precision * 1_000  # us
 
+    if input == "-":
+        packets = decode_stream(stdin.buffer)
+    elif input in [name for _, name in if_nameindex()]:
+        packets = decode_socket(input, min(precision / 1_000, 1))
+    else:  # ex. a named pipe
+        packets = decode_stream(open(input, "rb"))
+
+    # csv rows are written as each time bucket closes
+    batch = 1 if format_of(output) == "csv" else 60
+
+    with Writer(output, COLUMNS, batch) as writer:
+        estimated_connections = 0
+        try:
+            for i, stats in stream(packets, width, FlowTable()):
+                values, estimated_connections = row(i * unit, stats, estimated_connections)
+                writer.write(values)
+        except KeyboardInterrupt:
+            pass
+
+
+def report(count: int, timer: float, table: FlowTable):
+    print(f"read {count} packets in {timer:.3f} seconds ({count / max(timer, 1e-9):.0f} packets/sec)")
+    print(table.summary())
+
+
+def row(time: float, stats: dict | None, estimated_connections: int) -> tuple[tuple, int]:
+    """
+    @params:
+        - time: The time of the time bucket in seconds.
+        - stats: The tallies of the time bucket, or None if the time bucket has no TCP packets.
+        - estimated_connections: The running estimate, doubled, before the time bucket.
+    @returns: The values of the row and the running estimate, doubled, after the time bucket.
+    """
+
+    if stats is None:
+        # the estimate is 0 rather than the running estimate; "0" rather than "0.0" in csvs
+        return ((time, *[0] * 23, 0), estimated_connections)
+
+    # For estimating # of connections:
+    #   SYN and SYN/ACK open in 1-direction
+    #   FIN and FIN/ACK close in 1-direction
+    #   RST closes in both directions
+
+    # Unaccounted for errors:
+    #   Retransmitted SYN, SYN/ACK, FIN, FIN/ACK, RST
+    #   RST in response to SYN, FIN, or FIN/ACK
+
+    estimated_connections += (stats["SYN"] + stats["SYN/ACK"]) \
+        - (stats["FIN"] + stats["FIN/ACK"] + 2 * stats["RST"])
+
+    avg_request_size = 0 if stats["HTTP Request"] == 0 \
+        else stats["Total HTTP Request Size"] // stats["HTTP Request"]
+    avg_response_size = 0 if stats["HTTP Response"] == 0 \
+        else stats["Total HTTP Response Size"] // stats["HTTP Response"]
+
+    avg_retrans_request_size = 0 if stats["Retransmitted HTTP Request"] == 0 \
+        else stats["Total Retransmitted HTTP Request Size"] // stats["Retransmitted HTTP Request"]
+    avg_retrans_response_size = 0 if stats["Retransmitted HTTP Response"] == 0 \
+        else stats["Total Retransmitted HTTP Response Size"] // stats["Retransmitted HTTP Response"]
+
+    # halves format identically with str() and :.1f
+    return ((time, stats["Total"], stats["SYN"], stats["SYN/ACK"],
+             stats["ACK and PSH/ACK"], stats["ACK"], stats["PSH/ACK"],
+             stats["0-Length ACK"], stats["0-Window ACK"],
+             stats["HTTP Request"], stats["Total HTTP Request Size"],
+             avg_request_size, stats["Retransmitted HTTP Request"],
+             stats["Total Retransmitted HTTP Request Size"],
+             avg_retrans_request_size, stats["HTTP Response"],
+             stats["Total HTTP Response Size"], avg_response_size,
+             stats["Retransmitted HTTP Response"],
+             stats["Total Retransmitted HTTP Response Size"],
+             avg_retrans_response_size, stats["FIN"], stats["FIN/ACK"],
+             stats["RST"], estimated_connections / 2), estimated_connections)
+
+
+def write(output: str, flags: dict, start: int, end: int, unit: int):
+    with Writer(output, COLUMNS) as writer:
         estimated_connections = 0
         for i in range(start, end + 1):
-            if i not in flags:
-                file.write(f"{i * unit:.3f},0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,"
-                           + "0,0,0,0\n")
-            else:
-                stats = flags[i]
-
-                # For estimating # of connections:
-                #   SYN and SYN/ACK open in 1-direction
-                #   FIN and FIN/ACK close in 1-direction
-                #   RST closes in both directions
-
-                # Unaccounted for errors:
-                #   Retransmitted SYN, SYN/ACK, FIN, FIN/ACK, RST
-                #   RST in response to SYN, FIN, or FIN/ACK
-                
-                estimated_connections += (stats["SYN"] + stats["SYN/ACK"]) \
-                    - (stats["FIN"] + stats["FIN/ACK"] + 2 * stats["RST"])
-
-                avg_request_size = 0 if stats["HTTP Request"] == 0 \
-                    else stats["Total HTTP Request Size"] // stats["HTTP Request"]
-                avg_response_size = 0 if stats["HTTP Response"] == 0 \
-                    else stats["Total HTTP Response Size"] // stats["HTTP Response"]
-
-                avg_retrans_request_size = 0 if stats["Retransmitted HTTP Request"] == 0 \
-                    else stats["Total Retransmitted HTTP Request Size"] // stats["Retransmitted HTTP Request"]
-                avg_retrans_response_size = 0 if stats["Retransmitted HTTP Response"] == 0 \
-                    else stats["Total Retransmitted HTTP Response Size"] // stats["Retransmitted HTTP Response"]
-
-                file.write(f"{i * unit:.3f},{stats["Total"]},{stats["SYN"]},{stats["SYN/ACK"]},"
-                           + f"{stats["ACK and PSH/ACK"]},{stats["ACK"]},{stats["PSH/ACK"]},"
-                           + f"{stats["0-Length ACK"]},{stats["0-Window ACK"]},"
-                           + f"{stats["HTTP Request"]},{stats["Total HTTP Request Size"]},"
-                           + f"{avg_request_size},{stats["Retransmitted HTTP Request"]},"
-                           + f"{stats["Total Retransmitted HTTP Request Size"]},"
-                           + f"{avg_retrans_request_size},{stats["HTTP Response"]},"
-                           + f"{stats["Total HTTP Response Size"]},{avg_response_size},"
-                           + f"{stats["Retransmitted HTTP Response"]},"
-                           + f"{stats["Total Retransmitted HTTP Response Size"]},"
-                           + f"{avg_retrans_response_size},{stats["FIN"]},{stats["FIN/ACK"]},"
-                           + f"{stats["RST"]},{estimated_connections / 2:.1f}\n")
+            values, estimated_connections = row(i * unit, flags.get(i), estimated_connections)
+            writer.write(values)
+
+
+def write_columns(output: str, tallies, connections, start: int, unit: float):
+    with Writer(output, COLUMNS) as writer:
+        # matches write(); buckets without any TCP packets report 0 connections
+        for i, (counts, estimate) in enumerate(zip(tallies.tolist(), connections.tolist())):
+            writer.write(((start + i) * unit, *counts, estimate if counts[0] else 0))
 
 
 if __name__ == "__main__":
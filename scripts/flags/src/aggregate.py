@@ -0,0 +1,165 @@
+from array import array
+from typing import Iterator
+
+import numpy as np
+
+from src.decoder import Segment, HTTP_REQUEST, HTTP_RESPONSE, FIN, SYN, RST, PSH, ACK
+from src.flows import FlowTable
+
+
+class Columns():
+    def __init__(self, table: FlowTable):
+        """
+        @params:
+            - table: Tracks flows for detecting retransmissions.
+        Note:
+            - Decoded TCP segments are stored as columns. Each segment is a row.
+        """
+
+        self._first = 0  # timestamp of the first packet, including non-TCP packets; us
+        self._last = 0  # timestamp of the last packet, including non-TCP packets; us
+        self._count = 0  # number of packets, including non-TCP packets
+
+        self._time = array("q")  # us
+        self._flags = array("H")
+        self._length = array("q")  # payload length
+        self._window = array("H")
+        self._http = array("B")  # HTTP_NONE, HTTP_REQUEST, or HTTP_RESPONSE
+        self._retransmitted = array("B")
+
+        self._table = table
+
+    def add(self, timestamp: int, segment: Segment | None):
+        """
+        @params:
+            - timestamp: The timestamp of the packet in microseconds.
+            - segment: The TCP segment, or None if the packet is not TCP.
+        """
+
+        if self._count == 0:
+            self._first = timestamp
+
+        self._last = timestamp
+        self._count += 1
+
+        if not segment:
+            return
+
+        # retransmissions depend upon the order of packets and not upon the precision
+        retransmitted = False
+        if segment.http and (segment.flags == ACK or segment.flags == PSH | ACK):
+            retransmitted = self._table.is_retransmission(segment, timestamp)
+        elif segment.flags & (FIN | RST):
+            self._table.close(segment)
+
+        self._time.append(timestamp)
+        self._flags.append(segment.flags)
+        self._length.append(segment.length)
+        self._window.append(segment.window)
+        self._http.append(segment.http)
+        self._retransmitted.append(retransmitted)
+
+
+def collect(packets: Iterator[tuple[int, Segment | None]], table: FlowTable, start: int = 0, end: int = 0,
+            width: int = 1) -> Columns:
+    """
+    @params:
+        - packets: The decoded packets as (timestamp in microseconds, segment).
+        - table: Tracks flows for detecting retransmissions.
+        - start: The first time bucket to record.
+        - end: The last time bucket to record. 0 is unbounded.
+        - width: The width of each time bucket in microseconds.
+    @returns: The columns. The columns may be aggregated at any precision if unbounded.
+    Note:
+        - As read(); segments before start are not tracked, and reading stops after end.
+    """
+
+    columns = Columns(table)
+    add = columns.add
+
+    offset = None
+    for timestamp, segment in packets:
+        if offset is None:
+            offset = timestamp // width
+
+        time = timestamp // width - offset
+        if end != 0 and end < time:
+            add(timestamp, None)  # counted as read; the last time bucket is end
+            break
+
+        add(timestamp, segment if start <= time else None)
+
+    return columns
+
+
+def aggregate(columns: Columns, start: int, end: int, width: int) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    @params:
+        - columns: The collected columns.
+        - start: The first time bucket to record.
+        - end: The last time bucket to record. 0 is unbounded.
+        - width: The width of each time bucket in microseconds.
+    @returns: The tallies per time bucket in the order of the csv columns, the estimated
+              number of connections per time bucket, and the last time bucket.
+    """
+
+    offset = columns._first // width
+    last = columns._last // width - offset
+    if end == 0 or last <= end:
+        end = last
+
+    buckets = np.frombuffer(columns._time, dtype=np.int64) // width - offset
+    mask = (start <= buckets) & (buckets <= end)
+
+    size = max(end - start + 1, 0)
+    index = buckets[mask] - start
+
+    flags = np.frombuffer(columns._flags, dtype=np.uint16)[mask]
+    length = np.frombuffer(columns._length, dtype=np.int64)[mask]
+    window = np.frombuffer(columns._window, dtype=np.uint16)[mask]
+    http = np.frombuffer(columns._http, dtype=np.uint8)[mask]
+    retransmitted = np.frombuffer(columns._retransmitted, dtype=np.uint8)[mask].astype(bool)
+
+    def count(selection: np.ndarray | None = None) -> np.ndarray:
+        if selection is None:
+            return np.bincount(index, minlength=size)
+        return np.bincount(index[selection], minlength=size)
+
+    def total(selection: np.ndarray) -> np.ndarray:
+        return np.bincount(index[selection], weights=length[selection], minlength=size).astype(np.int64)
+
+    def average(totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        return np.floor_divide(totals, counts, out=np.zeros_like(totals), where=counts != 0)
+
+    ack = flags == ACK
+    psh_ack = flags == PSH | ACK
+    acks = ack | psh_ack
+
+    request = acks & (http == HTTP_REQUEST)
+    response = acks & (http == HTTP_RESPONSE)
+
+    requests, requests_size = count(request), total(request)
+    retrans_requests, retrans_requests_size = \
+        count(request & retransmitted), total(request & retransmitted)
+    responses, responses_size = count(response), total(response)
+    retrans_responses, retrans_responses_size = \
+        count(response & retransmitted), total(response & retransmitted)
+
+    syn, syn_ack = count(flags == SYN), count(flags == SYN | ACK)
+    fin, fin_ack, rst = count(flags == FIN), count(flags == FIN | ACK), count(flags == RST)
+
+    tallies = np.column_stack([
+        count(), syn, syn_ack, count(acks), count(ack), count(psh_ack),
+        count(acks & (window != 0) & (length == 0)), count(acks & (window == 0)),
+        requests, requests_size, average(requests_size, requests),
+        retrans_requests, retrans_requests_size, average(retrans_requests_size, retrans_requests),
+        responses, responses_size, average(responses_size, responses),
+        retrans_responses, retrans_responses_size, average(retrans_responses_size, retrans_responses),
+        fin, fin_ack, rst,
+    ]).astype(np.int64)
+
+    # SYN and SYN/ACK open in 1-direction; FIN and FIN/ACK close in 1-direction
+    # RST closes in both directions
+    connections = np.cumsum(syn + syn_ack - fin - fin_ack - 2 * rst) / 2
+
+    return (tallies, connections, end)
@@ -0,0 +1,430 @@
+from mmap import mmap, ACCESS_READ
+from re import compile
+from struct import Struct
+from time import time_ns
+from typing import BinaryIO, Iterator, NamedTuple
+
+
+# pcap format: https://www.tcpdump.org/manpages/pcap-savefile.5.html
+_MAGIC_US = 0xa1b2c3d4  # microsecond timestamps
+_MAGIC_NS = 0xa1b23c4d  # nanosecond timestamps
+
+_LINKTYPE_ETHERNET = 1
+_LINKTYPE_RAW = 101  # raw IPv4 or IPv6
+_LINKTYPE_LINUX_SLL = 113  # tcpdump -i any
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_VLAN = 0x8100
+
+_ETH_P_ALL = 0x0003  # AF_PACKET; every protocol
+_PACKET_OUTGOING = 4
+_ARPHRD_LOOPBACK = 772
+
+_PROTO_TCP = 6
+
+_HEADER_LEN = 24
+_RECORD_LEN = 16
+
+# only the first bytes of the payload are sniffed for http
+# matches the dissection of scapy.layers.http on ports 80 and 8080
+_HTTP_PORTS = (80, 8080)
+_HTTP_METHODS = (b"OPTIONS", b"GET", b"HEAD", b"POST", b"PUT", b"DELETE", b"TRACE", b"CONNECT")
+_HTTP_REQUEST = compile(rb"^(?:" + b"|".join(_HTTP_METHODS) + rb") (?:.+?) HTTP/\d\.\d$")
+_HTTP_RESPONSE = compile(rb"^HTTP/\d\.\d \d\d\d .*$")
+
+# tcp flags; compared exactly, ex. "PA" is PSH and ACK without any other flag
+FIN = 0x01
+SYN = 0x02
+RST = 0x04
+PSH = 0x08
+ACK = 0x10
+
+HTTP_NONE = 0
+HTTP_REQUEST = 1
+HTTP_RESPONSE = 2
+
+
+class Segment(NamedTuple):
+    """
+    A decoded TCP segment. Only the fields used by the analysis are kept.
+    """
+
+    src: int
+    dst: int
+    sport: int
+    dport: int
+    seq: int
+    ack: int
+    flags: int  # 9 bits; FSRPAUECN
+    window: int
+    length: int  # payload length from the ip and tcp headers
+    http: int  # HTTP_NONE, HTTP_REQUEST, or HTTP_RESPONSE
+
+
+class PcapError(Exception):
+    pass
+
+
+def decode(path: str, begin: int | None = None,
+           stop: int | None = None) -> Iterator[tuple[int, Segment | None]]:
+    """
+    @params:
+        - path: The pcap file.
+        - begin: Optional. The byte offset of the first record to decode.
+        - stop: Optional. The byte offset after the last record to decode.
+    @returns: An iterator of (timestamp in microseconds, segment). The segment is None
+              for any packet that is not IPv4/TCP.
+    Note:
+        - Headers are parsed directly from the memory mapped file; no packet objects are built.
+        - begin and stop must be record boundaries, see split().
+    """
+
+    with open(path, "rb") as file:
+        if file.seek(0, 2) < _HEADER_LEN:
+            raise PcapError(f"{path} is not a pcap file")
+
+        with mmap(file.fileno(), 0, access=ACCESS_READ) as buffer:
+            record, divisor, linktype = _read_header(buffer)
+
+            begin = _HEADER_LEN if begin is None else begin
+            stop = len(buffer) if stop is None else stop
+            yield from _decode(buffer, begin, stop, record, divisor, linktype)
+
+
+def decode_stream(file: BinaryIO) -> Iterator[tuple[int, Segment | None]]:
+    """
+    @params:
+        - file: A pcap stream, ex. stdin from `tcpdump -U -w -`.
+    @returns: An iterator of (timestamp in microseconds, segment). Ends with the stream.
+    Note:
+        - Records are read one at a time; the stream is never held in memory.
+    """
+
+    header = file.read(_HEADER_LEN)
+    if len(header) < _HEADER_LEN:
+        raise PcapError("the stream is not a pcap stream")
+
+    record, divisor, linktype = _read_header(header)
+    unpack_record = record.unpack
+    read = file.read
+
+    while True:
+        header = read(_RECORD_LEN)
+        if len(header) < _RECORD_LEN:
+            return
+
+        ts_sec, ts_frac, incl_len, _ = unpack_record(header)
+
+        frame = read(incl_len)
+        if len(frame) < incl_len:
+            return  # truncated capture, ex. tcpdump was killed
+
+        yield (ts_sec * 1_000_000 + ts_frac // divisor, decode_frame(frame, 0, incl_len, linktype))
+
+
+def decode_socket(iface: str, tick: float = 1.0) -> Iterator[tuple[int, Segment | None]]:
+    """
+    @params:
+        - iface: The network interface, ex. "eth0".
+        - tick: Yields (timestamp, None) after <tick> seconds without any packet. In units of seconds.
+    @returns: An unending iterator of (timestamp in microseconds, segment).
+    Note:
+        - Reads from an AF_PACKET socket; requires root or CAP_NET_RAW. Linux only.
+        - Timestamps are taken when the packet is read, not when the packet is captured.
+        - Only interfaces with Ethernet headers are supported, ex. not "any".
+        - On loopback, each packet is read as both outgoing and incoming; only incoming is kept.
+    """
+
+    from socket import socket, htons, AF_PACKET, SOCK_RAW  # AF_PACKET is Linux only
+
+    with socket(AF_PACKET, SOCK_RAW, htons(_ETH_P_ALL)) as sock:
+        sock.bind((iface, 0))
+        sock.settimeout(tick)
+
+        buffer = bytearray(1 << 16)
+        recvfrom_into = sock.recvfrom_into
+
+        while True:
+            try:
+                length, (_, _, pkttype, hatype, _) = recvfrom_into(buffer)
+            except TimeoutError:
+                yield (time_ns() // 1_000, None)
+                continue
+
+            if pkttype == _PACKET_OUTGOING and hatype == _ARPHRD_LOOPBACK:
+                continue
+
+            yield (time_ns() // 1_000, decode_frame(buffer, 0, length, _LINKTYPE_ETHERNET))
+
+
+def split(path: str, chunks: int) -> list[tuple[int, int]]:
+    """
+    @params:
+        - path: The pcap file.
+        - chunks: The number of chunks.
+    @returns: The byte ranges of each chunk as (begin, stop). Ranges start and stop on record
+              boundaries. Fewer chunks are returned if a boundary cannot be found.
+    Note:
+        - Boundaries are found by seeking to an approximate offset and validating a chain of
+          record headers; the file is not scanned.
+    """
+
+    with open(path, "rb") as file:
+        size = file.seek(0, 2)
+        if size < _HEADER_LEN:
+            raise PcapError(f"{path} is not a pcap file")
+
+        with mmap(file.fileno(), 0, access=ACCESS_READ) as buffer:
+            record, _, _ = _read_header(buffer)
+            snaplen, = Struct(record.format[0] + "I").unpack_from(buffer, 16)
+
+            boundaries = [_HEADER_LEN]
+            for i in range(1, chunks):
+                boundary = _resync(buffer, record, snaplen, size * i // chunks)
+                if boundary is not None and boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+
+            boundaries.append(size)
+            return [*zip(boundaries[:-1], boundaries[1:])]
+
+
+_RESYNC_WINDOW = 1 << 20  # bytes searched for a boundary
+_RESYNC_CHAIN = 8  # consecutive valid record headers
+
+
+def _resync(buffer, record: Struct, snaplen: int, offset: int) -> int | None:
+    """
+    @params:
+        - buffer: The pcap file.
+        - record: The record header struct.
+        - snaplen: The maximum captured length of a record.
+        - offset: The byte offset to search from.
+    @returns: The byte offset of the first record header at or after the offset.
+    """
+
+    end = len(buffer)
+    ts_first, _, _, _ = record.unpack_from(buffer, _HEADER_LEN)
+
+    for candidate in range(max(offset, _HEADER_LEN), min(offset + _RESYNC_WINDOW, end - _RECORD_LEN)):
+        position = candidate
+        ts_previous = None
+
+        for _ in range(_RESYNC_CHAIN):
+            if position == end:
+                break  # the chain reached the end of the file
+            if position + _RECORD_LEN > end:
+                position = None
+                break
+
+            ts_sec, ts_frac, incl_len, orig_len = record.unpack_from(buffer, position)
+
+            valid = 0 < incl_len <= snaplen and incl_len <= orig_len and ts_frac < 1_000_000_000 \
+                and ts_sec >= ts_first - 86_400 \
+                and (ts_previous is None or abs(ts_sec - ts_previous) <= 3_600)
+
+            if not valid:
+                position = None
+                break
+
+            ts_previous = ts_sec
+            position += _RECORD_LEN + incl_len
+
+        if position is not None and position <= end:
+            return candidate
+
+    return None
+
+
+def _read_header(buffer) -> tuple[Struct, int, int]:
+    """
+    @params:
+        - buffer: The start of the pcap file.
+    @returns: The record header struct, the timestamp divisor, and the linktype.
+    """
+
+    for endian in ("<", ">"):
+        magic, _, _, _, _, _, linktype = Struct(f"{endian}IHHiIII").unpack_from(buffer, 0)
+
+        if magic == _MAGIC_US:
+            return Struct(f"{endian}IIII"), 1, linktype & 0xffff
+        if magic == _MAGIC_NS:
+            return Struct(f"{endian}IIII"), 1_000, linktype & 0xffff
+
+    raise PcapError("unknown pcap magic number; pcapng is not supported")
+
+
+def _decode(buffer, offset: int, end: int, record: Struct, divisor: int,
+            linktype: int) -> Iterator[tuple[int, Segment | None]]:
+    """
+    @params:
+        - buffer: The pcap file.
+        - offset: The offset of the first record.
+        - end: The offset after the last record.
+        - record: The record header struct.
+        - divisor: Divides the fractional timestamp into microseconds.
+        - linktype: The linktype of the pcap.
+    @returns: An iterator of (timestamp in microseconds, segment).
+    """
+
+    unpack_record = record.unpack_from
+
+    while offset + _RECORD_LEN <= end:
+        ts_sec, ts_frac, incl_len, _ = unpack_record(buffer, offset)
+        offset += _RECORD_LEN
+
+        if offset + incl_len > end:
+            break  # truncated capture, ex. tcpdump was killed
+
+        time = ts_sec * 1_000_000 + ts_frac // divisor
+        yield (time, decode_frame(buffer, offset, incl_len, linktype))
+        offset += incl_len
+
+
+_ETHERTYPE = Struct("!H")
+_IPV4 = Struct("!BxHxxHxB")  # version and ihl, total length, fragment, protocol
+_ADDRESSES = Struct("!II")
+_TCP = Struct("!HHIIBBH")  # ports, seq, ack, data offset, flags, window
+
+
+def decode_frame(buffer, offset: int, length: int, linktype: int) -> Segment | None:
+    """
+    @params:
+        - buffer: A buffer containing the frame.
+        - offset: The offset of the frame within the buffer.
+        - length: The captured length of the frame.
+        - linktype: The linktype of the frame.
+    @returns: The TCP segment, or None if the frame is not IPv4/TCP.
+    """
+
+    end = offset + length
+
+    if linktype == _LINKTYPE_ETHERNET:
+        if length < 14:
+            return None
+
+        ethertype, = _ETHERTYPE.unpack_from(buffer, offset + 12)
+        offset += 14
+
+        if ethertype == _ETHERTYPE_VLAN and offset + 4 <= end:
+            ethertype, = _ETHERTYPE.unpack_from(buffer, offset + 2)
+            offset += 4
+
+        if ethertype != _ETHERTYPE_IPV4:
+            return None
+
+    elif linktype == _LINKTYPE_LINUX_SLL:
+        if length < 16:
+            return None
+
+        ethertype, = _ETHERTYPE.unpack_from(buffer, offset + 14)
+        offset += 16
+
+        if ethertype != _ETHERTYPE_IPV4:
+            return None
+
+    elif linktype != _LINKTYPE_RAW:
+        raise PcapError(f"unsupported linktype {linktype}; use --scapy")
+
+    # ipv4
+
+    if offset + 20 > end:
+        return None
+
+    version_ihl, ip_length, frag, proto = _IPV4.unpack_from(buffer, offset)
+    if version_ihl >> 4 != 4 or proto != _PROTO_TCP or frag & 0x1fff:
+        return None  # scapy only dissects tcp in the first fragment
+
+    ip_header_length = (version_ihl & 0x0f) * 4
+    src, dst = _ADDRESSES.unpack_from(buffer, offset + 12)
+    offset += ip_header_length
+
+    # tcp
+
+    if offset + 20 > end:
+        return None
+
+    sport, dport, seq, ack, data_offset, flags, window = _TCP.unpack_from(buffer, offset)
+
+    flags |= (data_offset & 0x01) << 8  # ns bit
+    tcp_header_length = (data_offset >> 4) * 4
+    payload_length = ip_length - ip_header_length - tcp_header_length
+
+    http = HTTP_NONE
+    if payload_length > 0 and (sport in _HTTP_PORTS or dport in _HTTP_PORTS):
+        start = offset + tcp_header_length
+        stop = min(start + payload_length, end)
+        if start < stop:
+            http = _sniff_http(bytes(buffer[start:stop]))
+
+    return Segment(src, dst, sport, dport, seq, ack, flags, window, payload_length, http)
+
+
+def _sniff_http(payload: bytes) -> int:
+    """
+    @params:
+        - payload: The TCP payload.
+    @returns: Whether the payload starts an HTTP request or response.
+    """
+
+    if not payload.startswith(_HTTP_METHODS) and not payload.startswith(b"HTTP/"):
+        return HTTP_NONE
+
+    line = payload.find(b"\r\n")
+    if line == -1:
+        return HTTP_NONE
+
+    line = payload[:line]
+    if _HTTP_REQUEST.match(line):
+        return HTTP_REQUEST
+    if _HTTP_RESPONSE.match(line):
+        return HTTP_RESPONSE
+    return HTTP_NONE
+
+
+def decode_scapy(path: str) -> Iterator[tuple[int, Segment | None]]:
+    """
+    @params:
+        - path: The pcap file.
+    @returns: An iterator of (timestamp in microseconds, segment).
+    Note:
+        - Slow, but supports every format and linktype that scapy supports, ex. pcapng.
+    """
+
+    # silence scapy startup warnings
+    import logging
+    logging.getLogger("scapy.runtime").setLevel(logging.ERROR)
+
+    from scapy.all import PcapReader, IP, TCP
+    from scapy.layers.http import HTTPRequest, HTTPResponse
+
+    with PcapReader(path) as pcap:
+        for packet in pcap:
+            time = int(packet.time * 1_000_000)
+
+            if TCP not in packet or IP not in packet:
+                yield (time, None)
+                continue
+
+            http = HTTP_NONE
+            if HTTPRequest in packet:
+                http = HTTP_REQUEST
+            elif HTTPResponse in packet:
+                http = HTTP_RESPONSE
+
+            # len(packet[TCP].payload) return unencoded length
+            ip_length = packet[IP].len
+            ip_header_length = packet[IP].ihl * 4
+            tcp_header_length = packet[TCP].dataofs * 4
+
+            yield (time, Segment(
+                src=int.from_bytes(bytes(map(int, packet[IP].src.split(".")))),
+                dst=int.from_bytes(bytes(map(int, packet[IP].dst.split(".")))),
+                sport=packet[TCP].sport,
+                dport=packet[TCP].dport,
+                seq=packet[TCP].seq,
+                ack=packet[TCP].ack,
+                flags=int(packet[TCP].flags),
+                window=packet[TCP].window,
+                length=ip_length - ip_header_length - tcp_header_length,
+                http=http,
+            ))
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+
+from src.decoder import Segment, FIN, RST
+
+
+class _Flow():
+    __slots__ = ("_last", "_positions", "_fins")
+
+    def __init__(self, timestamp: int):
+        self._last = timestamp  # us
+        self._positions: set[tuple[int, int, int]] = set()  # (direction, seq, ack)
+        self._fins = 0  # bitmask of directions that have sent a FIN
+
+
+class FlowTable():
+    def __init__(self, timeout: int = 120, capacity: int = 1_000_000):
+        """
+        @params:
+            - timeout: Flows idle for longer than the timeout are evicted. In units of seconds.
+            - capacity: The maximum number of tracked flows. The least recently seen flow is evicted.
+        Note:
+            - Flows are keyed by connection; both directions share a flow.
+            - Flows are evicted after an RST, or after a FIN in both directions. A retransmission
+              after the flow is closed is not detected.
+            - Flows are ordered by last seen, so idle flows are evicted from the front of the table
+              in constant time.
+        """
+
+        assert(timeout > 0)
+        self._timeout = timeout * 1_000_000  # us
+
+        assert(capacity > 0)
+        self._capacity = capacity
+
+        self._flows: OrderedDict[tuple, _Flow] = OrderedDict()
+
+        self._evicted_closed = 0
+        self._evicted_idle = 0
+        self._evicted_capacity = 0
+
+    def _key(self, segment: Segment) -> tuple[tuple, int]:
+        """
+        @params:
+            - segment: The TCP segment.
+        @returns: The key of the connection and the direction of the segment.
+        """
+
+        if (segment.src, segment.sport) <= (segment.dst, segment.dport):
+            return ((segment.src, segment.dst, segment.sport, segment.dport), 0)
+        return ((segment.dst, segment.src, segment.dport, segment.sport), 1)
+
+    def is_retransmission(self, segment: Segment, timestamp: int) -> bool:
+        """
+        @params:
+            - segment: The TCP segment.
+            - timestamp: The timestamp of the segment in microseconds.
+        @returns: Whether the position of the segment has been seen before within the flow.
+                  The position is recorded if it has not been seen.
+        """
+
+        key, direction = self._key(segment)
+        position = (direction, segment.seq, segment.ack)
+
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = _Flow(timestamp)
+            self._flows[key] = flow
+
+            if len(self._flows) > self._capacity:
+                self._flows.popitem(last=False)
+                self._evicted_capacity += 1
+        else:
+            flow._last = timestamp
+            self._flows.move_to_end(key)
+
+        self._expire(timestamp)
+
+        if position in flow._positions:
+            return True
+
+        flow._positions.add(position)
+        return False
+
+    def close(self, segment: Segment):
+        """
+        @params:
+            - segment: A TCP segment with the FIN or RST flag.
+        """
+
+        key, direction = self._key(segment)
+
+        flow = self._flows.get(key)
+        if flow is None:
+            return
+
+        if segment.flags & RST:
+            del self._flows[key]
+            self._evicted_closed += 1
+
+        elif segment.flags & FIN:
+            flow._fins |= 1 << direction
+            if flow._fins == 0b11:
+                del self._flows[key]
+                self._evicted_closed += 1
+
+    def _expire(self, timestamp: int):
+        """
+        @params:
+            - timestamp: The current timestamp in microseconds.
+        """
+
+        flows = self._flows
+        while flows:
+            flow = next(iter(flows.values()))
+            if timestamp - flow._last <= self._timeout:
+                break
+
+            flows.popitem(last=False)
+            self._evicted_idle += 1
+
+    def summary(self) -> str:
+        """
+        @returns: The number of tracked and evicted flows.
+        """
+
+        return f"flows: {len(self._flows)} tracked, {self._evicted_closed} closed, " \
+               + f"{self._evicted_idle} idle, {self._evicted_capacity} over capacity"
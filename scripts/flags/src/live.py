@@ -0,0 +1,47 @@
+from typing import Iterator
+
+from src.decoder import Segment
+from src.flows import FlowTable
+from src.tally import add_packet
+
+
+def stream(packets: Iterator[tuple[int, Segment | None]], width: int,
+           table: FlowTable) -> Iterator[tuple[int, dict | None]]:
+    """
+    @params:
+        - packets: The decoded packets as (timestamp in microseconds, segment).
+        - width: The width of each time bucket in microseconds.
+        - table: Tracks flows for detecting retransmissions.
+    @returns: An iterator of (time bucket, tallies) for each time bucket once the time bucket
+              closes. The tallies are None if the time bucket has no TCP packets.
+    Note:
+        - A time bucket closes when a packet of a later time bucket is read. Time 0 is the
+          first packet.
+        - Only the open time bucket is held in memory; the flow table is bounded by its capacity.
+        - A packet from an earlier time bucket, ex. reordered by the capture, is tallied
+          in the open time bucket.
+        - The open time bucket is closed once the packets end, ex. at the end of a pipe, or on
+          ctrl + c; as the last time bucket of a pcap.
+    """
+
+    flags = {}
+    offset = None
+    current = 0
+
+    try:
+        for timestamp, segment in packets:
+            if offset is None:
+                offset = timestamp // width
+
+            time = timestamp // width - offset
+            while current < time:
+                yield (current, flags.pop(current, None))
+                current += 1
+
+            if segment:
+                add_packet(flags, table, segment, current, timestamp)
+    except KeyboardInterrupt:
+        pass  # the open time bucket is written below
+
+    if offset is not None:
+        yield (current, flags.pop(current, None))
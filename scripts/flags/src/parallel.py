@@ -0,0 +1,192 @@
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob, has_magic
+from os import path as os_path
+
+from src.decoder import Segment, decode, split, HTTP_REQUEST
+from src.flows import FlowTable
+from src.tally import read, merge
+
+
+class _DeferredTable():
+    def __init__(self):
+        """
+        Records flow events instead of detecting retransmissions.
+        Used for chunks of a pcap; the events are replayed in order after the chunks are read.
+        """
+
+        self._events: list[tuple[int, Segment, bool]] = []  # (timestamp, segment, is close)
+
+    def is_retransmission(self, segment: Segment, timestamp: int) -> bool:
+        self._events.append((timestamp, segment, False))
+        return False
+
+    def close(self, segment: Segment):
+        self._events.append((0, segment, True))
+
+
+def expand(input: str) -> list[str]:
+    """
+    @params:
+        - input: A pcap file, a directory of pcap files, or a glob, ex. "logs/*/dump.pcap".
+    @returns: The pcap files, sorted.
+    """
+
+    if os_path.isdir(input):
+        return sorted(glob(os_path.join(input, "**", "*.pcap"), recursive=True))
+    if has_magic(input):
+        return sorted(glob(input, recursive=True))
+    return [input]
+
+
+def name(path: str, paths: list[str]) -> str:
+    """
+    @params:
+        - path: The pcap file.
+        - paths: All pcap files.
+    @returns: A name for the pcap, ex. "client-0-dump" for "logs/client-0/dump.pcap".
+              The parent directory is omitted if the file name is unique.
+    """
+
+    stem = os_path.splitext(os_path.basename(path))[0]
+    stems = [os_path.splitext(os_path.basename(other))[0] for other in paths]
+
+    if stems.count(stem) == 1:
+        return stem
+    return f"{os_path.basename(os_path.dirname(os_path.abspath(path)))}-{stem}"
+
+
+def _first(path: str) -> int | None:
+    """
+    @returns: The timestamp of the first packet in microseconds, or None if the pcap is empty.
+    """
+
+    packets = decode(path)
+    for timestamp, _ in packets:
+        packets.close()
+        return timestamp
+    return None
+
+
+def _analyze(path: str, begin: int | None, stop: int | None, start: int, end: int,
+             width: int, offset: int, deferred: bool) -> tuple[dict, int, int, object]:
+    """
+    @params:
+        - path: The pcap file.
+        - begin: The byte offset of the chunk, or None for the whole file.
+        - stop: The byte offset after the chunk, or None for the whole file.
+        - start: The first time bucket to record.
+        - end: The last time bucket to record. 0 is unbounded.
+        - width: The width of each time bucket in microseconds.
+        - offset: The time bucket of time 0.
+        - deferred: Record flow events instead of detecting retransmissions.
+    @returns: The tallies, the last time bucket, the number of packets, and either the flow
+              events or the flow summary.
+    Note:
+        - Runs within a worker process.
+    """
+
+    table = _DeferredTable() if deferred else FlowTable()
+    flags, last, count = read(decode(path, begin, stop), start, end, width, table, offset)
+
+    if deferred:
+        return (flags, last, count, table._events)
+    return (flags, last, count, table.summary())
+
+
+def _replay(flags: dict, table: FlowTable, events: list[tuple[int, Segment, bool]],
+            width: int, offset: int):
+    """
+    @params:
+        - flags: The tallies per time bucket. Updated in place.
+        - table: Tracks flows across chunks.
+        - events: The flow events of a chunk, in order.
+        - width: The width of each time bucket in microseconds.
+        - offset: The time bucket of time 0.
+    """
+
+    for timestamp, segment, is_close in events:
+        if is_close:
+            table.close(segment)
+            continue
+
+        if table.is_retransmission(segment, timestamp):
+            stats = flags[timestamp // width - offset]
+            kind = "Request" if segment.http == HTTP_REQUEST else "Response"
+
+            stats[f"Retransmitted HTTP {kind}"] += 1
+            stats[f"Total Retransmitted HTTP {kind} Size"] += segment.length
+
+
+def analyze(paths: list[str], start: int, end: int, width: int, jobs: int, chunks: int,
+            combine: bool) -> list[tuple[str, dict, int, int, list[str]]]:
+    """
+    @params:
+        - paths: The pcap files.
+        - start: The first time bucket to record.
+        - end: The last time bucket to record. 0 is unbounded.
+        - width: The width of each time bucket in microseconds.
+        - jobs: The number of worker processes.
+        - chunks: The number of chunks to split each pcap into.
+        - combine: Combine all pcaps into a single result.
+    @returns: For each result: the name, the tallies, the last time bucket, the number of
+              packets, and the flow summaries.
+    Note:
+        - If combined, time 0 is the first packet across all pcaps. Otherwise, time 0 is
+          the first packet of each pcap.
+        - Retransmissions are detected per pcap; the same packet captured by two containers
+          is not a retransmission.
+    """
+
+    offsets = {path: _first(path) for path in paths}
+    paths = [path for path in paths if offsets[path] is not None]  # skip empty pcaps
+
+    if combine and paths:
+        first = min(offsets[path] for path in paths)
+        offsets = {path: first for path in paths}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for path in paths:
+            offset = offsets[path] // width
+            ranges = split(path, chunks) if chunks > 1 else [(None, None)]
+
+            deferred = len(ranges) > 1
+            futures[path] = [pool.submit(_analyze, path, begin, stop, start, end, width, offset, deferred)
+                             for begin, stop in ranges]
+
+        results = []
+        for path in paths:
+            offset = offsets[path] // width
+            flags, last, count = {}, 0, 0
+
+            table = FlowTable()
+            summaries = []
+
+            for future in futures[path]:  # chunks are merged in order
+                chunk_flags, chunk_last, chunk_count, events = future.result()
+
+                merge(flags, chunk_flags)
+                last = max(last, chunk_last)
+                count += chunk_count
+
+                if isinstance(events, str):
+                    summaries.append(events)
+                else:
+                    _replay(flags, table, events, width, offset)
+
+            if not summaries:
+                summaries.append(table.summary())
+
+            results.append((name(path, paths), flags, last, count, summaries))
+
+    if not combine:
+        return results
+
+    flags, last, count, summaries = {}, 0, 0, []
+    for _, other, other_last, other_count, other_summaries in results:
+        merge(flags, other)
+        last = max(last, other_last)
+        count += other_count
+        summaries += other_summaries
+
+    return [("", flags, last, count, summaries)]
@@ -0,0 +1,110 @@
+from typing import Iterator
+
+from src.decoder import Segment, HTTP_REQUEST, HTTP_RESPONSE, FIN, SYN, RST, PSH, ACK
+from src.flows import FlowTable
+
+
+def read(packets: Iterator[tuple[int, Segment | None]], start: int, end: int, width: int,
+         table: FlowTable, offset: int | None = None) -> tuple[dict, int, int]:
+    """
+    @params:
+        - packets: The decoded packets as (timestamp in microseconds, segment).
+        - start: The first time bucket to record.
+        - end: The last time bucket to record. 0 is unbounded.
+        - width: The width of each time bucket in microseconds.
+        - table: Tracks flows for detecting retransmissions.
+        - offset: The time bucket of time 0. Defaults to the time bucket of the first packet.
+    @returns: The tallies per time bucket, the last time bucket, and the number of packets read.
+    """
+
+    flags = {}
+    count = 0
+
+    time = 0
+    for timestamp, segment in packets:
+        if offset is None:
+            offset = timestamp // width
+
+        count += 1
+
+        time = timestamp // width - offset
+        if end != 0 and end < time:
+            break
+
+        if start <= time and segment:
+            add_packet(flags, table, segment, time, timestamp)
+
+    if end != 0 and end < time:
+        return (flags, end, count)  # time is 1 index off
+    return (flags, time, count)
+
+
+def add_packet(flags: dict, table: FlowTable, segment: Segment, time: int, timestamp: int) -> None:
+    if time not in flags:
+        flags[time] = {"Total": 0, "SYN": 0, "SYN/ACK": 0, "ACK and PSH/ACK": 0, "ACK": 0, "PSH/ACK": 0,
+                       "0-Length ACK": 0, "0-Window ACK": 0, "HTTP Request": 0, "Total HTTP Request Size": 0,
+                       "Retransmitted HTTP Request": 0, "Total Retransmitted HTTP Request Size": 0,
+                       "HTTP Response": 0, "Total HTTP Response Size": 0, "Retransmitted HTTP Response": 0,
+                       "Total Retransmitted HTTP Response Size": 0, "FIN": 0, "FIN/ACK": 0, "RST": 0}
+
+    flags[time]["Total"] += 1
+
+    if segment.flags == SYN:
+        flags[time]["SYN"] += 1
+    elif segment.flags == SYN | ACK:
+        flags[time]["SYN/ACK"] += 1
+    elif segment.flags == ACK or segment.flags == PSH | ACK:
+        flags[time]["ACK and PSH/ACK"] += 1
+        if segment.flags == ACK:
+            flags[time]["ACK"] += 1
+        elif segment.flags == PSH | ACK:
+            flags[time]["PSH/ACK"] += 1
+
+        if segment.window == 0:
+            flags[time]["0-Window ACK"] += 1
+        elif segment.length == 0:
+            flags[time]["0-Length ACK"] += 1
+
+        if segment.http == HTTP_REQUEST:
+            flags[time]["HTTP Request"] += 1
+            flags[time]["Total HTTP Request Size"] += segment.length
+
+            if table.is_retransmission(segment, timestamp):
+                flags[time]["Retransmitted HTTP Request"] += 1
+                flags[time]["Total Retransmitted HTTP Request Size"] += \
+                    segment.length
+
+        elif segment.http == HTTP_RESPONSE:
+            flags[time]["HTTP Response"] += 1
+            flags[time]["Total HTTP Response Size"] += segment.length
+
+            if table.is_retransmission(segment, timestamp):
+                flags[time]["Retransmitted HTTP Response"] += 1
+                flags[time]["Total Retransmitted HTTP Response Size"] += \
+                    segment.length
+
+    elif segment.flags == FIN:
+        flags[time]["FIN"] += 1
+    elif segment.flags == FIN | ACK:
+        flags[time]["FIN/ACK"] += 1
+    elif segment.flags == RST:
+        flags[time]["RST"] += 1
+
+    if segment.flags & (FIN | RST):
+        table.close(segment)
+
+
+def merge(flags: dict, other: dict):
+    """
+    @params:
+        - flags: The tallies per time bucket. Updated in place.
+        - other: The tallies per time bucket to add.
+    """
+
+    for time, stats in other.items():
+        if time not in flags:
+            flags[time] = stats
+            continue
+
+        for key, value in stats.items():
+            flags[time][key] += value
@@ -0,0 +1,59 @@
+from os import path as os_path
+from sys import path as sys_path
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from src.decoder import Segment, HTTP_NONE, SYN, ACK, FIN
+from src.flows import FlowTable
+from src.live import stream
+from src.tally import read
+
+
+# ex. python3 tests/test_live.py
+
+
+WIDTH = 1_000  # us
+
+
+def _segment(flags: int) -> Segment:
+    return Segment(1, 2, 1_024, 80, 0, 0, flags, 512, 0, HTTP_NONE)
+
+
+def _packets() -> list[tuple[int, Segment | None]]:
+    # time buckets 0, 2, and 4; the last time bucket is still open once the packets end
+    return [(10_000, _segment(SYN)), (12_500, None), (12_900, _segment(SYN | ACK)),
+            (14_100, _segment(ACK)), (14_200, _segment(FIN))]
+
+
+def test_last_bucket():
+    buckets = [*stream(iter(_packets()), WIDTH, FlowTable())]
+
+    assert [time for time, _ in buckets] == [0, 1, 2, 3, 4]
+    assert buckets[-1][1]["ACK"] == 1 and buckets[-1][1]["FIN"] == 1
+
+
+def test_as_offline():
+    flags, end, _ = read(iter(_packets()), 0, 0, WIDTH, FlowTable())
+    buckets = dict(stream(iter(_packets()), WIDTH, FlowTable()))
+
+    assert [*buckets] == [*range(end + 1)]
+    assert {time: stats for time, stats in buckets.items() if stats} == flags
+
+
+def test_interrupted():
+    def packets():
+        yield from _packets()
+        raise KeyboardInterrupt  # ex. ctrl + c while reading
+
+    buckets = [*stream(packets(), WIDTH, FlowTable())]
+    assert buckets[-1][0] == 4 and buckets[-1][1]["Total"] == 2
+
+
+def test_empty():
+    assert [*stream(iter([]), WIDTH, FlowTable())] == []
+
+
+if __name__ == "__main__":
+    for name, test in [*globals().items()]:
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: passed")
@@ -0,0 +1,90 @@
+from glob import glob, has_magic
+from os import path as os_path
+from sys import argv, path as sys_path
+from time import sleep
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from shared.writer import Writer
+from src.ring import RingReader
+
+
+# Converts the ring buffers of monitors into csv, parquet, or arrow on demand.
+# ex. python3 aggregate.py 'logs/*/monitor.ring' monitor.csv writes monitor-<container>.csv per ring.
+
+
+WAIT = 1  # seconds; polls the rings every <WAIT> seconds with --follow
+
+
+def expand(input: str) -> list[str]:
+    """
+    @params:
+        - input: A ring file, a directory of ring files, or a glob, ex. "logs/*/monitor.ring".
+    @returns: The ring files, sorted.
+    """
+
+    if os_path.isdir(input):
+        return sorted(glob(os_path.join(input, "**", "*.ring"), recursive=True))
+    if has_magic(input):
+        return sorted(glob(input, recursive=True))
+    return [input]
+
+
+def output_path(output: str, ring: str, rings: list[str]) -> str:
+    """
+    @returns: The output for the ring, ex. monitor-client-0.csv for logs/client-0/monitor.ring.
+    """
+
+    if len(rings) == 1:
+        return output
+
+    name = os_path.basename(os_path.dirname(os_path.abspath(ring)))
+    stem, dot, suffix = output.rpartition(".")
+    return f"{stem}-{name}{dot}{suffix}" if dot else f"{output}-{name}"
+
+
+def aggregate(rings: list[str], output: str, follow: bool):
+    """
+    @params:
+        - rings: The ring files.
+        - output: The output; the format is selected by the extension.
+        - follow: Keep appending new records until interrupted.
+    """
+
+    readers = [RingReader(ring) for ring in rings]
+    writers = [Writer(output_path(output, ring, rings), reader.columns)
+               for ring, reader in zip(rings, readers)]
+    heads = [0] * len(readers)
+
+    try:
+        while True:
+            for i, (reader, writer) in enumerate(zip(readers, writers)):
+                records, heads[i] = reader.read(heads[i])
+                writer.write_rows(records)
+
+            if not follow:
+                break
+            sleep(WAIT)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for reader, writer in zip(readers, writers):
+            writer.close()
+            reader.close()
+
+
+if __name__ == "__main__":
+    options = [arg for arg in argv[1:] if arg.startswith("--")]
+    args = [arg for arg in argv[1:] if not arg.startswith("--")]
+
+    if len(args) != 2:
+        print(f"usage: {argv[0]} [--follow] input output")
+        print("\t- input may be a ring, a directory, or a glob, ex. 'logs/*/monitor.ring'")
+        print("\t- output may be .csv, .parquet, or .arrow; one output per ring, ex. output-client-0.csv")
+        exit(1)
+
+    rings = expand(args[0])
+    if not rings:
+        print("error: no ring files found")
+        exit(1)
+
+    aggregate(rings, args[1], "--follow" in options)
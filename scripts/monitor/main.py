@@ -1,40 +1,131 @@
+from os import path as os_path
+from signal import signal, SIGINT, SIGTERM
+from sys import argv, path as sys_path
+from time import perf_counter, process_time, time
+
+from src.proc import Proc
+from src.scheduler import Scheduler
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from shared.writer import Column, Writer
+from src.ring import RingWriter
+
+
+BATCH = 100  # rows written at once; ex. every 10 seconds with a precision of 100 ms
+CAPACITY = 65_536  # records kept by a .ring output; ex. 10 minutes with a precision of 10 ms
+
+# counters reported as per second rates with --rates; and each cpu{core}_*_time
+COUNTERS = ["ctx_switches", "interrupts", "net_sent_bytes", "net_received_bytes", "net_packets_sent",
+            "net_packets_received", "disk_reads_count", "disk_writes_count", "disk_read_bytes",
+            "disk_write_bytes"]
+
+
+def measure(wait: float, iface: str, path: str, fast: bool = True, rates: bool = False,
+            capacity: int = CAPACITY):
+    """
+    @params:
+        - wait: The time between samples. In units of seconds.
+        - iface: The network interface, ex. "eth0".
+        - path: The output. A .ring output is a memory mapped ring buffer, see aggregate.py.
+        - fast: Read procfs directly instead of psutil. psutil.net_connections() enumerates every
+                file descriptor of every process, which is costly with many connections.
+        - rates: Also report the per second rate of each counter since the previous sample.
+        - capacity: The number of records kept by a .ring output.
+    """
+
+    if fast:
+        proc = Proc()
+        cpu = len(proc.cpu()[0])
+    else:
+        import psutil  # only with --psutil
+
+        proc = None
+        cpu = psutil.cpu_count(logical=True)
 
-import psutil
+    columns = [Column("timestamp", float, "{:1f}")]
+    for core in range(cpu):
+        columns += [Column(f"cpu{core}_percent", float),  # cpu{core}_frequency,
+                    Column(f"cpu{core}_user_time", float), Column(f"cpu{core}_system_time", float),
+                    Column(f"cpu{core}_idle_time", float)]
 
-from sys import argv
-from io import TextIOWrapper
-from time import sleep, time
+    columns += [Column(name) for name in [
+        "ctx_switches", "interrupts", "syscalls"]] + [Column("mem_percent", float)]
+    columns += [Column(name) for name in [
+        "mem_total", "mem_available", "mem_used", "mem_cache_bytes", "net_sent_bytes",
+        "net_received_bytes", "net_packets_sent", "net_packets_received", "sock_established",
+        "sock_closing", "disk_reads_count", "disk_writes_count", "disk_read_bytes",
+        "disk_write_bytes"]]
 
+    counters = [i for i, column in enumerate(columns)
+                if column.name in COUNTERS or column.name.endswith("_time")]
 
-def measure(wait: float, iface: str, path: str):
-    with open(path, "w") as file:
-        file.write("timestamp,")
+    # the skew of each sample after its scheduled time, and the cost of each sample; wall and
+    # cpu time of this process
+    columns += [Column("skew_seconds", float), Column("sample_seconds", float),
+                Column("sample_cpu_seconds", float)]
 
-        cpu = psutil.cpu_count(logical=True)
-        for core in range(cpu):
-            file.write(f"cpu{core}_percent," +  # cpu{core}_frequency,
-                       f"cpu{core}_user_time,cpu{core}_system_time,cpu{core}_idle_time,")
+    if rates:
+        columns += [Column(f"{columns[i].name}_per_second", float) for i in counters]
 
-        file.write("ctx_switches,interrupts,syscalls,mem_percent,mem_total,mem_available," +
-                   "mem_used,mem_cache_bytes,net_sent_bytes,net_received_bytes," +
-                   "net_packets_sent,net_packets_received,sock_established,sock_closing," +
-                   "disk_reads_count,disk_writes_count,disk_read_bytes,disk_write_bytes\n")
+    scheduler = Scheduler(wait)
+    previous, previous_tick = None, 0.0
 
+    output = RingWriter(path, columns, capacity) if path.endswith(".ring") else Writer(path, columns, BATCH)
+
+    with output as writer:
         while True:
-            _measure(file, cpu, iface)
-            sleep(wait)
+            tick, skew = scheduler.wait()
+
+            timer, cpu_timer = perf_counter(), process_time()
+            row = _measure_proc(proc, cpu, iface) if fast else _measure(cpu, iface)
+            cost = [skew, perf_counter() - timer, process_time() - cpu_timer]
+
+            if not rates:
+                writer.write(row + cost)
+                continue
+
+            elapsed = tick - previous_tick
+            if previous is None or elapsed <= 0:
+                per_second = [0.0] * len(counters)
+            else:
+                per_second = [(row[i] - previous[i]) / elapsed for i in counters]
+
+            writer.write(row + cost + per_second)
+            previous, previous_tick = row, tick
+
+
+def _measure_proc(proc: Proc, cpu: int, iface: str) -> list:
+    row = [time()]  # timestamp
+
+    cores, ctx_switches, interrupts = proc.cpu()
+    for core in range(cpu):
+        row += cores[core]
 
+    mem_percent, mem_total, mem_available, mem_cached = proc.memory()
+    bytes_sent, bytes_recv, packets_sent, packets_recv = proc.net(iface)
+    established, closing = proc.tcp()
+    reads, writes, read_bytes, write_bytes = proc.disk()
 
-def _measure(file: TextIOWrapper, cpu: int, iface: str):
-    file.write(f"{time():1f},")  # timestamp
+    return row + [
+        ctx_switches, interrupts, 0,  # syscalls; not counted by linux
+        mem_percent, mem_total, mem_available, mem_total - mem_available,
+        mem_cached, bytes_sent, bytes_recv, packets_sent,
+        packets_recv, established, closing, reads,
+        writes, read_bytes, write_bytes]
+
+
+def _measure(cpu: int, iface: str) -> list:
+    import psutil
+
+    row = [time()]  # timestamp
 
     cpu_percents = psutil.cpu_percent(interval=None, percpu=True)
     # cpu_frequencies = psutil.cpu_freq(percpu=True) # empty list
     cpu_times = psutil.cpu_times(percpu=True)
 
     for core in range(cpu):
-        file.write(f"{cpu_percents[core]}," +  # {cpu_frequencies[core]},
-                   f"{cpu_times[core].user},{cpu_times[core].system},{cpu_times[core].idle},")
+        row += [cpu_percents[core],  # cpu_frequencies[core],
+                cpu_times[core].user, cpu_times[core].system, cpu_times[core].idle]
 
     cpu_stats = psutil.cpu_stats()
 
@@ -53,21 +144,44 @@ def _measure(file: TextIOWrapper, cpu: int, iface: str):
 
     disk_io = psutil.disk_io_counters(perdisk=False, nowrap=True)
 
-    file.write(
-        f"{cpu_stats.ctx_switches},{cpu_stats.interrupts},{cpu_stats.syscalls}," +
-        f"{v_mem.percent},{v_mem.total},{v_mem.available},{v_mem.total - v_mem.available}," +
-        f"{v_mem.cached},{net_io.bytes_sent},{net_io.bytes_recv},{net_io.packets_sent}," +
-        f"{net_io.packets_recv},{established},{closing},{disk_io.read_count}," +
-        f"{disk_io.write_count},{disk_io.read_bytes},{disk_io.write_bytes}\n")
+    return row + [
+        cpu_stats.ctx_switches, cpu_stats.interrupts, cpu_stats.syscalls,
+        v_mem.percent, v_mem.total, v_mem.available, v_mem.total - v_mem.available,
+        v_mem.cached, net_io.bytes_sent, net_io.bytes_recv, net_io.packets_sent,
+        net_io.packets_recv, established, closing, disk_io.read_count,
+        disk_io.write_count, disk_io.read_bytes, disk_io.write_bytes]
+
+
+def signal_handler(sig, frame):
+    exit(0)  # closes the output
 
 
 if __name__ == "__main__":
-    if len(argv) != 4:
-        print(f"usage: {argv[0]} precision interface output")
+    signal(SIGINT, signal_handler)
+    signal(SIGTERM, signal_handler)
+
+    options = [arg for arg in argv[1:] if arg.startswith("--")]
+    args = [arg for arg in argv[1:] if not arg.startswith("--")]
+
+    if len(args) != 3:
+        print(f"usage: {argv[0]} [--psutil] [--rates] [--capacity=records] precision interface output")
         exit(1)
 
-    wait = argv[1] / 1000
-    iface = argv[2]
-    path = argv[3]
+    try:
+        wait = float(args[0]) / 1_000
+    except ValueError:
+        wait = -1
+
+    if wait < 0:
+        print(f"error: precision must be a number of milliseconds, not {args[0]}")
+        exit(1)
+
+    iface = args[1]
+    path = args[2]
+
+    capacity = CAPACITY
+    for option in options:
+        if option.startswith("--capacity="):
+            capacity = int(option.split("=", 1)[1])
 
-    measure(wait, iface, path)
+    measure(wait, iface, path, "--psutil" not in options, "--rates" in options, capacity)
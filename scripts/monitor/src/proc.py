@@ -0,0 +1,156 @@
+from os import listdir, path as os_path, sysconf
+
+
+PROC = "/proc"
+BLOCK = "/sys/block"  # the block devices; partitions are not listed
+
+_CLOCK_TICKS = sysconf("SC_CLK_TCK")
+
+_SECTOR = 512  # bytes; /proc/diskstats counts 512 byte sectors regardless of the device
+
+# /proc/net/tcp states; include/net/tcp_states.h
+_TCP_ESTABLISHED = b"01"
+_TCP_TIME_WAIT = b"06"
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+class Proc():
+    def __init__(self, proc: str = PROC, block: str = BLOCK):
+        """
+        @params:
+            - proc: The procfs, ex. of the container.
+            - block: The block devices of sysfs.
+        Note:
+            - Reads the same counters as psutil directly from procfs, without enumerating
+              processes or file descriptors.
+            - CPU percents are relative to the previous call of cpu(), as psutil.cpu_percent().
+        """
+
+        self._proc = proc
+        self._block = block
+        self._previous = self._cpu_ticks()[0]
+
+    def _cpu_ticks(self) -> tuple[list[list[int]], int, int]:
+        """
+        @returns: The ticks of each core, the number of context switches, and the number of interrupts.
+        """
+
+        cores, ctx_switches, interrupts = [], 0, 0
+
+        for line in _read(os_path.join(self._proc, "stat")).splitlines():
+            if line.startswith(b"cpu") and not line.startswith(b"cpu "):
+                cores.append([*map(int, line.split()[1:9])])  # user nice system idle iowait irq softirq steal
+            elif line.startswith(b"ctxt "):
+                ctx_switches = int(line[5:])
+            elif line.startswith(b"intr "):
+                interrupts = int(line.split(b" ", 2)[1])
+
+        return (cores, ctx_switches, interrupts)
+
+    def cpu(self) -> tuple[list[tuple[float, float, float, float]], int, int]:
+        """
+        @returns: For each core: the percent busy since the previous call, and the user, system,
+                  and idle times in seconds. Then the number of context switches and interrupts.
+        """
+
+        cores, ctx_switches, interrupts = self._cpu_ticks()
+
+        stats = []
+        for ticks, previous in zip(cores, self._previous):
+            total = sum(ticks) - sum(previous)
+            idle = (ticks[3] + ticks[4]) - (previous[3] + previous[4])  # idle and iowait
+
+            percent = 0.0
+            if total > 0:
+                percent = round(min(max((total - idle) / total * 100, 0.0), 100.0), 1)
+
+            stats.append((percent, ticks[0] / _CLOCK_TICKS, ticks[2] / _CLOCK_TICKS,
+                          ticks[3] / _CLOCK_TICKS))
+
+        self._previous = cores
+        return (stats, ctx_switches, interrupts)
+
+    def memory(self) -> tuple[float, int, int, int]:
+        """
+        @returns: The percent used, and the total, available, and cached bytes.
+        """
+
+        fields = {}
+        for line in _read(os_path.join(self._proc, "meminfo")).splitlines():
+            name, value = line.split(b":", 1)
+            fields[name] = int(value.split()[0]) * 1_024  # kB
+
+        total = fields[b"MemTotal"]
+        available = fields.get(b"MemAvailable", fields[b"MemFree"])
+        cached = fields.get(b"Cached", 0) + fields.get(b"SReclaimable", 0)  # as psutil
+
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        return (percent, total, available, cached)
+
+    def net(self, iface: str) -> tuple[int, int, int, int]:
+        """
+        @params:
+            - iface: The network interface, ex. "eth0".
+        @returns: The bytes sent, bytes received, packets sent, and packets received.
+        """
+
+        name = iface.encode()
+        for line in _read(os_path.join(self._proc, "net", "dev")).splitlines()[2:]:
+            interface, _, counters = line.partition(b":")
+            if interface.strip() == name:
+                counters = counters.split()
+                return (int(counters[8]), int(counters[0]), int(counters[9]), int(counters[1]))
+
+        raise KeyError(iface)
+
+    def tcp(self) -> tuple[int, int]:
+        """
+        @returns: The number of TCP sockets that are established and in time wait, for IPv4 and IPv6.
+        """
+
+        established, closing = 0, 0
+
+        for name in ("tcp", "tcp6"):
+            try:
+                lines = _read(os_path.join(self._proc, "net", name)).splitlines()
+            except FileNotFoundError:
+                continue  # ex. IPv6 is disabled
+
+            for line in lines[1:]:
+                state = line.split(None, 4)[3]  # sl local_address rem_address st ...
+                if state == _TCP_ESTABLISHED:
+                    established += 1
+                elif state == _TCP_TIME_WAIT:
+                    closing += 1
+
+        return (established, closing)
+
+    def disk(self) -> tuple[int, int, int, int]:
+        """
+        @returns: The number of reads and writes, and the bytes read and written, summed over the
+                  block devices, as psutil.disk_io_counters(); partitions would be counted twice.
+        """
+
+        try:
+            devices = set(listdir(self._block))
+        except FileNotFoundError:
+            devices = set()
+
+        reads, writes, read_bytes, write_bytes = 0, 0, 0, 0
+
+        # major minor name reads merged sectors ms writes merged sectors ms ...
+        for line in _read(os_path.join(self._proc, "diskstats")).splitlines():
+            fields = line.split()
+            if fields[2].decode().replace("/", "!") not in devices:  # ex. cciss/c0d0 as cciss!c0d0
+                continue
+
+            reads += int(fields[3])
+            read_bytes += int(fields[5]) * _SECTOR
+            writes += int(fields[7])
+            write_bytes += int(fields[9]) * _SECTOR
+
+        return (reads, writes, read_bytes, write_bytes)
@@ -0,0 +1,177 @@
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from typing import Iterator, Sequence
+
+from shared.writer import Column
+
+
+# ring file format:
+#   header: magic, version, reserved, capacity (records), record size, head, types length, names length
+#   the struct format of a record, ex. "<dqqd"; then the column names, separated by newlines
+#   padding to 8 bytes; then <capacity> records of <record size> bytes
+# head is the number of records ever written; record i is in slot i % capacity
+_MAGIC = b"RING"
+_VERSION = 1
+_HEADER = Struct("<4sHHIIQII")
+_HEAD = Struct("<Q")
+_HEAD_OFFSET = 16
+
+_TYPES = {int: "q", float: "d"}
+
+
+class RingError(Exception):
+    pass
+
+
+class RingWriter():
+    def __init__(self, path: str, columns: list[Column], capacity: int = 65_536):
+        """
+        @params:
+            - path: The ring file. Created, or truncated if it exists.
+            - columns: The columns of each record; int or float.
+            - capacity: The number of records kept. The oldest record is overwritten once full.
+        Note:
+            - Records are fixed width structs written into a memory mapped file; writing a
+              record is a copy into the page cache, without a system call or a flush.
+            - A single writer; any number of readers, see RingReader.
+        """
+
+        assert(capacity > 0)
+        if any(column.type not in _TYPES for column in columns):
+            raise RingError("ring columns must be int or float")
+
+        types = ("<" + "".join(_TYPES[column.type] for column in columns)).encode()
+        names = "\n".join(column.name for column in columns).encode()
+
+        self._record = Struct(types.decode())
+        self._capacity = capacity
+
+        self._offset = _HEADER.size + len(types) + len(names)
+        self._offset += -self._offset % 8
+
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, 0, capacity, self._record.size, 0,
+                                    len(types), len(names)))
+            file.write(types + names)
+            file.truncate(self._offset + capacity * self._record.size)
+
+        self._file = open(path, "r+b")
+        self._buffer = mmap(self._file.fileno(), 0)
+        self._head = 0
+
+    def write(self, row: Sequence):
+        """
+        @params:
+            - row: The values of each column.
+        """
+
+        slot = self._head % self._capacity
+        self._record.pack_into(self._buffer, self._offset + slot * self._record.size, *row)
+
+        self._head += 1
+        _HEAD.pack_into(self._buffer, _HEAD_OFFSET, self._head)  # published after the record
+
+    def flush(self):
+        pass  # readers share the page cache
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._file.close()
+            self._buffer = None
+
+    def __enter__(self) -> "RingWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class RingReader():
+    def __init__(self, path: str):
+        """
+        @params:
+            - path: The ring file.
+        Note:
+            - Maps the file read only; records are unpacked directly from the mapping.
+            - The writer may still be running, see read().
+        """
+
+        self._file = open(path, "rb")
+        self._buffer = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+
+        magic, version, _, capacity, size, _, types_length, names_length = \
+            _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise RingError(f"{path} is not a ring file")
+
+        types = bytes(self._buffer[_HEADER.size:_HEADER.size + types_length]).decode()
+        names = bytes(self._buffer[_HEADER.size + types_length:
+                                   _HEADER.size + types_length + names_length]).decode()
+
+        self._record = Struct(types)
+        self._capacity = capacity
+
+        self._offset = _HEADER.size + types_length + names_length
+        self._offset += -self._offset % 8
+
+        assert(self._record.size == size)
+
+        self.columns = [Column(name, int if type == "q" else float)
+                        for name, type in zip(names.split("\n"), types[1:])]
+
+    def head(self) -> int:
+        """
+        @returns: The number of records ever written.
+        """
+
+        return _HEAD.unpack_from(self._buffer, _HEAD_OFFSET)[0]
+
+    def read(self, since: int = 0) -> tuple[list[tuple], int]:
+        """
+        @params:
+            - since: The number of records already read, ex. the previous head.
+        @returns: The records written since, oldest first, and the head to read since next.
+        Note:
+            - Records overwritten before they are read are lost; at most <capacity> - 1 records
+              are returned once the ring is full, as the oldest slot is the next to be written.
+            - Records overwritten by the writer during the read are dropped.
+        """
+
+        head = self.head()
+        begin = max(since, head - self._capacity)
+
+        records = [*self._records(begin, head)]
+
+        # the writer may have lapped the oldest records while they were being unpacked; the slot of
+        # the record at head() may be being written, so it is dropped too
+        lapped = self.head() + 1 - self._capacity
+        if lapped > begin:
+            records = records[lapped - begin:]
+
+        return (records, head)
+
+    def _records(self, begin: int, end: int) -> Iterator[tuple]:
+        size = self._record.size
+        view = memoryview(self._buffer)
+
+        # at most 2 contiguous ranges: to the end of the ring, then from its start
+        while begin < end:
+            slot = begin % self._capacity
+            count = min(end - begin, self._capacity - slot)
+
+            start = self._offset + slot * size
+            yield from self._record.iter_unpack(view[start:start + count * size])
+            begin += count
+
+        view.release()
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> "RingReader":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,41 @@
+from time import monotonic, sleep
+
+
+class Scheduler():
+    def __init__(self, interval: float):
+        """
+        @params:
+            - interval: The time between ticks. In units of seconds.
+        Note:
+            - Ticks are scheduled at absolute times on the monotonic clock, start + i * interval,
+              so the cost of each sample does not accumulate as drift.
+            - If a tick is missed entirely, ex. a sample took longer than the interval, it is
+              skipped rather than run late in a burst.
+        """
+
+        assert(interval >= 0)
+        self._interval = interval
+
+        self._next = monotonic()
+
+    def wait(self) -> tuple[float, float]:
+        """
+        Sleeps until the next tick.
+        @returns: The monotonic time of the tick, and the skew; the time after the target of
+                  the tick. In units of seconds.
+        """
+
+        now = monotonic()
+        if self._interval == 0:  # as fast as possible
+            return (now, 0.0)
+
+        if now < self._next:
+            sleep(self._next - now)
+            now = monotonic()
+
+        target = self._next
+        if now - target >= self._interval:  # skip missed ticks
+            target += (now - target) // self._interval * self._interval
+
+        self._next = target + self._interval
+        return (now, now - target)
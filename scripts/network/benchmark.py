@@ -0,0 +1,150 @@
+from os import chdir, getcwd, mkdir
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from src.components import *
+from src.components import _registry, _IPv4, _CIDR
+from src.configurator import Configurator
+from src.partitioner import Host, Partitioner
+from src.validator import Validator
+
+
+# Builds topologies shaped like tests/scale.py, then writes them without deploying them.
+# Reports the time to create, validate, write, and partition the components, and the rate of
+# address parsing and lookups.
+# ex. python3 benchmark.py 125 3 (1k services); python3 benchmark.py 1250 3 (10k services)
+
+
+GROUP_BY = 250  # homes and servers per group router
+
+
+def build(homes: int, servers: int, comps_per: int) -> int:
+    """
+    @params:
+        - homes: The number of homes; each has a router and comps_per traffic generators.
+        - servers: The number of servers; each has a router and comps_per HTTP servers.
+        - comps_per: The number of endpoints within each home and server.
+    @returns: The number of components created.
+    """
+
+    assert(0 < homes <= GROUP_BY * 256 and 0 < servers <= GROUP_BY * 256 and 0 < comps_per <= 250)
+
+    iface_backbone = Iface()
+    cidr_backbone = "1.0.0.0/8"
+
+    dns_root = DNSServer()
+    dns_root.add_iface(iface_backbone, cidr=cidr_backbone, ip="1.255.255.254", gateway="1.0.0.1")
+
+    for count, prefix, backbone in ((homes, 170, 1), (servers, 180, 2)):
+        iface_backbone_ext = Iface()
+        cidr_backbone_ext = f"2.{backbone}.0.0/16"
+
+        router = Router(ecmp=ECMPType.l3)
+        router.add_iface(iface_backbone, cidr=cidr_backbone, ip=f"1.0.0.{backbone}")
+        router.add_iface(iface_backbone_ext, cidr=cidr_backbone_ext, ip=f"2.{backbone}.0.1")
+
+        for i in range((count + GROUP_BY - 1) // GROUP_BY):
+            iface_group = Iface()
+            cidr_group = f"{prefix}.{i}.0.0/16"
+
+            router = Router(ecmp=ECMPType.l4)
+            router.add_iface(iface_backbone_ext, cidr=cidr_backbone_ext, ip=f"2.{backbone}.{i}.2")
+            router.add_iface(iface_group, cidr=cidr_group, ip=f"{prefix}.{i}.0.1")
+
+            for j in range(min(GROUP_BY, count - i * GROUP_BY)):
+                iface = Iface()
+                if prefix == 170:  # home
+                    cidr = "172.16.0.0/12"
+                    ip = "172.16.0"
+                else:  # server
+                    cidr = f"{prefix + 2}.{i}.{j}.0/24"
+                    ip = f"{prefix + 2}.{i}.{j}"
+
+                router = Router()
+                router.add_iface(iface_group, cidr=cidr_group, ip=f"{prefix}.{i}.{j // 250}.{j % 250 + 2}")
+                router.add_iface(iface, cidr=cidr, ip=f"{ip}.1")
+
+                for n in range(comps_per):
+                    if prefix == 170:
+                        service = TrafficGenerator(target="182.0.0.2")
+                    else:
+                        service = HTTPServer()
+                    service.add_iface(iface, cidr=cidr, ip=f"{ip}.{n + 2}", gateway=f"{ip}.1")
+
+    return len(_registry.services()) + len(_registry.of_type("iface"))
+
+
+def benchmark(homes: int, servers: int, comps_per: int, partitions: int):
+    _registry.clear()
+    _IPv4._cache.clear()
+    _CIDR._cache.clear()
+
+    timer = perf_counter()
+    count = build(homes, servers, comps_per)
+    timer = perf_counter() - timer
+
+    print(f"build: {count} components in {timer:.3f} seconds ({count / timer:.0f} components/sec)")
+
+    timer = perf_counter()
+    Validator()
+    timer = perf_counter() - timer
+
+    print(f"validate: {count} components in {timer:.3f} seconds")
+
+    services = len(_registry.services())
+    cwd = getcwd()
+
+    with TemporaryDirectory() as directory:  # the compose file and graph are written to the cwd
+        chdir(directory)
+        mkdir("logs")
+
+        timer = perf_counter()
+        Configurator()
+        timer = perf_counter() - timer
+
+        chdir(cwd)
+
+    print(f"compose: {services} services in {timer:.3f} seconds ({services / timer:.0f} services/sec)")
+
+    # hosts with a quarter more capacity than an even share of the load
+    cpus = sum(service._cpu_limit for service in _registry.services())
+    mem = sum(service._mem_limit for service in _registry.services())
+    hosts = [Host(f"host-{i}", cpus / partitions * 1.25, int(mem / partitions * 1.25))
+             for i in range(partitions)]
+
+    timer = perf_counter()
+    partitioner = Partitioner(hosts)
+    timer = perf_counter() - timer
+
+    print(f"partition: {services} services on {partitions} hosts in {timer:.3f} seconds")
+    partitioner.report()
+
+    ips = [f"172.{16 + i // 65_536 % 16}.{i // 256 % 256}.{i % 256}" for i in range(100_000)]
+    cidr = _CIDR("172.16.0.0/12")
+
+    timer = perf_counter()
+    for ip in ips:
+        _IPv4(ip)
+    parse = perf_counter() - timer
+
+    timer = perf_counter()
+    for ip in ips:
+        cidr.contains(ip)
+    contains = perf_counter() - timer
+
+    timer = perf_counter()
+    for ip in ips:
+        _registry.owner(ip)
+    owner = perf_counter() - timer
+
+    print(f"_IPv4: {len(ips) / parse:.0f} parses/sec; contains: {len(ips) / contains:.0f} lookups/sec; "
+          f"owner: {len(ips) / owner:.0f} lookups/sec")
+
+
+if __name__ == "__main__":
+    homes = int(argv[1]) if len(argv) > 1 else 11
+    comps_per = int(argv[2]) if len(argv) > 2 else 3
+    partitions = int(argv[3]) if len(argv) > 3 else 4
+
+    benchmark(homes, homes, comps_per, partitions)
@@ -0,0 +1,147 @@
+from bisect import bisect_right
+from heapq import heapify, heappop, heappush
+from traceback import print_stack
+
+from src.components import *  # private must be imported manually
+from src.components import _registry, _IPv4, _CIDR
+
+
+MIN_PREFIX_LEN = 30  # the network, the gateway, a container, and the broadcast address
+RESERVED = 3  # the network, the gateway, and the broadcast address of each subnet
+
+
+def _prefix_len(addresses: int) -> int:
+    """
+    @returns: The longest prefix of a subnet with at least the addresses.
+    """
+
+    return min(32 - (addresses - 1).bit_length(), MIN_PREFIX_LEN)
+
+
+class Allocator():
+    def __init__(self, available_range: _CIDR, previous: list[str] | None = None):
+        """
+        @params:
+            - available_range: The available IP range for creating temporary subnets.
+            - previous: Optional. Temporary subnets to keep, ex. of the previous configuration.
+        Note:
+            - The range is split into aligned blocks around the subnets and IPs of the
+              configuration, so temporary subnets never overlap them.
+            - Subnets are allocated as a buddy allocator; a block is halved until it is the
+              requested size, and the lowest block of each size is used first.
+            - A previous subnet is kept if it is within the range and overlaps neither the
+              configuration nor another kept subnet; see _kept. Kept subnets are not allocated.
+        """
+
+        self._range = available_range
+        self._free: dict[int, list[int]] = {}  # prefix length: networks of the free blocks
+        self._kept: set[str] = set()  # the previous subnets that were kept
+
+        first = available_range._network
+        last = first + 2 ** (32 - available_range._prefix_len) - 1
+
+        used = []
+        for network, prefix_len in _registry.subnets():
+            used.append((network, network + 2 ** (32 - prefix_len) - 1))
+
+        for service in _registry.services():
+            for config in service._iface_configs:
+                for ip in (config._ip, config._gateway):
+                    if ip and not config._cidr:  # within a subnet otherwise
+                        used.append((ip._int, ip._int))
+
+        if previous:
+            used += self._keep(previous, first, last, sorted(used))
+
+        start = first
+        for used_first, used_last in sorted(used):
+            if used_last < start:
+                continue
+            if used_first > last:
+                break
+
+            self._add(start, min(used_first, last + 1))
+            start = max(start, used_last + 1)
+
+        self._add(start, last + 1)
+
+        for networks in self._free.values():
+            heapify(networks)
+
+    def _keep(self, previous: list[str], first: int, last: int,
+              used: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        @params:
+            - previous: The previous subnets, in CIDR notation.
+            - first: The first address of the range.
+            - last: The last address of the range.
+            - used: The addresses of the configuration as sorted (first, last).
+        @returns: The addresses of the kept subnets as (first, last).
+        """
+
+        firsts = [used_first for used_first, _ in used]
+        lasts = []  # the last address of any used interval up to each index; intervals may nest
+        for _, used_last in used:
+            lasts.append(max(lasts[-1], used_last) if lasts else used_last)
+
+        kept = []
+        for cidr in sorted(map(_CIDR, previous), key=lambda cidr: cidr._network):
+            subnet_first = cidr._network
+            subnet_last = subnet_first + 2 ** (32 - cidr._prefix_len) - 1
+
+            if subnet_first < first or subnet_last > last:
+                continue  # ex. the range changed
+
+            i = bisect_right(firsts, subnet_last)
+            if i and lasts[i - 1] >= subnet_first:
+                continue  # ex. a subnet was configured within it
+
+            if kept and kept[-1][1] >= subnet_first:
+                continue
+
+            kept.append((subnet_first, subnet_last))
+            self._kept.add(cidr._str)
+
+        return kept
+
+    def _add(self, start: int, end: int):
+        """
+        Adds the free range [start, end) as the largest aligned blocks.
+        """
+
+        while start < end:
+            size = start & -start if start else 2 ** 32
+            while size > end - start:
+                size //= 2
+
+            self._free.setdefault(32 - size.bit_length() + 1, []).append(start)
+            start += size
+
+    def allocate(self, addresses: int) -> str:
+        """
+        @params:
+            - addresses: The number of addresses of the subnet, including RESERVED.
+        @returns: The smallest free subnet with the addresses, in CIDR notation.
+        Note:
+            - Allocating in order of decreasing size packs the range without gaps.
+        """
+
+        prefix_len = _prefix_len(addresses)
+
+        block = prefix_len
+        while block >= 0 and not self._free.get(block):
+            block -= 1
+
+        if block < 0:
+            print(f"error: Allocated subnet {self._range._str} exceeded.")
+            print("info: Consider changing settings for the Configurator.")
+
+            print_stack()
+            exit(1)
+
+        network = heappop(self._free[block])
+        while block < prefix_len:  # halve; keep the lower half
+            block += 1
+            heappush(self._free.setdefault(block, []), network + 2 ** (32 - block))
+
+        return f"{_IPv4(network)._str}/{prefix_len}"
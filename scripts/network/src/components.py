@@ -4,20 +4,169 @@ from enum import Enum, auto
 from traceback import print_stack
 
 
+# REGISTRY ********************************************************************
+
+
+class _Registry():
+    def __init__(self):
+        """
+        Note:
+            - Components are registered when created; services are attached to an interface
+              when the interface is added to the service.
+            - Lookups by name, type, interface, IP, and subnet are dict lookups.
+        """
+
+        self._types: dict[str, list[Iface | _Service]] = {}  # type: components, in order of creation
+        self._names: dict[str, Iface | _Service] = {}
+        self._attached: dict[str, dict[str, _Service]] = {}  # iface name: {service name: service}
+        self._ips: dict[int, dict[str, _Service]] = {}  # ip: {iface name: service}
+        self._subnets: dict[tuple[int, int], dict[str, Iface]] = {}  # (network, prefix len): {iface name: iface}
+
+    def add(self, type: str, prefix: str, component: Iface | _Service) -> str:
+        """
+        @params:
+            - type: The type of the component, ex. "iface" or "router".
+            - prefix: The prefix of the name, ex. "network" or "router".
+            - component: The component.
+        @returns: The name of the component, ex. "router-0".
+        """
+
+        components = self._types.setdefault(type, [])
+        name = f"{prefix}-{len(components)}"
+
+        components.append(component)
+        self._names[name] = component
+        return name
+
+    def attach(self, service: _Service, config: _IfaceConfig):
+        """
+        @params:
+            - service: The service.
+            - config: The interface configuration added to the service.
+        Note:
+            - A service may be attached to each interface once.
+        """
+
+        iface = config._iface
+
+        attached = self._attached.setdefault(iface._name, {})
+        assert(service._name not in attached)
+        attached[service._name] = service
+
+        if config._ip:
+            self._ips.setdefault(config._ip._int, {}).setdefault(iface._name, service)
+
+        if config._cidr:
+            subnet = (config._cidr._network, config._cidr._prefix_len)
+            self._subnets.setdefault(subnet, {})[iface._name] = iface
+
+    def get(self, name: str) -> Iface | _Service | None:
+        """
+        @params:
+            - name: The name of the component, ex. "router-0".
+        @returns: The component, if registered.
+        """
+
+        return self._names.get(name)
+
+    def of_type(self, type: str) -> list[Iface | _Service]:
+        """
+        @params:
+            - type: The type of the components, ex. "iface" or _ServiceType.router.name.
+        @returns: The components, in order of creation.
+        """
+
+        return self._types.get(type, [])
+
+    def services(self) -> list[_Service]:
+        """
+        @returns: The services, grouped by type in order of the first of each type.
+        """
+
+        return [service for type, components in self._types.items() if type != "iface"
+                        for service in components]
+
+    def attached(self, iface: Iface) -> list[_Service]:
+        """
+        @params:
+            - iface: The network interface.
+        @returns: The services attached to the interface, in order of attachment.
+        """
+
+        return [*self._attached.get(iface._name, {}).values()]
+
+    def owner(self, ip: str, iface: Iface | None = None) -> _Service | None:
+        """
+        @params:
+            - ip: The IPv4 address.
+            - iface: The network interface; any interface if none.
+        @returns: The service configured with the IP, if any.
+        Note:
+            - IPs may be reused on separate interfaces, ex. private home networks.
+              Without an interface, the first service configured with the IP is returned.
+        """
+
+        owners = self._ips.get(_IPv4(ip)._int)
+        if not owners:
+            return None
+
+        if iface is None:
+            return next(iter(owners.values()))
+        return owners.get(iface._name)
+
+    def subnet(self, cidr: str) -> list[Iface]:
+        """
+        @params:
+            - cidr: The subnet in CIDR notation, ex. "169.254.0.0/16".
+        @returns: The network interfaces configured with the subnet.
+        """
+
+        _cidr = _CIDR(cidr)
+        return [*self._subnets.get((_cidr._network, _cidr._prefix_len), {}).values()]
+
+    def subnets(self) -> dict[tuple[int, int], list[Iface]]:
+        """
+        @returns: The configured subnets as {(network, prefix len): network interfaces}.
+        """
+
+        return {subnet: [*ifaces.values()] for subnet, ifaces in self._subnets.items()}
+
+    def clear(self):
+        """
+        Removes all components, ex. to build another configuration.
+        """
+
+        self.__init__()
+
+
 # created components are registered here
-_components: dict[str, list[Iface | _Service]] = {}
+_registry = _Registry()
 
 
 # IPv4 ************************************************************************
 
 
 class _IPv4():
-    def __init__(self, ip: str | int):
+    __slots__ = ("_str", "_int")
+
+    # instances are immutable and shared; keyed by the given str or int
+    _cache: dict[str | int, _IPv4] = {}
+
+    def __new__(cls, ip: str | int) -> _IPv4:
         """
         @params:
             - ip: The IPv4 address.
+        Note:
+            - Interned; constructing the same address again returns the same object.
         """
 
+        if type(ip) == str or type(ip) == int:
+            cached = _IPv4._cache.get(ip)
+            if cached is not None:
+                return cached
+
+        self = super().__new__(cls)
+
         if type(ip) == str:
             if not self._is_legal(ip):
                 print(f"error: Illegal IPv4 address {ip}")
@@ -39,6 +188,9 @@ class _IPv4():
             print_stack()
             exit(1)
 
+        _IPv4._cache[ip] = self
+        return self
+
     def _is_legal(self, ip: str) -> bool:
         """
         @params:
@@ -68,15 +220,8 @@ class _IPv4():
         @returns: The IPv4 as an integer, ex. 0x0a000001
         """
 
-        octets = ip.split(".")
-        octets = [*map(int, octets)]
-
-        ip =   (octets[0] << 24) \
-             + (octets[1] << 16) \
-             + (octets[2] << 8) \
-             +  octets[3]
-        
-        return ip
+        a, b, c, d = map(int, ip.split("."))
+        return (a << 24) | (b << 16) | (c << 8) | d
     
     def _int_to_str(self, ip: int) -> str:
         """
@@ -85,13 +230,7 @@ class _IPv4():
         @returns: The IPv4 address as a string, ex. "169.254.0.0"
         """
 
-        octets = [(0xff000000 & ip) >> 24,
-                  (0x00ff0000 & ip) >> 16,
-                  (0x0000ff00 & ip) >> 8,
-                   0x000000ff & ip]
-        
-        octets = [*map(str, octets)]
-        return ".".join(octets)
+        return f"{ip >> 24}.{(ip >> 16) & 0xff}.{(ip >> 8) & 0xff}.{ip & 0xff}"
 
 
 # CIDR ************************************************************************
@@ -102,15 +241,39 @@ class _Visibility(Enum):
     private = auto()
 
 
+# the netmask of each prefix length, ex. _NETMASKS[24] == 0xffffff00
+_NETMASKS = [0xffffffff ^ (2 ** (32 - prefix_len) - 1) for prefix_len in range(33)]
+
+# the private ranges as (network, prefix length), in the order they are checked
+_PRIVATE_RANGES = [
+    (0x0a000000, 8),   # 10.0.0.0/8
+    (0xa9fe0000, 16),  # 169.254.0.0/16
+    (0xac100000, 12),  # 172.16.0.0/12
+    (0xc0a80000, 16),  # 192.168.0.0/16
+]
+
+
 class _CIDR():
-    def __init__(self, cidr: str):
+    __slots__ = ("_str", "_ip", "_prefix_len", "_netmask", "_network", "_visibility")
+
+    # instances are immutable and shared; keyed by the given string
+    _cache: dict[str, _CIDR] = {}
+
+    def __new__(cls, cidr: str) -> _CIDR:
         """
         @params:
             - cidr: The subnet in CIDR notation, ex. "169.254.0.0/16"
         Note:
             - Subnets that overlap public and private IP ranges are disallowed.
+            - Interned; constructing the same subnet again returns the same object.
         """
 
+        cached = _CIDR._cache.get(cidr) if type(cidr) == str else None
+        if cached is not None:
+            return cached
+
+        self = super().__new__(cls)
+
         if not self._is_legal(cidr):
             print(f"error: Illegal CIDR {cidr}")
             print_stack()
@@ -123,8 +286,12 @@ class _CIDR():
         self._prefix_len = int(prefix_len)
 
         self._netmask = self._get_netmask(self._prefix_len)
+        self._network = self._ip._int & self._netmask._int
         self._visibility = self._get_visibility(self._ip, self._prefix_len)
 
+        _CIDR._cache[cidr] = self
+        return self
+
     def _is_legal(self, cidr: str) -> bool:
         """
         @params:
@@ -152,9 +319,7 @@ class _CIDR():
         @return: The netmask as an _IPv4 object.
         """
 
-        suffix_len = 32 - prefix_len
-        netmask: int = 0xffffffff ^ (2 ** suffix_len - 1)
-        return _IPv4(netmask)
+        return _IPv4(_NETMASKS[prefix_len])
     
     def _get_visibility(self, ip: _IPv4, prefix_len: int) -> _Visibility:
         """
@@ -164,25 +329,10 @@ class _CIDR():
         @returns: Whether the CIDR address is private or public.
         """
         
-        ip_private = _IPv4("10.0.0.0")
-        visibility = self._get_visibility_internal(ip, prefix_len, ip_private, 8)
-        if visibility == _Visibility.private:
-            return visibility
-
-        ip_private = _IPv4("169.254.0.0")
-        visibility = self._get_visibility_internal(ip, prefix_len, ip_private, 16)
-        if visibility == _Visibility.private:
-            return visibility
-
-        ip_private = _IPv4("172.16.0.0")
-        visibility = self._get_visibility_internal(ip, prefix_len, ip_private, 12)
-        if visibility == _Visibility.private:
-            return visibility
-        
-        ip_private = _IPv4("192.168.0.0")
-        visibility = self._get_visibility_internal(ip, prefix_len, ip_private, 16)
-        if visibility == _Visibility.private:
-            return visibility
+        for network_private, prefix_len_private in _PRIVATE_RANGES:
+            visibility = self._get_visibility_internal(ip, prefix_len, network_private, prefix_len_private)
+            if visibility == _Visibility.private:
+                return visibility
 
         return _Visibility.public
     
@@ -190,7 +340,7 @@ class _CIDR():
             self,
             ip: _IPv4,
             prefix_len: int,
-            ip_private: _IPv4,
+            network_private: int,
             prefix_len_private: int
         ) -> _Visibility:
 
@@ -198,18 +348,17 @@ class _CIDR():
         @params:
             - ip: The IPv4 object.
             - prefix_len: The prefix length.
-            - ip_private: The private IPv4 address.
+            - network_private: The private network as an integer.
             - prefix_len_private: The private prefix length.
         @return: Whether the CIDR address is private or public.
         """
 
-        prefix_len_min = min(prefix_len, prefix_len_private)
-        netmask_min = self._get_netmask(prefix_len_min)
+        netmask_min = _NETMASKS[min(prefix_len, prefix_len_private)]
 
-        if ip._int & netmask_min._int == ip_private._int & netmask_min._int:
+        if ip._int & netmask_min == network_private & netmask_min:
             if prefix_len < prefix_len_private:
                 cidr_public = f"{ip._str}/{prefix_len}"
-                cidr_private = f"{ip_private._str}/{prefix_len_private}"
+                cidr_private = f"{_IPv4(network_private)._str}/{prefix_len_private}"
 
                 print(f"error: Public subnet {cidr_public} overlaps private subnet {cidr_private}.")
                 print_stack()
@@ -225,12 +374,7 @@ class _CIDR():
         @return: Whether the IPv4 address is within the CIDR range.
         """
 
-        _ip = _IPv4(ip)
-        visibility = self._get_visibility_internal(_ip, 32, self._ip, self._prefix_len)
-
-        if visibility == _Visibility.private:
-            return True
-        return False
+        return _IPv4(ip)._int & self._netmask._int == self._network
 
 
 # TC RULE *********************************************************************
@@ -337,13 +481,7 @@ class NatType(Enum):
 
 class Iface():
     def __init__(self):  # add to components
-        if "iface" not in _components:
-            _components["iface"] = []
-        
-        count = len(_components["iface"])
-        _components["iface"].append(self)
-
-        self._name = f"network-{count}"
+        self._name = _registry.add("iface", "network", self)
 
 
 class _IfaceConfig():
@@ -602,14 +740,7 @@ class _Service():
         self._iface_configs: list[_IfaceConfig] = []
 
         # add to components
-        name = type.name
-        if name not in _components:
-            _components[name] = []
-
-        count = len(_components[name])
-        self._name = f"{name}-{count}"
-
-        _components[name].append(self)
+        self._name = _registry.add(type.name, type.name, self)
 
     def add_iface(
             self,
@@ -646,7 +777,7 @@ class _Service():
             firewall=firewall,
         )
 
-        assert(config not in self._iface_configs)
+        _registry.attach(self, config)
         self._iface_configs.append(config)
 
 
@@ -960,6 +1091,7 @@ class DHCPServer(_Service):
         )
 
         assert(len(self._iface_configs) == 0)  # only one interface
+        _registry.attach(self, config)
         self._iface_configs.append(config)
 
 
@@ -1268,5 +1400,5 @@ class Router(_Service):
             cost=cost,
         )
 
-        assert(config not in self._iface_configs)
+        _registry.attach(self, config)
         self._iface_configs.append(config)
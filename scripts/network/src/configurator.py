@@ -1,31 +1,224 @@
 
-from io import TextIOWrapper
-from traceback import print_stack
+from hashlib import sha256
+from json import dump, load
+from os import path as os_path, remove, replace
 
 from src.components import *  # private must be imported manually
-from src.components import _components, _ServiceType, _Service, _IfaceConfig, _IPv4, _CIDR, _Domain
+from src.components import _registry, _ServiceType, _Service, _IfaceConfig, _IPv4, _CIDR, _Domain
+from src.allocator import Allocator, RESERVED, _prefix_len
 from src.grapher import Grapher
+from src.partitioner import Host, Partitioner
+from src.planner import Planner, local_host
+from src.validator import Validator
+
+
+COMPOSE = "docker-compose.yml"
+
+# the state of the previous configuration, for deploying only what changed; see `make up`
+HASHES = "logs/compose-hashes.json"  # {"services": {name: hash}, "networks": {name: hash}, "subnets": {name: subnet}}
+CHANGES = "logs/compose-changes"  # lines of "service <name>", "removed <name>", or "network <name>"
+PREVIOUS = "logs/docker-compose.previous.yml"
+
+# with multiple hosts; the configuration of each host, and the overlay networks between hosts
+COMPOSE_HOST = "docker-compose.{host}.yml"
+OVERLAYS = "docker-compose.networks.sh"
+
+# compose templates; each service is a _SERVICE block followed by the block of its type
+
+_SERVICE = """\
+  {name}:
+    image: {image}
+    container_name: {name}
+    hostname: {name}
+    restart: unless-stopped
+    deploy:
+      resources:
+        limits:
+          cpus: {cpu_limit:.2f}
+          memory: {mem_limit}mb
+    memswap_limit: {memswap_limit}mb
+{cpuset}\
+    logging:  # limit log size
+      driver: json-file
+      options:
+        max-size: 16mb
+    volumes:
+      - ./logs:/app/logs  # for logs
+      - /lib/modules:/lib/modules  # mount host kernel modules
+{networks}\
+    cap_add:
+      - NET_ADMIN  # enables ifconfig, route
+    privileged: true  # enables sysctl, kernel modules
+    environment:
+      # Host configuration:
+      NAMESERVERS: {nameservers}
+      QUERY_LOG: {query_log}
+      FORWARD: {forward}
+      SYN_COOKIE: {syn_cookie}
+      CONGESTION_CONTROL: {congestion_control}
+      FAST_RETRAN: {fast_retran}
+      SACK: {sack}
+      TIMESTAMP: {timestamp}
+      AUTO_RESTART: {auto_restart}
+      TTL: {ttl}
+      # Interface configurations:
+      IFACES: {ifaces}
+      IPS: {ips}
+      NET_MASKS: {net_masks}
+      GATEWAYS: {gateways}
+      MTUS: {mtus}
+      FIREWALLS: {firewalls}
+      # TC Rule configurations:
+      RATES: {rates}
+      DELAYS: {delays}
+      JITTERS: {jitters}
+      DROPS: {drops}
+      CORRUPTS: {corrupts}
+      DUPLICATES: {duplicates}
+      QUEUE_LIMITS: {queue_limits}
+"""
+
+_NETWORK = """\
+      - {name}
+"""
+
+_CPUSET = """\
+    cpuset: "{cpus}"
+"""
+
+_CLIENT = """\
+      # Tor configuration:
+      TOR_DIR: {tor_dir}
+      TOR_BRIDGE: {tor_bridge}
+      TOR_MIDDLES: {tor_middles}
+      TOR_EXITS: {tor_exits}
+      TOR_LOG: {tor_log}
+      TOR_CURL: 'curl --socks5-hostname localhost:9050'
+"""
+
+_TGEN = """\
+      # Locust configuration:
+      TARGET: {target}
+      CONN_MAX: {conn_max}
+      CONN_RATE: {conn_rate}
+      CONN_DUR: {conn_dur}
+      PROTO: {proto}
+      REQUESTS: {requests}
+      WAIT_MIN: {wait_min}
+      WAIT_MAX: {wait_max}
+      GZIP: {gzip}
+"""
+
+_HTTP = """\
+      # Tor configuration:
+      TOR_DIR: {tor_dir}
+      TOR_BRIDGE: {tor_bridge}
+      TOR_LOG: {tor_log}
+      TOR_CURL: 'curl --socks5-hostname localhost:9050'
+"""
+
+_DHCP = """\
+      # DHCP Server configuration:
+      LEASE_TIMES: {lease_times}
+      LEASE_STARTS: {lease_starts}
+      LEASE_ENDS: {lease_ends}
+"""
+
+_DNS = """\
+      # DNS Server configuration:
+      CACHE: {cache}
+      HOST_NAMES: {host_names}
+      HOST_IPS: {host_ips}
+"""
+
+_LB = """\
+      # Load Balancer configuration:
+      ROUTER_ID: {router_id}
+      TYPE: {type}
+      ALGORITHM: {algorithm}
+      ADVERTISE: {advertise}
+      CHECK: {check}
+      BACKENDS: {backends}
+"""
+
+_TOR = """\
+      # Tor configuration:
+      TOR_DIR: {tor_dir}
+      TOR_LOG: {tor_log}
+      TOR_CURL: 'curl --socks5-hostname localhost:9050'
+      IS_BRIDGE: {is_bridge}
+      IS_EXIT: {is_exit}
+"""
+
+_ROUTER = """\
+      # Router configuration:
+      ROUTER_ID: {router_id}
+      ECMP: {ecmp}
+      CIDRS: {cidrs}
+      NATS: {nats}
+      COSTS: {costs}
+"""
+
+_INET = """\
+  {name}:
+    name: {name}
+    driver: bridge
+    internal: true
+    ipam:
+      config:  # this is a workaround for a docker limitation
+        - subnet: {subnet}  # temporary subnet
+    driver_opts:  # os defines a suffix
+      com.docker.network.container_iface_prefix: {name}_
+"""
+
+
+# a network that spans hosts; created by OVERLAYS on the swarm manager
+
+_EXTERNAL = """\
+  {name}:
+    name: {name}
+    external: true
+"""
+
+_OVERLAY = "docker network create --driver overlay --attachable --internal --subnet {subnet} " \
+           "--opt com.docker.network.container_iface_prefix={name}_ {name}\n"
+
+
+def _bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def _names(components: list | None) -> str:
+    return " ".join(component._name for component in components) if components else ""
 
 
-_SPACE = "  "
-
 class Configurator():
     def __init__(
             self,
             available_range: str = "10.0.0.0/8",
-            prefix_len: int = 22,
+            prefix_len: int | None = None,
             color: bool = True,
             extra: bool = False,
+            hosts: list[Host] | None = None,
+            pin: bool = False,
+            scale: bool = False,
         ):
 
         """
         @params:
             - available_range: The available IP range in CIDR notation for creating temporary subnets.
-            - prefix_len: The size of each temporary subnet.
+            - prefix_len: Optional. The size of each temporary subnet; by default, the smallest
+                          subnet with an address for each service of the network.
             - color: Enables or disables color in the graph.
             - extra: Enables or disables extra information in the graph.
+            - hosts: Optional. Shards the services across multiple Docker hosts.
+            - pin: Pins each service to a set of cores (cpuset). Traffic generators and clients,
+                   servers, and routers are pinned to disjoint cores of their host.
+            - scale: Scales the cpu and memory limits of every service to fit the hosts.
         Note:
             - Outputs the configuration as `docker-compose.yml`.
+            - The file is only rewritten if it changed. The services and networks that changed
+              since the previous configuration are written to `logs/compose-changes`.
             - The configurator MUST be called for the configuration to be created.
             - By default, Docker only supports around 30 network interfaces.
               By writing temporary subnets in the Docker Compose file we can exceed this limitation.
@@ -33,321 +226,187 @@ class Configurator():
             - Docker will create a gateway at the .1 of each subnet; ex. 10.0.0.1 and 10.0.4.1.
               These gateways are internally and externally accessible and may interfere with 
               both container networking and host networking.
-            - The available range MUST NOT overlap with any IPs in the configuration.
+            - Temporary subnets skip the subnets and IPs of the configuration within the available range.
+            - With hosts, the configuration of each host is written as `docker-compose.<host>.yml`.
+              Interfaces that span hosts are overlay networks, created by `docker-compose.networks.sh`
+              on the manager of a Docker swarm of the hosts.
+            - The limits of the services are compared to the cores and memory of the hosts, or of
+              this host without hosts; oversubscription is reported as a warning.
         """
         
-        # create a temporary subnet
-
         self._cidr = _CIDR(available_range)
-        self._ip = self._cidr._ip._int
+        self._prefix_len = prefix_len
+        self._subnets: dict[str, str] = {}  # network name: temporary subnet
 
-        suffix_len = 32 - self._cidr._prefix_len
-        self._ip_max = self._ip + 2 ** suffix_len
+        Validator()  # exits on conflicts
 
-        self._prefix_len = prefix_len
+        capacity = hosts or [local_host()]
+        planner = Planner(capacity, _registry.services(), scale)  # before placing the scaled limits
+        partitioner = Partitioner(hosts) if hosts else None
 
-        # docker compose down will fail unless networks follow after services
-        with open("docker-compose.yml", "w") as file:
-            self._write_services(file)
-            self._write_inets(file)
+        self._cpusets: dict[str, str] = {}  # service name: cores
+        if pin:
+            for host in capacity:
+                host_services = [service for service in _registry.services()
+                                 if partitioner is None or partitioner.host(service) is host]
+                self._cpusets.update(planner.pin(host, host_services))
+
+        services = self._services()
+        networks = self._inets(partitioner)
+
+        if partitioner:
+            self._write_hosts(partitioner, services, networks)
+        else:
+            self._write(self._compose(services, networks), services, networks)
 
         Grapher(color, extra)
 
-    def _write_services(self, file: TextIOWrapper):
+    def _compose(self, services: dict[str, str], networks: dict[str, str]) -> str:
         """
         @params:
-            - file: File to write to.
+            - services: The block of each service, by name.
+            - networks: The block of each network, by name.
+        @returns: The configuration.
         """
 
-        file.write("services:\n")
-
-        # write clients
-
-        clients = []
-        if _ServiceType.client.name in _components:
-            clients = _components[_ServiceType.client.name]
-
-        for client in clients:
-            assert isinstance(client, Client)
-            self._write_service(file, client)
-
-            tor_dir = client._tor_dir._name \
-                if client._tor_dir \
-                else ""
-
-            tor_bridge = client._tor_bridge._name \
-                if client._tor_bridge \
-                else ""
-
-            tor_middles = []
-            if client._tor_middles:
-                for tor_middle in client._tor_middles:
-                    assert isinstance(tor_middle, TorNode)
-                    tor_middles.append(tor_middle._name)
-
-            tor_exits = []
-            if client._tor_exits:
-                for tor_exit in client._tor_exits:
-                    assert isinstance(tor_exit, TorNode)
-                    tor_exits.append(tor_exit._name)
-
-            file.write(f"{_SPACE * 3}# Tor configuration:\n")
-            file.write(f"{_SPACE * 3}TOR_DIR: {tor_dir}\n")
-            file.write(f"{_SPACE * 3}TOR_BRIDGE: {tor_bridge}\n")
-            file.write(f"{_SPACE * 3}TOR_MIDDLES: {" ".join(tor_middles)}\n")
-            file.write(f"{_SPACE * 3}TOR_EXITS: {" ".join(tor_exits)}\n")
-            file.write(f"{_SPACE * 3}TOR_LOG: {str(client._tor_log).lower()}\n")
-            file.write(f"{_SPACE * 3}TOR_CURL: 'curl --socks5-hostname localhost:9050'\n")
-
-        # write traffic generators
-
-        tgens = []
-        if _ServiceType.tgen.name in _components:
-            tgens = _components[_ServiceType.tgen.name]
-
-        for tgen in tgens:
-            assert isinstance(tgen, TrafficGenerator)
-            self._write_service(file, tgen)
-
-            file.write(f"{_SPACE * 3}# Locust configuration:\n")
-            file.write(f"{_SPACE * 3}TARGET: {tgen._target}\n")
-            file.write(f"{_SPACE * 3}CONN_MAX: {tgen._conn_max}\n")
-            file.write(f"{_SPACE * 3}CONN_RATE: {tgen._conn_rate}\n")
-            file.write(f"{_SPACE * 3}CONN_DUR: {tgen._conn_dur}\n")
-            file.write(f"{_SPACE * 3}PROTO: {tgen._proto.name}\n")
-            file.write(f"{_SPACE * 3}REQUESTS: {" ".join(tgen._requests)}\n")
-            file.write(f"{_SPACE * 3}WAIT_MIN: {tgen._wait_min}\n")
-            file.write(f"{_SPACE * 3}WAIT_MAX: {tgen._wait_max}\n")
-            file.write(f"{_SPACE * 3}GZIP: {str(tgen._gzip).lower()}\n")
-
-        # write http servers
-
-        http_servers = []
-        if _ServiceType.http.name in _components:
-            http_servers = _components[_ServiceType.http.name]
-
-        for http_server in http_servers:
-            assert isinstance(http_server, HTTPServer)
-            self._write_service(file, http_server)
-
-            tor_dir = http_server._tor_dir._name \
-                if http_server._tor_dir \
-                else ""
-
-            tor_bridge = http_server._tor_bridge._name \
-                if http_server._tor_bridge \
-                else ""
-
-            file.write(f"{_SPACE * 3}# Tor configuration:\n")
-            file.write(f"{_SPACE * 3}TOR_DIR: {tor_dir}\n")
-            file.write(f"{_SPACE * 3}TOR_BRIDGE: {tor_bridge}\n")
-            file.write(f"{_SPACE * 3}TOR_LOG: {str(http_server._tor_log).lower()}\n")
-            file.write(f"{_SPACE * 3}TOR_CURL: 'curl --socks5-hostname localhost:9050'\n")
-
-        # write dhcp servers
-
-        dhcp_servers = []
-        if _ServiceType.dhcp.name in _components:
-            dhcp_servers = _components[_ServiceType.dhcp.name]
-
-        for dhcp_server in dhcp_servers:
-            assert isinstance(dhcp_server, DHCPServer)
-            self._write_service(file, dhcp_server)
-
-            lease_times = []
-            lease_starts = []
-            lease_ends = []
-
-            for config in dhcp_server._iface_configs:
-                assert isinstance(config, _IfaceConfig)
-                
-                lease_times.append(f"{config._lease_time}")
-                lease_starts.append(config._lease_start._str)
-                lease_ends.append(config._lease_end._str)
-
-            file.write(f"{_SPACE * 3}# DHCP Server configuration:\n")
-            file.write(f"{_SPACE * 3}LEASE_TIMES: {" ".join(lease_times)}\n")
-            file.write(f"{_SPACE * 3}LEASE_STARTS: {" ".join(lease_starts)}\n")
-            file.write(f"{_SPACE * 3}LEASE_ENDS: {" ".join(lease_ends)}\n")
-
-        # write dns servers
-
-        dns_servers = []
-        if _ServiceType.dns.name in _components:
-            dns_servers = _components[_ServiceType.dns.name]
-
-        for dns_server in dns_servers:
-            assert isinstance(dns_server, DNSServer)
-            self._write_service(file, dns_server)
-
-            names = []
-            ips = []
-
-            for domain in dns_server._domains:
-                assert isinstance(domain, _Domain)
-
-                names.append(domain._name)
-                ips.append(domain._ip._str)
-
-            file.write(f"{_SPACE * 3}# DNS Server configuration:\n")
-            file.write(f"{_SPACE * 3}CACHE: {dns_server._cache}\n")
-            file.write(f"{_SPACE * 3}HOST_NAMES: {" ".join(names)}\n")
-            file.write(f"{_SPACE * 3}HOST_IPS: {" ".join(ips)}\n")
-
-        # write load balancers
-
-        lbs = []
-        if _ServiceType.lb.name in _components:
-            lbs = _components[_ServiceType.lb.name]
-
-        for lb in lbs:
-            assert isinstance(lb, LoadBalancer)
-            self._write_service(file, lb)
-
-            backends = []
-
-            for backend in lb._backends:
-                assert isinstance(backend, _IPv4)
-                backends.append(backend._str)
-
-            file.write(f"{_SPACE * 3}# Load Balancer configuration:\n")
-            file.write(f"{_SPACE * 3}ROUTER_ID: {lb._router_id}\n")
-            file.write(f"{_SPACE * 3}TYPE: {lb._type.name}\n")
-            file.write(f"{_SPACE * 3}ALGORITHM: {lb._algorithm.name}\n")
-            file.write(f"{_SPACE * 3}ADVERTISE: {str(lb._advertise).lower()}\n")
-            file.write(f"{_SPACE * 3}CHECK: {lb._health_check}\n")
-            file.write(f"{_SPACE * 3}BACKENDS: {" ".join(backends)}\n")
-
-        # write tor nodes
-
-        tor_nodes = []
-        if _ServiceType.tor.name in _components:
-            tor_nodes = _components[_ServiceType.tor.name]
+        # docker compose down will fail unless networks follow after services
+        compose = "services:\n" + "".join(services.values())
+        if networks:
+            compose += "networks:\n" + "".join(networks.values())
 
-        for tor_node in tor_nodes:
-            assert isinstance(tor_node, TorNode)
-            self._write_service(file, tor_node)
+        return compose
 
-            tor_dir = tor_node._tor_dir._name \
-                if tor_node._tor_dir \
-                else tor_node._name
+    def _write_hosts(self, partitioner: Partitioner, services: dict[str, str], networks: dict[str, str]):
+        """
+        @params:
+            - partitioner: The hosts of the services.
+            - services: The block of each service, by name.
+            - networks: The block of each network, by name.
+        Note:
+            - Interfaces without services are placed on the first host.
+            - `docker-compose.yml` and `logs/compose-changes` are not written.
+        """
 
-            file.write(f"{_SPACE * 3}# Tor configuration:\n")
-            file.write(f"{_SPACE * 3}TOR_DIR: {tor_dir}\n")
-            file.write(f"{_SPACE * 3}TOR_LOG: {str(tor_node._tor_log).lower()}\n")
-            file.write(f"{_SPACE * 3}TOR_CURL: 'curl --socks5-hostname localhost:9050'\n")
-            file.write(f"{_SPACE * 3}IS_BRIDGE: {str(tor_node._is_bridge).lower()}\n")
-            file.write(f"{_SPACE * 3}IS_EXIT: {str(tor_node._is_exit).lower()}\n")
+        hosts = partitioner._hosts
+        ifaces = _registry.of_type("iface")
 
-        # write routers
+        overlays = []
+        for iface in ifaces:
+            if len(partitioner.hosts(iface)) > 1:
+                overlays.append(_OVERLAY.format(name=iface._name, subnet=self._subnets[iface._name]))
 
-        routers = []
-        if _ServiceType.router.name in _components:
-            routers = _components[_ServiceType.router.name]
+        for host in hosts:
+            host_services = {name: block for name, block in services.items()
+                             if partitioner.host(_registry.get(name)) is host}
 
-        for router in routers:
-            assert isinstance(router, Router)
-            self._write_service(file, router)
+            host_networks = {}
+            for iface in ifaces:
+                spanned = partitioner.hosts(iface)
+                if host not in spanned and (spanned or host is not hosts[0]):
+                    continue
 
-            ecmp = router._ecmp.name if router._ecmp else "none"
+                if len(spanned) > 1:
+                    host_networks[iface._name] = _EXTERNAL.format(name=iface._name)
+                else:
+                    host_networks[iface._name] = networks[iface._name]
 
-            cidrs = []
-            nats = []
-            costs = []
+            with open(COMPOSE_HOST.format(host=host._name), "w") as file:
+                file.write(self._compose(host_services, host_networks))
 
-            for config in router._iface_configs:
-                assert isinstance(config, _IfaceConfig)
+        with open(OVERLAYS, "w") as file:
+            file.write("#!/bin/sh\n# run on the manager of the swarm before bringing up the hosts\n")
+            file.writelines(overlays)
 
-                cidrs.append(config._cidr._str if config._cidr else "none")
-                nats.append(config._nat.name if config._nat else "none")
-                costs.append(f"{config._cost}")
+        # `make up` deploys a single host only if there are changes; see _write
+        if os_path.exists(CHANGES):
+            remove(CHANGES)
 
-            file.write(f"{_SPACE * 3}# Router configuration:\n")
-            file.write(f"{_SPACE * 3}ROUTER_ID: {router._router_id}\n")
-            file.write(f"{_SPACE * 3}ECMP: {ecmp}\n")
-            file.write(f"{_SPACE * 3}CIDRS: {" ".join(cidrs)}\n")
-            file.write(f"{_SPACE * 3}NATS: {" ".join(nats)}\n")
-            file.write(f"{_SPACE * 3}COSTS: {" ".join(costs)}\n")
+        partitioner.report()
 
-    def _write_service(self, file: TextIOWrapper, service: _Service):
+    def _write(self, compose: str, services: dict[str, str], networks: dict[str, str]):
         """
         @params:
-            - file: File to write to.
-            - service: Service configuration to write.
+            - compose: The configuration.
+            - services: The block of each service, by name.
+            - networks: The block of each network, by name.
+        Note:
+            - Networks cannot be changed in place; if a network changed or was removed,
+              the previous configuration is kept to bring it down.
+            - The block of a network is its name and temporary subnet, which is kept while the
+              network fits; see _inets. So a network only changes if it outgrew its subnet, or if
+              available_range or prefix_len changed. New networks are created without a restart.
         """
 
-        # write component
-
-        file.write(f"{_SPACE * 1}{service._name}:\n")
-        file.write(f"{_SPACE * 2}image: {service._image}\n")
-        file.write(f"{_SPACE * 2}container_name: {service._name}\n")
-        file.write(f"{_SPACE * 2}hostname: {service._name}\n")
-        file.write(f"{_SPACE * 2}restart: unless-stopped\n")
+        hashes = {
+            "services": {name: sha256(block.encode()).hexdigest() for name, block in services.items()},
+            "networks": {name: sha256(block.encode()).hexdigest() for name, block in networks.items()},
+            "subnets": self._subnets,  # kept by the next configuration; see _inets
+        }
 
-        # write limits
+        previous = {"services": {}, "networks": {}}
+        if os_path.exists(HASHES):
+            with open(HASHES) as file:
+                previous = load(file)
 
-        file.write(f"{_SPACE * 2}deploy:\n")
-        file.write(f"{_SPACE * 3}resources:\n")
-        file.write(f"{_SPACE * 4}limits:\n")
-        file.write(f"{_SPACE * 5}cpus: {service._cpu_limit:.2f}\n")
-        file.write(f"{_SPACE * 5}memory: {service._mem_limit}mb\n")
+        changed = [name for name, digest in hashes["services"].items()
+                   if previous["services"].get(name) != digest]
+        removed = [name for name in previous["services"] if name not in hashes["services"]]
+        networks_changed = [name for name, digest in previous["networks"].items()
+                            if hashes["networks"].get(name) != digest]  # changed or removed
 
-        # memory swap represents the total amount of memory and swap that can be used.
-        file.write(f"{_SPACE * 2}memswap_limit: {service._swap_limit + service._mem_limit}mb\n")
-
-        # write logging
-
-        file.write(f"{_SPACE * 2}logging:  # limit log size\n")
-        file.write(f"{_SPACE * 3}driver: json-file\n")
-        file.write(f"{_SPACE * 3}options:\n")
-        file.write(f"{_SPACE * 4}max-size: 16mb\n")
-
-        # write volumes
-
-        file.write(f"{_SPACE * 2}volumes:\n")
-        file.write(f"{_SPACE * 3}- ./logs:/app/logs  # for logs\n")
-        file.write(f"{_SPACE * 3}- /lib/modules:/lib/modules  # mount host kernel modules\n")
+        current = None
+        if os_path.exists(COMPOSE):
+            with open(COMPOSE) as file:
+                current = file.read()
 
-        # write networks
+        if compose != current:
+            if current is not None and networks_changed:
+                replace(COMPOSE, PREVIOUS)
 
-        if len(service._iface_configs):  # avoids an error if the network map is empty
-            file.write(f"{_SPACE * 2}networks:\n")
+            with open(COMPOSE, "w") as file:
+                file.write(compose)
 
-            for config in service._iface_configs:
-                assert isinstance(config, _IfaceConfig)
-                file.write(f"{_SPACE * 3}- {config._iface._name}\n")
+        with open(HASHES, "w") as file:
+            dump(hashes, file)
 
-        # write permissions
+        with open(CHANGES, "w") as file:
+            file.writelines(f"service {name}\n" for name in changed)
+            file.writelines(f"removed {name}\n" for name in removed)
+            file.writelines(f"network {name}\n" for name in networks_changed)
 
-        file.write(f"{_SPACE * 2}cap_add:\n")
-        file.write(f"{_SPACE * 3}- NET_ADMIN  # enables ifconfig, route\n")
-        file.write(f"{_SPACE * 2}privileged: true  # enables sysctl, kernel modules\n")
+        print(f"info: {len(changed)} of {len(services)} services changed, {len(removed)} removed; "
+              f"{len(networks_changed)} networks changed.")
 
-        file.write(f"{_SPACE * 2}environment:\n")
-
-        # write host configurations
+    def _services(self) -> dict[str, str]:
+        """
+        @returns: The block of each service by name, grouped by type.
+        """
 
-        dns_servers = []
-        if not service._dns_servers:
-            dns_servers.append("none")
-        else:
-            for dns_server in service._dns_servers:
-                assert isinstance(dns_server, _IPv4)
-                dns_servers.append(dns_server._str)
-
-        file.write(f"{_SPACE * 3}# Host configuration:\n")
-        file.write(f"{_SPACE * 3}NAMESERVERS: {" ".join(dns_servers)}\n")
-        file.write(f"{_SPACE * 3}QUERY_LOG: {str(service._query_log).lower()}\n")
-        file.write(f"{_SPACE * 3}FORWARD: {str(service._forward).lower()}\n")
-        file.write(f"{_SPACE * 3}SYN_COOKIE: {service._syn_cookie.name}\n")
-        file.write(f"{_SPACE * 3}CONGESTION_CONTROL: {service._congestion_control.name}\n")
-        file.write(f"{_SPACE * 3}FAST_RETRAN: {str(service._fast_retran).lower()}\n")
-        file.write(f"{_SPACE * 3}SACK: {str(service._sack).lower()}\n")
-        file.write(f"{_SPACE * 3}TIMESTAMP: {str(service._timestamp).lower()}\n")
-        file.write(f"{_SPACE * 3}AUTO_RESTART: {str(service._auto_restart).lower()}\n")
-        file.write(f"{_SPACE * 3}TTL: {service._ttl}\n")
-
-        # write interface configurations
+        types = [
+            (_ServiceType.client, Client, self._client),
+            (_ServiceType.tgen, TrafficGenerator, self._tgen),
+            (_ServiceType.http, HTTPServer, self._http),
+            (_ServiceType.dhcp, DHCPServer, self._dhcp),
+            (_ServiceType.dns, DNSServer, self._dns),
+            (_ServiceType.lb, LoadBalancer, self._lb),
+            (_ServiceType.tor, TorNode, self._tor),
+            (_ServiceType.router, Router, self._router),
+        ]
+
+        blocks = {}
+        for type, cls, block in types:
+            for service in _registry.of_type(type.name):
+                assert isinstance(service, cls)
+                blocks[service._name] = self._service(service) + block(service)
+
+        return blocks
+
+    def _service(self, service: _Service) -> str:
+        """
+        @params:
+            - service: Service configuration to write.
+        @returns: The block common to every service.
+        """
 
         ifaces = []
         ips = []
@@ -356,27 +415,6 @@ class Configurator():
         mtus = []
         firewalls = []
 
-        for config in service._iface_configs:
-            assert isinstance(config, _IfaceConfig)
-
-            ifaces.append(config._iface._name)
-            ips.append(config._ip._str if config._ip else "none")
-            net_masks.append(config._cidr._netmask._str if config._cidr else "none")
-            gateways.append(config._gateway._str if config._gateway else "none")
-            mtus.append(f"{config._mtu}" if config._mtu else "none")
-            firewalls.append(config._firewall.name if config._firewall else "none")
-
-        # if no interfaces have been added, all of these variables will be empty
-        file.write(f"{_SPACE * 3}# Interface configurations:\n")
-        file.write(f"{_SPACE * 3}IFACES: {" ".join(ifaces)}\n")
-        file.write(f"{_SPACE * 3}IPS: {" ".join(ips)}\n")
-        file.write(f"{_SPACE * 3}NET_MASKS: {" ".join(net_masks)}\n")
-        file.write(f"{_SPACE * 3}GATEWAYS: {" ".join(gateways)}\n")
-        file.write(f"{_SPACE * 3}MTUS: {" ".join(mtus)}\n")
-        file.write(f"{_SPACE * 3}FIREWALLS: {" ".join(firewalls)}\n")
-
-        # write tc_rules
-
         rates = []
         delays = []
         jitters = []
@@ -388,6 +426,13 @@ class Configurator():
         for config in service._iface_configs:
             assert isinstance(config, _IfaceConfig)
 
+            ifaces.append(config._iface._name)
+            ips.append(config._ip._str if config._ip else "none")
+            net_masks.append(config._cidr._netmask._str if config._cidr else "none")
+            gateways.append(config._gateway._str if config._gateway else "none")
+            mtus.append(f"{config._mtu}" if config._mtu else "none")
+            firewalls.append(config._firewall.name if config._firewall else "none")
+
             tc_rule = config._tc_rule
             rates.append(f"{tc_rule._rate}" if tc_rule else "none")
             delays.append(f"{tc_rule._delay}" if tc_rule else "none")
@@ -396,56 +441,177 @@ class Configurator():
             corrupts.append(f"{tc_rule._corrupt}" if tc_rule else "none")
             duplicates.append(f"{tc_rule._duplicate}" if tc_rule else "none")
             queue_limits.append(f"{tc_rule._queue_limit}" if tc_rule else "none")
-        
-        file.write(f"{_SPACE * 3}# TC Rule configurations:\n")
-        file.write(f"{_SPACE * 3}RATES: {" ".join(rates)}\n")
-        file.write(f"{_SPACE * 3}DELAYS: {" ".join(delays)}\n")
-        file.write(f"{_SPACE * 3}JITTERS: {" ".join(jitters)}\n")
-        file.write(f"{_SPACE * 3}DROPS: {" ".join(drops)}\n")
-        file.write(f"{_SPACE * 3}CORRUPTS: {" ".join(corrupts)}\n")
-        file.write(f"{_SPACE * 3}DUPLICATES: {" ".join(duplicates)}\n")
-        file.write(f"{_SPACE * 3}QUEUE_LIMITS: {" ".join(queue_limits)}\n")
-
-    def _write_inets(self, file: TextIOWrapper):
+
+        # avoids an error if the network map is empty
+        networks = ""
+        if ifaces:
+            networks = "    networks:\n" + "".join(_NETWORK.format(name=iface) for iface in ifaces)
+
+        nameservers = "none"
+        if service._dns_servers:
+            nameservers = " ".join(dns_server._str for dns_server in service._dns_servers)
+
+        cpuset = ""
+        if service._name in self._cpusets:
+            cpuset = _CPUSET.format(cpus=self._cpusets[service._name])
+
+        # memory swap represents the total amount of memory and swap that can be used.
+        return _SERVICE.format(
+            name=service._name,
+            image=service._image,
+            cpu_limit=service._cpu_limit,
+            mem_limit=service._mem_limit,
+            memswap_limit=service._swap_limit + service._mem_limit,
+            cpuset=cpuset,
+            networks=networks,
+            nameservers=nameservers,
+            query_log=_bool(service._query_log),
+            forward=_bool(service._forward),
+            syn_cookie=service._syn_cookie.name,
+            congestion_control=service._congestion_control.name,
+            fast_retran=_bool(service._fast_retran),
+            sack=_bool(service._sack),
+            timestamp=_bool(service._timestamp),
+            auto_restart=_bool(service._auto_restart),
+            ttl=service._ttl,
+            ifaces=" ".join(ifaces),
+            ips=" ".join(ips),
+            net_masks=" ".join(net_masks),
+            gateways=" ".join(gateways),
+            mtus=" ".join(mtus),
+            firewalls=" ".join(firewalls),
+            rates=" ".join(rates),
+            delays=" ".join(delays),
+            jitters=" ".join(jitters),
+            drops=" ".join(drops),
+            corrupts=" ".join(corrupts),
+            duplicates=" ".join(duplicates),
+            queue_limits=" ".join(queue_limits),
+        )
+
+    def _client(self, client: Client) -> str:
+        return _CLIENT.format(
+            tor_dir=client._tor_dir._name if client._tor_dir else "",
+            tor_bridge=client._tor_bridge._name if client._tor_bridge else "",
+            tor_middles=_names(client._tor_middles),
+            tor_exits=_names(client._tor_exits),
+            tor_log=_bool(client._tor_log),
+        )
+
+    def _tgen(self, tgen: TrafficGenerator) -> str:
+        return _TGEN.format(
+            target=tgen._target,
+            conn_max=tgen._conn_max,
+            conn_rate=tgen._conn_rate,
+            conn_dur=tgen._conn_dur,
+            proto=tgen._proto.name,
+            requests=" ".join(tgen._requests),
+            wait_min=tgen._wait_min,
+            wait_max=tgen._wait_max,
+            gzip=_bool(tgen._gzip),
+        )
+
+    def _http(self, http_server: HTTPServer) -> str:
+        return _HTTP.format(
+            tor_dir=http_server._tor_dir._name if http_server._tor_dir else "",
+            tor_bridge=http_server._tor_bridge._name if http_server._tor_bridge else "",
+            tor_log=_bool(http_server._tor_log),
+        )
+
+    def _dhcp(self, dhcp_server: DHCPServer) -> str:
+        configs = dhcp_server._iface_configs
+
+        return _DHCP.format(
+            lease_times=" ".join(f"{config._lease_time}" for config in configs),
+            lease_starts=" ".join(config._lease_start._str for config in configs),
+            lease_ends=" ".join(config._lease_end._str for config in configs),
+        )
+
+    def _dns(self, dns_server: DNSServer) -> str:
+        domains = dns_server._domains
+        assert all(isinstance(domain, _Domain) for domain in domains)
+
+        return _DNS.format(
+            cache=dns_server._cache,
+            host_names=" ".join(domain._name for domain in domains),
+            host_ips=" ".join(domain._ip._str for domain in domains),
+        )
+
+    def _lb(self, lb: LoadBalancer) -> str:
+        assert all(isinstance(backend, _IPv4) for backend in lb._backends)
+
+        return _LB.format(
+            router_id=lb._router_id,
+            type=lb._type.name,
+            algorithm=lb._algorithm.name,
+            advertise=_bool(lb._advertise),
+            check=lb._health_check,
+            backends=" ".join(backend._str for backend in lb._backends),
+        )
+
+    def _tor(self, tor_node: TorNode) -> str:
+        return _TOR.format(
+            tor_dir=tor_node._tor_dir._name if tor_node._tor_dir else tor_node._name,
+            tor_log=_bool(tor_node._tor_log),
+            is_bridge=_bool(tor_node._is_bridge),
+            is_exit=_bool(tor_node._is_exit),
+        )
+
+    def _router(self, router: Router) -> str:
+        configs = router._iface_configs
+
+        return _ROUTER.format(
+            router_id=router._router_id,
+            ecmp=router._ecmp.name if router._ecmp else "none",
+            cidrs=" ".join(config._cidr._str if config._cidr else "none" for config in configs),
+            nats=" ".join(config._nat.name if config._nat else "none" for config in configs),
+            costs=" ".join(f"{config._cost}" for config in configs),
+        )
+
+    def _inets(self, partitioner: Partitioner | None) -> dict[str, str]:
         """
         @params:
-            - file: File to write to.
+            - partitioner: Optional. The hosts of the services.
+        @returns: The block of each network by name.
+        Note:
+            - Docker assigns each container an address of the temporary subnet, and overlay
+              networks an address on each host.
+            - The temporary subnet of the previous configuration is kept while the network fits
+              within it, so adding or removing a service does not move the other networks. Only new
+              and outgrown networks are allocated.
         """
 
-        ifaces = []
-        if "iface" in _components:
-            ifaces = _components["iface"]
-            file.write("networks:\n")
+        ifaces = _registry.of_type("iface")
 
+        addresses = {}  # network name: addresses of the temporary subnet
         for iface in ifaces:
             assert isinstance(iface, Iface)
 
-            file.write(f"{_SPACE * 1}{iface._name}:\n")
-            file.write(f"{_SPACE * 2}name: {iface._name}\n")
-            file.write(f"{_SPACE * 2}driver: bridge\n")
-            file.write(f"{_SPACE * 2}internal: true\n")
-            file.write(f"{_SPACE * 2}ipam:\n")
-            file.write(f"{_SPACE * 3}config:  # this is a workaround for a docker limitation\n")
-            file.write(f"{_SPACE * 4}- subnet: {self._get_cidr()}  # temporary subnet\n")
-            file.write(f"{_SPACE * 2}driver_opts:  # os defines a suffix\n")
-            file.write(f"{_SPACE * 3}com.docker.network.container_iface_prefix: {iface._name}_\n")
-
-    def _get_cidr(self) -> str:
-        """
-        @returns: An IPv4 address in CIDR notation.
-        """
+            hosts = len(partitioner.hosts(iface)) if partitioner else 1
+            addresses[iface._name] = len(_registry.attached(iface)) + RESERVED + (hosts if hosts > 1 else 0)
+
+            if self._prefix_len is not None:
+                addresses[iface._name] = 2 ** (32 - self._prefix_len)
+
+        previous = {}
+        if os_path.exists(HASHES):
+            with open(HASHES) as file:
+                previous = load(file).get("subnets", {})
 
-        if self._ip >= self._ip_max:
-            print(f"error: Allocated subnet {self._cidr._str} exceeded.")
-            print("info: Consider changing settings for the Configurator.")
-            
-            print_stack()
-            exit(1)
+        # a fixed prefix length must match; otherwise the previous subnet must fit
+        fits = {name: subnet for name, subnet in previous.items() if name in addresses and (
+            int(subnet.split("/")[1]) == self._prefix_len if self._prefix_len is not None
+            else int(subnet.split("/")[1]) <= _prefix_len(addresses[name]))}
 
-        ip = _IPv4(self._ip)
-        cidr = f"{ip._str}/{self._prefix_len}"
+        allocator = Allocator(self._cidr, [*fits.values()])
+        for name, subnet in fits.items():
+            if subnet in allocator._kept:
+                self._subnets[name] = subnet
 
-        suffix_len = 32 - self._prefix_len
-        self._ip += 2 ** suffix_len  # iterate
+        # the largest first, so smaller subnets fill the gaps between subnets of the configuration
+        for name in sorted(addresses, key=lambda name: -addresses[name]):
+            if name not in self._subnets:
+                self._subnets[name] = allocator.allocate(addresses[name])
 
-        return cidr
+        return {iface._name: _INET.format(name=iface._name, subnet=self._subnets[iface._name])
+                for iface in ifaces}
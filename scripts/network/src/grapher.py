@@ -1,7 +1,7 @@
 
 from io import TextIOWrapper
 
-from src.components import _components, Iface, _ServiceType, _Service, _IfaceConfig
+from src.components import _registry, Iface, _ServiceType, _Service, _IfaceConfig
 
 
 # supported colors: https://graphviz.org/doc/info/colors.html
@@ -29,10 +29,9 @@ class Grapher():
             - extra: Enable or disable extra information.
         """
 
-        try:
-            self._comps = _components.copy()  # remove ifaces without affecting external
-            self._ifaces = self._comps.pop("iface")
-        except Exception as _:
+        self._services = _registry.services()
+        self._ifaces = _registry.of_type("iface")
+        if not self._ifaces:
             print("Warning: No interfaces found. Stopping...")
             return
 
@@ -73,27 +72,26 @@ class Grapher():
 
         file.write("\t# COMPONENTS\n")
 
-        for comps in self._comps.values():
-            for service in comps:  # comps is a list
-                assert isinstance(service, _Service)
+        for service in self._services:
+            assert isinstance(service, _Service)
 
-                name = service._name
+            name = service._name
 
-                color_fill = COLOR_MAP["default"]
-                if color and service._type.name in COLOR_MAP:
-                    color_fill = COLOR_MAP[service._type.name]
+            color_fill = COLOR_MAP["default"]
+            if color and service._type.name in COLOR_MAP:
+                color_fill = COLOR_MAP[service._type.name]
 
-                file.write(f"\t\"{name}\" [ ")
-                if extra:
-                    file.write(f"label=\"{name}")
+            file.write(f"\t\"{name}\" [ ")
+            if extra:
+                file.write(f"label=\"{name}")
 
-                    for iface in service._iface_configs:
-                        assert isinstance(iface, _IfaceConfig)
-                        file.write(f"\\n{iface._ip._str}")
+                for iface in service._iface_configs:
+                    assert isinstance(iface, _IfaceConfig)
+                    file.write(f"\\n{iface._ip._str}")
 
-                    file.write("\" ")
+                file.write("\" ")
 
-                file.write(f"style=\"filled\" fillcolor=\"{color_fill}\" ]\n")
+            file.write(f"style=\"filled\" fillcolor=\"{color_fill}\" ]\n")
         
         file.write("\n")  # new line
         file.write("\t# IFACES\n")
@@ -117,14 +115,13 @@ class Grapher():
             - extra: Enable or disable extra information.
         """
 
-        for comps in self._comps.values():
-            for service in comps:
-                assert isinstance(service, _Service)
+        for service in self._services:
+            assert isinstance(service, _Service)
 
-                name_service = service._name
-                for iface in service._iface_configs:
-                    assert isinstance(iface, _IfaceConfig)
+            name_service = service._name
+            for iface in service._iface_configs:
+                assert isinstance(iface, _IfaceConfig)
 
-                    name_iface = iface._iface._name
-                    file.write(f"\t\"{name_service}\" -- \"{name_iface}\" [ ]\n")
+                name_iface = iface._iface._name
+                file.write(f"\t\"{name_service}\" -- \"{name_iface}\" [ ]\n")
                     
\ No newline at end of file
@@ -0,0 +1,305 @@
+from heapq import heappop, heappush
+from traceback import print_stack
+
+from src.components import *  # private must be imported manually
+from src.components import _registry, _Service
+
+
+IMBALANCE = 0.1  # the load of a host may exceed its share of the total load by this fraction
+PASSES = 8  # the maximum number of refinement passes
+
+
+class Host():
+    def __init__(self, name: str, cpus: float, mem: int, cores: list[int] | None = None):
+        """
+        @params:
+            - name: The name of the host; the docker context used to reach it.
+            - cpus: The capacity of the host. In units of number of logical cores.
+            - mem: The capacity of the host. In units of megabytes.
+            - cores: Optional. The ids of the cores services may be pinned to, ex. excluding
+                     offline or isolated cores; 0 to cpus - 1 by default.
+        Note:
+            - Services are placed by their cpu_limit and mem_limit.
+        """
+
+        assert(name and name != "")
+        self._name = name
+
+        assert(cpus > 0)
+        self._cpus = cpus
+
+        assert(mem > 0)
+        self._mem = mem
+
+        assert(cores is None or len(cores) > 0)
+        self._cores = sorted(cores) if cores else [*range(int(cpus))]
+
+
+class Partitioner():
+    def __init__(self, hosts: list[Host]):
+        """
+        @params:
+            - hosts: The hosts to place the services on.
+        Note:
+            - Services are placed to minimize the interfaces that span multiple hosts (cut interfaces);
+              each cut interface requires an overlay network.
+            - The load of each host is balanced by its capacity, within IMBALANCE, and never
+              exceeds its capacity.
+            - Services with a single interface, ex. the clients of a LAN, are placed together as a
+              unit with the other services of the interface. Units are first placed in breadth first
+              order over the interfaces, then moved between hosts while fewer hosts are spanned.
+        """
+
+        assert(len(hosts) > 0)
+        assert(len({host._name for host in hosts}) == len(hosts))  # unique names
+        self._hosts = hosts
+
+        services = _registry.services()
+        cpus = sum(service._cpu_limit for service in services)
+        capacity = sum(host._cpus for host in hosts)
+
+        self._cpus = [0.0] * len(hosts)  # the load of each host
+        self._mems = [0] * len(hosts)
+        self._limits = [min(host._cpus, cpus * host._cpus / capacity * (1 + IMBALANCE))
+                        for host in hosts]
+
+        self._units: list[list[_Service]] = []
+        self._unit_ifaces: list[dict[str, int]] = []  # iface name: number of services of the unit
+        self._unit_cpus: list[float] = []
+        self._unit_mems: list[int] = []
+        self._build_units(services, min(self._limits) / 2)
+
+        self._unit_of: dict[str, int] = {}  # service name: unit
+        for unit, members in enumerate(self._units):
+            for service in members:
+                self._unit_of[service._name] = unit
+
+        self._assignment: list[int | None] = [None] * len(self._units)  # unit: host
+
+        # the number of services of each interface on each host
+        self._counts: dict[str, list[int]] = {}
+        for iface in _registry.of_type("iface"):
+            self._counts[iface._name] = [0] * len(hosts)
+
+        self._attached: dict[str, list[int]] = {}  # iface name: units
+        for unit, ifaces in enumerate(self._unit_ifaces):
+            for iface in ifaces:
+                self._attached.setdefault(iface, []).append(unit)
+
+        order = self._order(self._order(0)[-1]) if self._units else []  # from a peripheral unit
+        self._place(order, cpus, capacity)
+        for _ in range(PASSES):
+            if not self._refine(order):
+                break
+
+    def _build_units(self, services: list[_Service], limit: float):
+        """
+        @params:
+            - services: The services.
+            - limit: The maximum cpus of a unit of multiple services.
+        """
+
+        lans: dict[str, int] = {}  # iface name: the open unit of the services with only the iface
+
+        for service in services:
+            configs = service._iface_configs
+
+            unit = None
+            if len(configs) == 1:
+                unit = lans.get(configs[0]._iface._name)
+                if unit is not None and self._unit_cpus[unit] + service._cpu_limit > limit:
+                    unit = None  # full
+
+            if unit is None:
+                unit = len(self._units)
+                self._units.append([])
+                self._unit_ifaces.append({})
+                self._unit_cpus.append(0.0)
+                self._unit_mems.append(0)
+
+                if len(configs) == 1:
+                    lans[configs[0]._iface._name] = unit
+
+            self._units[unit].append(service)
+            self._unit_cpus[unit] += service._cpu_limit
+            self._unit_mems[unit] += service._mem_limit
+
+            for config in configs:
+                ifaces = self._unit_ifaces[unit]
+                ifaces[config._iface._name] = ifaces.get(config._iface._name, 0) + 1
+
+    def _order(self, start: int) -> list[int]:
+        """
+        @params:
+            - start: The first unit.
+        @returns: The units in breadth first order over the interfaces. Units that are not
+                  reachable from start follow in order.
+        """
+
+        visited = [False] * len(self._units)
+        ordered = []
+
+        for start in [start, *range(len(self._units))]:
+            if visited[start]:
+                continue
+
+            visited[start] = True
+            queue = [start]
+
+            for unit in queue:  # grows while iterated
+                ordered.append(unit)
+
+                for iface in self._unit_ifaces[unit]:
+                    for neighbor in self._attached[iface]:
+                        if not visited[neighbor]:
+                            visited[neighbor] = True
+                            queue.append(neighbor)
+
+        return ordered
+
+    def _fits(self, unit: int, host: int, limit: float) -> bool:
+        return self._cpus[host] + self._unit_cpus[unit] <= limit \
+            and self._mems[host] + self._unit_mems[unit] <= self._hosts[host]._mem
+
+    def _assign(self, unit: int, host: int):
+        previous = self._assignment[unit]
+        if previous is not None:
+            self._cpus[previous] -= self._unit_cpus[unit]
+            self._mems[previous] -= self._unit_mems[unit]
+
+            for iface, count in self._unit_ifaces[unit].items():
+                self._counts[iface][previous] -= count
+
+        self._assignment[unit] = host
+        self._cpus[host] += self._unit_cpus[unit]
+        self._mems[host] += self._unit_mems[unit]
+
+        for iface, count in self._unit_ifaces[unit].items():
+            self._counts[iface][host] += count
+
+    def _place(self, order: list[int], cpus: float, capacity: float):
+        """
+        @params:
+            - order: The units in breadth first order from a peripheral unit.
+            - cpus: The total load.
+            - capacity: The total capacity.
+        Note:
+            - Grows the region of each host in turn to its share of the load. Each region starts
+              at the first unplaced unit in order, then adds the adjacent unit with the most
+              interfaces already in the region less the interfaces it would add.
+            - The last host is given the remaining units.
+        """
+
+        position = {unit: index for index, unit in enumerate(order)}
+        unplaced = set(order)
+
+        for host in range(len(self._hosts) - 1):
+            share = cpus * self._hosts[host]._cpus / capacity
+
+            region: set[str] = set()  # ifaces with a unit of the host
+            gains = {}
+            heap: list[tuple[int, int, int]] = []  # (-gain, position, unit)
+            skipped = set()  # units that do not fit on the host
+
+            while self._cpus[host] < share and len(unplaced) > len(skipped):
+                if not heap:  # seed the region, or another part of the region
+                    seed = next(unit for unit in order if unit in unplaced and unit not in skipped)
+                    gains[seed] = gains.get(seed, -len(self._unit_ifaces[seed]))
+                    heappush(heap, (-gains[seed], position[seed], seed))
+
+                gain, _, unit = heappop(heap)
+                if unit not in unplaced or unit in skipped or -gain != gains[unit]:
+                    continue  # stale
+
+                if not self._fits(unit, host, self._hosts[host]._cpus):
+                    skipped.add(unit)
+                    continue
+
+                self._assign(unit, host)
+                unplaced.remove(unit)
+
+                for iface in self._unit_ifaces[unit]:
+                    if iface in region:
+                        continue
+                    region.add(iface)
+
+                    for neighbor in self._attached[iface]:
+                        if neighbor in unplaced and neighbor not in skipped:
+                            # the iface is no longer added by the neighbor, and is now shared
+                            gains[neighbor] = gains.get(neighbor, -len(self._unit_ifaces[neighbor])) + 2
+                            heappush(heap, (-gains[neighbor], position[neighbor], neighbor))
+
+        for unit in order:
+            if unit not in unplaced:
+                continue
+
+            # the last host, or any host with room; ex. a unit skipped for memory
+            for host in [len(self._hosts) - 1, *range(len(self._hosts) - 1)]:
+                if self._fits(unit, host, self._hosts[host]._cpus):
+                    self._assign(unit, host)
+                    break
+            else:
+                print(f"error: {self._units[unit][0]._name} does not fit on any host.")
+                print("info: Consider adding hosts or reducing limits.")
+
+                print_stack()
+                exit(1)
+
+    def _refine(self, order: list[int]) -> bool:
+        """
+        Moves each unit to the host that most reduces the hosts spanned by its interfaces.
+        @returns: Whether any unit was moved.
+        """
+
+        moved = False
+
+        for unit in order:
+            current = self._assignment[unit]
+
+            best, best_gain = current, 0
+            for host in range(len(self._hosts)):
+                if host == current or not self._fits(unit, host, self._limits[host]):
+                    continue
+
+                gain = 0
+                for iface, count in self._unit_ifaces[unit].items():
+                    counts = self._counts[iface]
+                    gain += (counts[current] == count) - (counts[host] == 0)
+
+                if gain > best_gain:
+                    best, best_gain = host, gain
+
+            if best != current:
+                self._assign(unit, best)
+                moved = True
+
+        return moved
+
+    def host(self, service: _Service) -> Host:
+        """
+        @returns: The host of the service.
+        """
+
+        return self._hosts[self._assignment[self._unit_of[service._name]]]
+
+    def hosts(self, iface: Iface) -> list[Host]:
+        """
+        @returns: The hosts with services on the interface, in order of the hosts.
+        """
+
+        counts = self._counts[iface._name]
+        return [host for host, count in zip(self._hosts, counts) if count > 0]
+
+    def report(self):
+        """
+        Prints the load of each host and the number of cut interfaces.
+        """
+
+        for index, host in enumerate(self._hosts):
+            services = sum(len(members) for members, assigned in zip(self._units, self._assignment)
+                           if assigned == index)
+            print(f"info: {host._name}: {services} services, {self._cpus[index]:.2f} of "
+                  f"{host._cpus} cpus, {self._mems[index]} of {host._mem} mb")
+
+        cut = sum(1 for counts in self._counts.values() if sum(count > 0 for count in counts) > 1)
+        print(f"info: {cut} of {len(self._counts)} interfaces span multiple hosts.")
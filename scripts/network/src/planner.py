@@ -0,0 +1,148 @@
+from math import ceil
+from os import cpu_count, sysconf
+
+from src.components import *  # private must be imported manually
+from src.components import _ServiceType, _Service
+from src.partitioner import Host
+
+
+# services of each role are pinned to cores that are disjoint from the other roles
+_ROLES = {
+    _ServiceType.client.name: "load",
+    _ServiceType.tgen.name: "load",
+    _ServiceType.http.name: "server",
+    _ServiceType.dns.name: "server",
+    _ServiceType.dhcp.name: "server",
+    _ServiceType.lb.name: "server",
+    _ServiceType.tor.name: "server",
+    _ServiceType.router.name: "network",
+}
+
+
+def local_host() -> Host:
+    """
+    @returns: The host of the configurator, with its cores and memory.
+    Note:
+        - The cores are those this process may run on, ex. excluding offline and isolated cores.
+    """
+
+    try:
+        from os import sched_getaffinity
+        cores = sorted(sched_getaffinity(0))
+    except ImportError:  # ex. macOS
+        cores = [*range(cpu_count() or 1)]
+
+    mem = sysconf("SC_PHYS_PAGES") * sysconf("SC_PAGE_SIZE") // 2 ** 20
+    return Host("local", len(cores), mem, cores)
+
+
+def _cpuset(cores: list[int]) -> str:
+    """
+    @params:
+        - cores: The cores, ex. [0, 1, 2, 5].
+    @returns: The cores in cpuset notation, ex. "0-2,5".
+    """
+
+    ranges = []
+    for core in sorted(cores):
+        if ranges and ranges[-1][1] == core - 1:
+            ranges[-1][1] = core
+        else:
+            ranges.append([core, core])
+
+    return ",".join(f"{first}" if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+class Planner():
+    def __init__(self, hosts: list[Host], services: list[_Service], scale: bool = False):
+        """
+        @params:
+            - hosts: The hosts of the services.
+            - services: The services.
+            - scale: Scale the cpu and memory limits of every service proportionally if the
+                     hosts are oversubscribed.
+        Note:
+            - Oversubscription is reported as a warning; the limits of the services exceed the
+              cores or memory of the hosts, so services compete and measurements are unreliable.
+        """
+
+        self._services = services
+
+        cpus = sum(service._cpu_limit for service in services)
+        mem = sum(service._mem_limit for service in services)
+
+        cpus_available = sum(host._cpus for host in hosts)
+        mem_available = sum(host._mem for host in hosts)
+
+        if cpus > cpus_available:
+            print(f"Warning: Oversubscribed; cpu limits total {cpus:.2f} of {cpus_available} cpus.")
+        if mem > mem_available:
+            print(f"Warning: Oversubscribed; memory limits total {mem} of {mem_available} mb.")
+
+        if scale and (cpus > cpus_available or mem > mem_available):
+            self._scale(min(cpus_available / cpus, 1.0), min(mem_available / mem, 1.0))
+
+    def _scale(self, cpu_factor: float, mem_factor: float):
+        """
+        @params:
+            - cpu_factor: The factor of each cpu limit.
+            - mem_factor: The factor of each memory limit.
+        """
+
+        for service in self._services:
+            service._cpu_limit = max(int(service._cpu_limit * cpu_factor * 100) / 100, 0.01)
+            service._mem_limit = max(int(service._mem_limit * mem_factor), 33)  # see _Service
+
+        print(f"info: Scaled cpu limits by {cpu_factor:.2f} and memory limits by {mem_factor:.2f}.")
+
+    def pin(self, host: Host, services: list[_Service]) -> dict[str, str]:
+        """
+        @params:
+            - host: The host.
+            - services: The services on the host.
+        @returns: The cpuset of each service by name, ex. {"tgen-0": "0-1"}.
+        Note:
+            - The cores of the host, see Host, are divided between the roles by their cpu limits: traffic
+              generators and clients, servers, and routers. Roles do not share cores, unless
+              there are fewer cores than roles.
+            - Within a role, each service is given ceil(cpu_limit) cores in turn; services of
+              the same role share cores once the cores of the role are exhausted.
+        """
+
+        roles: dict[str, list[_Service]] = {}
+        for service in services:
+            roles.setdefault(_ROLES.get(service._type.name, "server"), []).append(service)
+
+        if not roles:
+            return {}
+
+        available = host._cores
+        cores = len(available)
+        assert(cores > 0)
+
+        # the cores of each role, by its share of the cpu limits; at least 1
+        demand = {role: sum(service._cpu_limit for service in members) for role, members in roles.items()}
+        total = sum(demand.values())
+
+        counts = {role: max(1, round(cores * demand[role] / total)) for role in roles}
+        while sum(counts.values()) > max(cores, len(roles)):
+            largest = max(counts, key=lambda role: counts[role])
+            counts[largest] -= 1
+        while sum(counts.values()) < cores:
+            largest = max(demand, key=lambda role: demand[role] / counts[role])
+            counts[largest] += 1
+
+        cpusets = {}
+        first = 0
+        for role, members in roles.items():
+            pool = [(first + i) % cores for i in range(counts[role])]
+            first += counts[role]
+
+            cursor = 0
+            for service in members:
+                width = min(max(1, ceil(service._cpu_limit)), len(pool))
+                cpusets[service._name] = _cpuset(
+                    [available[pool[(cursor + i) % len(pool)]] for i in range(width)])
+                cursor = (cursor + width) % len(pool)
+
+        return cpusets
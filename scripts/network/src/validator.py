@@ -0,0 +1,121 @@
+from traceback import print_stack
+
+from src.components import *  # private must be imported manually
+from src.components import _registry, _Service, _IfaceConfig, _IPv4
+
+
+def _interval(network: int, prefix_len: int) -> tuple[int, int]:
+    """
+    @returns: The first and last IPv4 address of the subnet as integers.
+    """
+
+    return (network, network + 2 ** (32 - prefix_len) - 1)
+
+
+def _cidr_str(network: int, prefix_len: int) -> str:
+    return f"{_IPv4(network)._str}/{prefix_len}"
+
+
+def _overlaps(intervals: list[tuple[int, int, object]]) -> list[tuple[object, object]]:
+    """
+    @params:
+        - intervals: The subnets as (first, last, tag).
+    @returns: The tags of each pair of overlapping subnets, the containing subnet first.
+    Note:
+        - Subnets are either nested or disjoint, so a sweep in order of the first address
+          with a stack of the open subnets finds every overlap; O(n log n + overlaps).
+    """
+
+    overlaps = []
+    stack: list[tuple[int, int, object]] = []
+
+    for interval in sorted(intervals, key=lambda interval: (interval[0], -interval[1])):
+        while stack and stack[-1][1] < interval[0]:  # closed before this subnet
+            stack.pop()
+
+        for outer in stack:  # every open subnet contains this subnet
+            overlaps.append((outer[2], interval[2]))
+
+        stack.append(interval)
+
+    return overlaps
+
+
+class Validator():
+    def __init__(self):
+        """
+        Note:
+            - Reports every conflict at once, then exits if there are any:
+                - Services with the same IP on the same interface, unless each is an
+                  advertising load balancer.
+                - Services with the same subnet on multiple interfaces.
+            - Nested subnets on one service are allowed; the longest prefix is routed,
+              ex. to blackhole part of a subnet or for anycast.
+        """
+
+        self._errors: list[str] = []
+
+        services = _registry.services()
+
+        self._validate_ips(services)
+        self._validate_subnets(services)
+
+        for error in self._errors:
+            print(f"error: {error}")
+
+        if self._errors:
+            print_stack()
+            exit(1)
+
+    def _validate_ips(self, services: list[_Service]):
+        """
+        @params:
+            - services: The services to validate.
+        """
+
+        owners: dict[tuple[str, int], list[_Service]] = {}  # (iface name, ip): services
+
+        for service in services:
+            for config in service._iface_configs:
+                assert isinstance(config, _IfaceConfig)
+
+                if config._ip:
+                    owners.setdefault((config._iface._name, config._ip._int), []).append(service)
+
+        for (iface, ip), holders in owners.items():
+            if len(holders) == 1:
+                continue
+
+            if all(isinstance(holder, LoadBalancer) and holder._advertise for holder in holders):
+                continue  # anycast
+
+            names = ", ".join(holder._name for holder in holders)
+            self._errors.append(f"IP {_IPv4(ip)._str} on {iface} is configured on {names}.")
+
+    def _validate_subnets(self, services: list[_Service]):
+        """
+        @params:
+            - services: The services to validate.
+        """
+
+        for service in services:
+            if len(service._iface_configs) < 2:
+                continue
+
+            intervals = []
+            for config in service._iface_configs:
+                assert isinstance(config, _IfaceConfig)
+
+                if config._cidr:
+                    cidr = config._cidr
+                    intervals.append((*_interval(cidr._network, cidr._prefix_len), config))
+
+            # nested subnets are allowed deliberately, ex. examples/blackhole.py; CIDR blocks are
+            # nested or disjoint, so only the same subnet twice is a conflict
+            for outer, inner in _overlaps(intervals):
+                if outer._cidr._prefix_len != inner._cidr._prefix_len:
+                    continue  # nested; the longest prefix is routed
+
+                subnet = _cidr_str(outer._cidr._network, outer._cidr._prefix_len)
+                self._errors.append(f"{service._name} has subnet {subnet} on both "
+                                    f"{outer._iface._name} and {inner._iface._name}.")
@@ -0,0 +1,99 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from json import load
+from os import chdir, getcwd, mkdir, path as os_path
+from sys import path as sys_path
+from tempfile import TemporaryDirectory
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+import src.components
+
+from src.components import *
+from src.components import _registry
+from src.configurator import Configurator, CHANGES, HASHES
+
+
+# ex. python3 tests/test_configurator.py
+
+
+def _configure(servers: list[int]) -> tuple[dict[str, str], list[str]]:
+    """
+    @params:
+        - servers: The number of servers behind each router.
+    @returns: The temporary subnet of each network, and the lines of logs/compose-changes.
+    """
+
+    core = Iface()
+    for i, count in enumerate(servers):
+        iface = Iface()
+
+        router = Router()
+        router.add_iface(core, cidr="100.0.0.0/24", ip=f"100.0.0.{i + 1}")
+        router.add_iface(iface, cidr=f"100.0.{i + 1}.0/24", ip=f"100.0.{i + 1}.1")
+
+        for n in range(count):
+            HTTPServer().add_iface(iface, cidr=f"100.0.{i + 1}.0/24", ip=f"100.0.{i + 1}.{n + 2}",
+                                   gateway=f"100.0.{i + 1}.1")
+
+    try:
+        with redirect_stdout(StringIO()):
+            Configurator(available_range="10.0.0.0/24")
+    finally:
+        _registry.clear()
+        src.components._router_id = 0  # as a new process
+
+    with open(HASHES) as file:
+        subnets = load(file)["subnets"]
+    with open(CHANGES) as file:
+        changes = file.read().splitlines()
+
+    return (subnets, changes)
+
+
+def _in_directory(test):
+    def run():
+        cwd = getcwd()
+        with TemporaryDirectory() as directory:  # the compose file and graph are written to the cwd
+            chdir(directory)
+            mkdir("logs")
+            try:
+                test()
+            finally:
+                chdir(cwd)
+
+    run.__name__ = test.__name__
+    return run
+
+
+@_in_directory
+def test_add_service():
+    before, _ = _configure([5, 2, 12, 1])
+    after, changes = _configure([5, 2, 12, 2])
+
+    assert before == after  # network-4 still fits its /29; no network moved
+    assert changes == ["service http-20"]
+
+
+@_in_directory
+def test_outgrown():
+    before, _ = _configure([5, 2, 12, 1])
+    after, changes = _configure([5, 6, 12, 1])  # network-2 no longer fits its /29
+
+    assert [name for name in before if before[name] != after[name]] == ["network-2"]
+    assert [line for line in changes if line.startswith("network ")] == ["network network-2"]
+
+
+@_in_directory
+def test_remove_service():
+    before, _ = _configure([5, 2, 12, 1])
+    after, changes = _configure([5, 2, 12, 0])
+
+    assert before == after
+    assert changes == ["removed http-19"]
+
+
+if __name__ == "__main__":
+    for name, test in [*globals().items()]:
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: passed")
@@ -0,0 +1,56 @@
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from os import path as os_path
+from sys import path as sys_path
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from src.components import *
+from src.components import _registry
+from src.validator import Validator
+
+
+# ex. python3 tests/test_validator.py
+
+
+def _validate() -> list[str]:
+    """
+    @returns: The errors reported by the Validator, or nothing if the configuration is valid.
+    """
+
+    output = StringIO()
+    try:
+        with redirect_stdout(output), redirect_stderr(StringIO()):
+            Validator()
+    except SystemExit:
+        return [line for line in output.getvalue().splitlines() if line.startswith("error: ")]
+    finally:
+        _registry.clear()
+
+    return []
+
+
+def test_nested():
+    router = Router()
+    router.add_iface(Iface(), cidr="100.0.1.0/24", ip="100.0.1.1")
+    router.add_iface(Iface(), cidr="100.0.1.0/28", ip="100.0.1.2")  # ex. a blackhole
+    router.add_iface(Iface(), cidr="100.0.1.0/30", ip="100.0.1.3")
+
+    assert _validate() == []
+
+
+def test_same_subnet():
+    # CIDR blocks do not partially overlap; a block overlapping another not nested within it is the same block
+    router = Router()
+    router.add_iface(Iface(), cidr="100.0.1.0/24", ip="100.0.1.1")
+    router.add_iface(Iface(), cidr="100.0.1.0/28", ip="100.0.1.2")
+    router.add_iface(Iface(), cidr="100.0.1.0/24", ip="100.0.1.3")
+
+    errors = _validate()
+    assert len(errors) == 1 and "100.0.1.0/24" in errors[0]
+
+
+if __name__ == "__main__":
+    for name, test in [*globals().items()]:
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: passed")
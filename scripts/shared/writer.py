@@ -0,0 +1,162 @@
+from sys import stdout
+from time import monotonic
+from typing import Iterable, NamedTuple, Sequence
+
+
+# formats are selected by the extension of the output
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",  # arrow ipc stream; readable even if the writer is killed
+}
+
+
+def format_of(path: str) -> str:
+    """
+    @params:
+        - path: The output file, or "-" for csv on stdout.
+    @returns: The format of the output: "csv", "parquet", or "arrow".
+    """
+
+    extension = path[path.rfind("."):] if "." in path else ""
+    return FORMATS.get(extension, "csv")
+
+
+class Column(NamedTuple):
+    name: str
+    type: type = int  # int, float, or str
+    format: str = "{}"  # csv only
+
+
+class Writer():
+    def __init__(self, path: str, columns: list[Column], batch: int = 4096, interval: float | None = None):
+        """
+        @params:
+            - path: The output file, or "-" for stdout. The format is selected by the extension, ex. ".parquet".
+            - columns: The columns of each row.
+            - batch: The number of rows buffered before writing. For parquet, each batch is a row group.
+            - interval: Optional. Buffered rows are also written once <interval> seconds have passed
+                        since the last write, checked upon each row. In units of seconds.
+        Note:
+            - Parquet and arrow require pyarrow. CSV has no dependencies.
+            - Parquet is only readable after close().
+        """
+
+        self._path = path
+        self._columns = columns
+
+        assert(batch > 0)
+        self._batch = batch
+
+        assert(interval is None or interval > 0)
+        self._interval = interval
+        self._flushed = monotonic()
+
+        self._format = format_of(path)
+
+        self._rows: list[Sequence] = []
+        self._file = None
+        self._writer = None
+        self._closed = False
+
+        if self._format == "csv":
+            self._file = stdout if path == "-" else open(path, "w")
+            self._file.write(",".join(column.name for column in columns) + "\n")
+            self._row = ",".join(column.format for column in columns) + "\n"
+            return
+
+        try:
+            import pyarrow
+        except ImportError:
+            print(f"error: writing {path} requires pyarrow; use a .csv output or `pip install pyarrow`")
+            exit(1)
+
+        types = {int: pyarrow.int64(), float: pyarrow.float64(), str: pyarrow.string()}
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(column.name, types[column.type]) for column in columns])
+
+    def write(self, row: Sequence):
+        """
+        @params:
+            - row: The values of each column.
+        """
+
+        self._rows.append(row)
+        if len(self._rows) >= self._batch \
+                or (self._interval and monotonic() - self._flushed >= self._interval):
+            self.flush()
+
+    def write_rows(self, rows: Iterable[Sequence]):
+        """
+        @params:
+            - rows: The rows to write.
+        """
+
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """
+        Writes the buffered rows.
+        """
+
+        self._flushed = monotonic()
+
+        if not self._rows:
+            if self._file:
+                self._file.flush()
+            return
+
+        if self._format == "csv":
+            row = self._row
+            self._file.write("".join(row.format(*values) for values in self._rows))
+            self._file.flush()
+        else:
+            self._write_batch()
+
+        self._rows.clear()
+
+    def _write_batch(self):
+        pyarrow = self._pyarrow
+
+        arrays = [pyarrow.array([row[i] for row in self._rows], type=self._schema.field(i).type)
+                  for i in range(len(self._columns))]
+        table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+
+        if self._writer is None:
+            if self._format == "parquet":
+                from pyarrow import parquet
+                self._writer = parquet.ParquetWriter(self._path, self._schema)
+            else:
+                self._writer = pyarrow.ipc.new_stream(self._path, self._schema)
+
+        self._writer.write_table(table)
+
+    def close(self):
+        """
+        Writes the buffered rows and closes the output. Safe to call more than once.
+        """
+
+        if self._closed:
+            return  # otherwise the output is recreated empty
+        self._closed = True
+
+        self.flush()
+
+        if self._format != "csv" and self._writer is None:
+            self._write_batch()  # write the schema, even without any rows
+
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+        if self._file:
+            if self._file is not stdout:
+                self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
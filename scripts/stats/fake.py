@@ -0,0 +1,85 @@
+import asyncio
+
+from json import dumps
+from sys import argv
+
+
+# Serves a fake Docker Engine API on a unix socket for developing and load testing the api backend.
+# Answers GET /containers/json and GET /containers/{id}/stats?stream=true with synthetic stats.
+# ex. python3 fake.py /tmp/docker.sock 250 & python3 main.py --socket=/tmp/docker.sock --wait=1
+
+
+INTERVAL = 1  # seconds between streamed stats, as the docker daemon
+
+
+def _stats(index: int, tick: int) -> dict:
+    def sample(tick: int) -> dict:
+        return {"cpu_usage": {"total_usage": tick * (index + 1) * 10_000_000},
+                "system_cpu_usage": tick * 4_000_000_000, "online_cpus": 4}
+
+    return {
+        "name": f"/fake-{index}",
+        "cpu_stats": sample(tick),
+        "precpu_stats": sample(tick - 1),
+        "memory_stats": {"usage": 50_000_000 + tick * 4_096, "limit": 8_000_000_000,
+                         "stats": {"inactive_file": 1_000_000}},
+        "networks": {"eth0": {"rx_bytes": tick * 1_500, "tx_bytes": tick * 900}},
+        "blkio_stats": {"io_service_bytes_recursive": [{"op": "read", "value": tick * 4_096},
+                                                       {"op": "write", "value": tick * 8_192}]},
+        "pids_stats": {"current": 4},
+    }
+
+
+def _chunk(body: bytes) -> bytes:
+    return f"{len(body):x}\r\n".encode() + body + b"\r\n"
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, containers: int):
+    request = (await reader.readline()).decode().split()
+    while await reader.readline() not in (b"\r\n", b""):
+        pass
+
+    path = request[1] if len(request) > 1 else ""
+    headers = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n"
+
+    try:
+        if path == "/containers/json":
+            body = dumps([{"Id": f"{i:064x}", "Names": [f"/fake-{i}"]} for i in range(containers)])
+            writer.write(headers + _chunk(body.encode()) + _chunk(b""))
+
+        elif path.startswith("/containers/") and path.endswith("/stats?stream=true"):
+            index = int(path.split("/")[2], 16)
+            writer.write(headers)
+
+            tick = 1
+            while True:
+                writer.write(_chunk(dumps(_stats(index, tick)).encode() + b"\n"))
+                await writer.drain()
+
+                tick += 1
+                await asyncio.sleep(INTERVAL)
+
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+
+        await writer.drain()
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(socket: str, containers: int):
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _handle(reader, writer, containers), socket)
+
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    if len(argv) not in (2, 3):
+        print(f"usage: {argv[0]} socket [containers]")
+        exit(1)
+
+    asyncio.run(serve(argv[1], int(argv[2]) if len(argv) == 3 else 10))
@@ -1,35 +1,183 @@
+import asyncio
 
-from signal import signal, SIGINT
+from os import chmod, makedirs, path as os_path
+from signal import signal, SIGINT, SIGTERM
 from subprocess import getstatusoutput
-from time import time, sleep
+from sys import argv, path as sys_path
+from time import monotonic, time, sleep
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from shared.writer import Column, Writer
+from src.api import APIError, DockerAPI, SOCKET, to_row
+from src.cgroup import CgroupCollector, CGROUP, DOCKER, PROC
 
 
 OUTPUT = "logs"
-WAIT = 5  # seconds; polls hardware every <WAIT> seconds
+FORMAT = "csv"  # csv, parquet, or arrow
+WAIT = 5  # seconds; polls hardware every <WAIT> seconds; may be 1 with the api
+BATCH = 1_024  # rows buffered per output before writing
+FLUSH = 60  # seconds; buffered rows are written at least every <FLUSH> seconds
+
+COLUMNS = [Column("timestamp", float, "{:1f}"), Column("container_name", str),
+           Column("cpu_perc (%)", float, "{:.2f}%"), Column("mem_usage (Bytes)"),
+           Column("mem_limit (Bytes)"), Column("mem_perc (%)", float, "{:.2f}%"),
+           Column("net_received (Bytes)"), Column("net_transmitted (Bytes)"),
+           Column("disk_read (Bytes)"), Column("disk_write (Bytes)"), Column("pids")]
 
 
-def to_bytes(value: str) -> str:
+def to_bytes(value: str) -> int:
     if value.endswith("GiB"):
-        return f"{int(float(value[:-3]) * 1_073_742_000)}"
+        return int(float(value[:-3]) * 1_073_742_000)
     elif value.endswith("MiB"):
-        return f"{int(float(value[:-3]) * 1_048_576)}"
+        return int(float(value[:-3]) * 1_048_576)
     elif value.endswith("KiB"):
-        return f"{int(float(value[:-3]) * 1_024)}"
+        return int(float(value[:-3]) * 1_024)
     elif value.endswith("GB"):
-        return f"{int(float(value[:-2]) * 1_000_000_000)}"
+        return int(float(value[:-2]) * 1_000_000_000)
     elif value.endswith("MB"):
-        return f"{int(float(value[:-2]) * 1_000_000)}"
+        return int(float(value[:-2]) * 1_000_000)
     elif value.endswith("kB"):
-        return f"{int(float(value[:-2]) * 1_000)}"
+        return int(float(value[:-2]) * 1_000)
     elif value.endswith("B"):
-        return f"{int(value[:-1])}"
+        return int(value[:-1])
+    elif value == "--":  # ex. the network of a container without one
+        return 0
     else: # likely will match above and crash
-        return value
+        return int(value)
+
+
+def to_percent(value: str) -> float:
+    return float(value[:-1])  # ex. "0.50%"
+
+
+def write_stats(format: str = FORMAT, wait: float = WAIT, backend: str = "api", source: str = SOCKET,
+                batch: int = BATCH, flush: float = FLUSH, single: bool = False, proc: str = PROC,
+                docker: str = DOCKER):
+    """
+    @params:
+        - format: The format of the output; csv, parquet, or arrow.
+        - wait: The interval between samples. In units of seconds.
+        - backend: "api" for the Docker Engine API, "cgroup" for cgroup files, or "cli" for `docker stats`.
+        - source: The unix socket of the Docker Engine API, or the cgroup v2 hierarchy.
+        - batch: The number of rows buffered per output before writing.
+        - flush: Buffered rows are written at least every <flush> seconds. In units of seconds.
+        - single: Write every container to logs/hardware_stats.<format> in long format instead of
+                  logs/<container>/hardware_stats.<format>.
+        - proc: The procfs of the host; with the cgroup backend.
+        - docker: The docker data root, for container names; with the cgroup backend.
+    """
+
+    containers = _Writers(format, batch, flush, single) # container_name: writer
+
+    try:
+        if backend == "cli":
+            _write_stats(containers, wait)
+        elif backend == "cgroup":
+            _write_stats_cgroup(containers, wait, source, proc, docker)
+        else:
+            asyncio.run(_write_stats_api(containers, wait, source))
+    finally:  # buffered rows are written; parquet is only readable after close
+        containers.close()
+
+
+class _Writers(dict):
+    def __init__(self, format: str, batch: int, flush: float, single: bool):
+        """
+        Opens the output of a container upon its first row; each value is a Writer.
+        Every container shares one output if single.
+        """
+
+        super().__init__()
+
+        self._format = format
+        self._batch = batch
+        self._flush = flush
+        self._single = None
+
+        if single:
+            makedirs(OUTPUT, exist_ok=True)
+            self._single = Writer(f"{OUTPUT}/hardware_stats.{format}", COLUMNS, batch, flush)
+
+    def __missing__(self, container_name: str) -> Writer:
+        if self._single:
+            writer = self._single
+        else:
+            directory = f"{OUTPUT}/{container_name}"
+            makedirs(directory, exist_ok=True)
+            try:
+                chmod(directory, 0o777)  # ex. logs written by root are readable by the user
+            except OSError:
+                pass
+
+            writer = Writer(f"{directory}/hardware_stats.{self._format}", COLUMNS, self._batch, self._flush)
+
+        self[container_name] = writer
+        return writer
+
+    def close(self):
+        # with single, every container shares a writer; each writer is closed once
+        writers = {id(writer): writer for writer in self.values()}
+        if self._single:
+            writers[id(self._single)] = self._single
+
+        for writer in writers.values():
+            writer.close()
+
+
+async def _write_stats_api(containers: dict[str, Writer], wait: float, socket: str):
+    api = DockerAPI(socket)
+
+    latest = {}  # container_name: stats
+    streams = {}  # container_id: task
+
+    async def follow(id: str, container_name: str):
+        try:
+            async for stats in api.stats(id):
+                latest[container_name] = stats
+        except (APIError, OSError, asyncio.IncompleteReadError):
+            pass  # ex. the container stopped
+        finally:
+            latest.pop(container_name, None)
+            streams.pop(id, None)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+
+    while True:
+        try:
+            running = await api.containers()
+        except (APIError, OSError) as error:
+            print(f"error: {error}")
+            exit(1)
+
+        for id, container_name in running.items():
+            if id not in streams:
+                streams[id] = asyncio.create_task(follow(id, container_name))
+
+        # every container is sampled at the same time from its latest stats
+        timestamp = time()
+        for container_name, stats in latest.items():
+            containers[container_name].write(
+                (timestamp, container_name, *to_row(stats)))
+
+        deadline += wait
+        await asyncio.sleep(max(deadline - loop.time(), 0))
 
 
-def write_stats():
-    containers = {} # container_id: file
+def _write_stats_cgroup(containers: dict[str, Writer], wait: float, cgroup: str, proc: str, docker: str):
+    collector = CgroupCollector(cgroup, proc, docker)
+    deadline = monotonic()
 
+    while True:
+        timestamp = time()
+        for container_name, row in collector.sample().items():
+            containers[container_name].write((timestamp, container_name, *row))
+
+        deadline += wait
+        sleep(max(deadline - monotonic(), 0))
+
+
+def _write_stats(containers: dict[str, Writer], wait: float):
     while True:
         s, o = getstatusoutput("docker stats --no-stream | tr -s ' '")
         if s != 0:
@@ -38,47 +186,65 @@ def write_stats():
 
         o = o.splitlines()
         if len(o) < 2:
-            sleep(WAIT)
+            sleep(wait)
             continue
 
         for line in o[1:]:
             line = line.split()
 
             container_name = line[1]
-            cpu_perc = line[2]
+            cpu_perc = to_percent(line[2])
             mem_usage = to_bytes(line[3])
             mem_limit = to_bytes(line[5])
-            mem_perc = line[6]
+            mem_perc = to_percent(line[6])
             net_received = to_bytes(line[7])
             net_transmitted = to_bytes(line[9])
             disk_read = to_bytes(line[10])
             disk_write = to_bytes(line[12])
-            pids = line[13]
-
-            if container_name not in containers:
-                getstatusoutput(f"mkdir -p {OUTPUT}/{container_name}/")
-                getstatusoutput(f"chmod 666 {OUTPUT}/{container_name}/ || True")
-
-                file = open(f"{OUTPUT}/{container_name}/hardware_stats.csv", "w")
-                containers[container_name] = file
-
-                file.write("timestamp,container_name,cpu_perc (%),mem_usage (Bytes)," \
-                           + "mem_limit (Bytes),mem_perc (%),net_received (Bytes)," \
-                           + "net_transmitted (Bytes),disk_read (Bytes)," \
-                           + "disk_write (Bytes),pids\n")
+            pids = int(line[13])
 
-            file = containers[container_name]
-            file.write(f"{time():1f},{container_name},{cpu_perc},{mem_usage},{mem_limit}," \
-                       + f"{mem_perc},{net_received},{net_transmitted},{disk_read},"\
-                       + f"{disk_write},{pids}\n")
-            file.flush()
-        sleep(WAIT)
+            containers[container_name].write((
+                time(), container_name, cpu_perc, mem_usage, mem_limit, mem_perc,
+                net_received, net_transmitted, disk_read, disk_write, pids))
+        sleep(wait)
 
 
 def signal_handler(sig, frame):
-    exit(0)
+    exit(0)  # unwinds to write_stats(), which writes the buffered rows of every container
 
 
 if __name__ == "__main__":
     signal(SIGINT, signal_handler)
-    write_stats()
+    signal(SIGTERM, signal_handler)
+
+    options = [arg for arg in argv[1:] if arg.startswith("--")]
+    args = [arg for arg in argv[1:] if not arg.startswith("--")]
+
+    if len(args) > 1 or (args and args[0] not in ("csv", "parquet", "arrow")):
+        print(f"usage: {argv[0]} [--cli | --cgroup[=path] | --socket=path] [--proc=path] [--docker=path] "
+              + "[--wait=seconds] [--batch=rows] [--flush=seconds] [--single] [csv|parquet|arrow]")
+        exit(1)
+
+    backend, source, wait, batch, flush, proc, docker = "api", SOCKET, WAIT, BATCH, FLUSH, PROC, DOCKER
+    for option in options:
+        if option == "--cli":
+            backend = "cli"
+        elif option == "--cgroup":
+            backend, source = "cgroup", CGROUP
+        elif option.startswith("--cgroup="):
+            backend, source = "cgroup", option.split("=", 1)[1]
+        elif option.startswith("--socket="):
+            source = option.split("=", 1)[1]
+        elif option.startswith("--proc="):
+            proc = option.split("=", 1)[1]
+        elif option.startswith("--docker="):
+            docker = option.split("=", 1)[1]
+        elif option.startswith("--wait="):
+            wait = float(option.split("=", 1)[1])
+        elif option.startswith("--batch="):
+            batch = int(option.split("=", 1)[1])
+        elif option.startswith("--flush="):
+            flush = float(option.split("=", 1)[1])
+
+    write_stats(args[0] if args else FORMAT, wait, backend, source, batch, flush, "--single" in options,
+                proc, docker)
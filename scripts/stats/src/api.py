@@ -0,0 +1,161 @@
+import asyncio
+
+from json import loads
+from typing import AsyncIterator
+
+
+SOCKET = "/var/run/docker.sock"
+
+
+class APIError(Exception):
+    pass
+
+
+class DockerAPI():
+    def __init__(self, socket: str = SOCKET):
+        """
+        @params:
+            - socket: The unix socket of the Docker Engine API.
+        Note:
+            - Speaks HTTP/1.1 directly over the socket; requires no docker client.
+            - Any server on a unix socket that answers the same requests may be used, ex. fake.py.
+        """
+
+        self._socket = socket
+
+    async def _request(self, path: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, dict[str, str]]:
+        """
+        @params:
+            - path: The path of the GET request, ex. "/containers/json".
+        @returns: The connection and the response headers. The body is unread.
+        """
+
+        reader, writer = await asyncio.open_unix_connection(self._socket)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: docker\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+
+        status = (await reader.readline()).decode().split(" ", 2)
+        if len(status) < 2 or status[1] != "200":
+            writer.close()
+            raise APIError(f"GET {path}: {' '.join(status).strip() or 'no response'}")
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        return (reader, writer, headers)
+
+    async def _body(self, reader: asyncio.StreamReader, headers: dict[str, str]) -> AsyncIterator[bytes]:
+        """
+        @params:
+            - reader: The connection, after the headers.
+            - headers: The response headers.
+        @returns: An iterator of the body as it arrives.
+        """
+
+        if headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    return
+
+                chunk = await reader.readexactly(size)
+                await reader.readexactly(2)  # \r\n
+                yield chunk
+
+        elif "content-length" in headers:
+            yield await reader.readexactly(int(headers["content-length"]))
+
+        else:
+            while chunk := await reader.read(1 << 16):
+                yield chunk
+
+    async def get(self, path: str) -> object:
+        """
+        @params:
+            - path: The path of the GET request, ex. "/containers/json".
+        @returns: The decoded JSON response.
+        """
+
+        reader, writer, headers = await self._request(path)
+        try:
+            return loads(b"".join([chunk async for chunk in self._body(reader, headers)]))
+        finally:
+            writer.close()
+
+    async def containers(self) -> dict[str, str]:
+        """
+        @returns: The running containers as {id: name}.
+        """
+
+        return {container["Id"]: container["Names"][0].lstrip("/")
+                for container in await self.get("/containers/json")}
+
+    async def stats(self, id: str) -> AsyncIterator[dict]:
+        """
+        @params:
+            - id: The id of the container.
+        @returns: An iterator of stats, about one per second, until the container stops.
+        """
+
+        reader, writer, headers = await self._request(f"/containers/{id}/stats?stream=true")
+        try:
+            buffer = b""
+            async for chunk in self._body(reader, headers):
+                buffer += chunk
+
+                *lines, buffer = buffer.split(b"\n")  # one json object per line
+                for line in lines:
+                    if line.strip():
+                        yield loads(line)
+        finally:
+            writer.close()
+
+
+def to_row(stats: dict) -> tuple[float, int, int, float, int, int, int, int, int]:
+    """
+    @params:
+        - stats: A stats object of the Docker Engine API.
+    @returns: cpu_perc, mem_usage, mem_limit, mem_perc, net_received, net_transmitted,
+              disk_read, disk_write, and pids; calculated as `docker stats` does, but
+              with exact bytes.
+    """
+
+    cpu, precpu = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) \
+        - precpu.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+
+    cpu_perc = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        cpu_perc = cpu_delta / system_delta * cpus * 100
+
+    # page cache is excluded; total_inactive_file on cgroup v1, inactive_file on cgroup v2
+    memory = stats.get("memory_stats", {})
+    mem_usage = memory.get("usage", 0)
+    inactive = memory.get("stats", {}).get("total_inactive_file",
+                                           memory.get("stats", {}).get("inactive_file", 0))
+    if inactive < mem_usage:
+        mem_usage -= inactive
+
+    mem_limit = memory.get("limit", 0)
+    mem_perc = mem_usage / mem_limit * 100 if mem_limit else 0.0
+
+    networks = (stats.get("networks") or {}).values()
+    net_received = sum(network.get("rx_bytes", 0) for network in networks)
+    net_transmitted = sum(network.get("tx_bytes", 0) for network in networks)
+
+    disk_read, disk_write = 0, 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        if entry["op"].lower() == "read":
+            disk_read += entry["value"]
+        elif entry["op"].lower() == "write":
+            disk_write += entry["value"]
+
+    pids = stats.get("pids_stats", {}).get("current", 0)
+
+    return (cpu_perc, mem_usage, mem_limit, mem_perc, net_received, net_transmitted,
+            disk_read, disk_write, pids)
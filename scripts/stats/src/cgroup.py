@@ -0,0 +1,178 @@
+from json import loads
+from os import path as os_path, scandir
+from time import monotonic_ns
+
+
+CGROUP = "/sys/fs/cgroup"
+PROC = "/proc"
+DOCKER = "/var/lib/docker"
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _optional(path: str) -> bytes:
+    """
+    @returns: The file, or nothing if the controller is not enabled, ex. io or pids.
+    """
+
+    try:
+        return _read(path)
+    except FileNotFoundError:
+        return b""
+
+
+def _fields(path: str) -> dict[bytes, int]:
+    """
+    @params:
+        - path: A flat keyed file, ex. cpu.stat or memory.stat.
+    @returns: The values by key.
+    """
+
+    fields = {}
+    for line in _read(path).splitlines():
+        key, _, value = line.partition(b" ")
+        fields[key] = int(value)
+    return fields
+
+
+class CgroupCollector():
+    def __init__(self, cgroup: str = CGROUP, proc: str = PROC, docker: str = DOCKER):
+        """
+        @params:
+            - cgroup: The cgroup v2 hierarchy.
+            - proc: The procfs of the host.
+            - docker: The docker data root; container names are read from its container configs.
+        Note:
+            - Requires no docker client and spawns no processes; each container is a few file reads.
+            - Containers are found under <cgroup>/system.slice/docker-<id>.scope (systemd driver)
+              or <cgroup>/docker/<id> (cgroupfs driver).
+            - Any directory tree with the same layout may be used, ex. for testing.
+        """
+
+        self._cgroup = cgroup
+        self._proc = proc
+        self._docker = docker
+
+        self._names: dict[str, str] = {}  # id: name
+        self._usage: dict[str, tuple[int, int]] = {}  # id: (cpu usage, time) of the previous sample; us
+
+        self._mem_total = 0
+        for line in _read(os_path.join(proc, "meminfo")).splitlines():
+            if line.startswith(b"MemTotal:"):
+                self._mem_total = int(line.split()[1]) * 1_024
+                break
+
+    def containers(self) -> dict[str, str]:
+        """
+        @returns: The running containers as {id: cgroup directory}.
+        """
+
+        containers = {}
+
+        systemd = os_path.join(self._cgroup, "system.slice")
+        if os_path.isdir(systemd):
+            for entry in scandir(systemd):
+                if entry.name.startswith("docker-") and entry.name.endswith(".scope"):
+                    containers[entry.name[7:-6]] = entry.path
+
+        docker = os_path.join(self._cgroup, "docker")
+        if os_path.isdir(docker):
+            for entry in scandir(docker):
+                if entry.is_dir() and len(entry.name) == 64:
+                    containers[entry.name] = entry.path
+
+        return containers
+
+    def _name(self, id: str) -> str:
+        """
+        @returns: The name of the container, or the short id if the config is unreadable.
+        """
+
+        if id not in self._names:
+            try:
+                config = loads(_read(os_path.join(self._docker, "containers", id, "config.v2.json")))
+                self._names[id] = config["Name"].lstrip("/")
+            except (OSError, ValueError, KeyError):
+                self._names[id] = id[:12]
+
+        return self._names[id]
+
+    def sample(self) -> dict[str, tuple[float, int, int, float, int, int, int, int, int]]:
+        """
+        @returns: For each container as {name: row}: cpu_perc, mem_usage, mem_limit, mem_perc,
+                  net_received, net_transmitted, disk_read, disk_write, and pids.
+        Note:
+            - cpu_perc is the usage since the previous sample; 100% is 1 core, as `docker stats`.
+              A container is first reported on its second sample.
+            - Containers that stop between listing and reading are skipped.
+        """
+
+        rows = {}
+        containers = self.containers()
+
+        for id in [id for id in self._usage if id not in containers]:  # stopped
+            del self._usage[id]
+            self._names.pop(id, None)
+
+        for id, directory in containers.items():
+            try:
+                row = self._sample(id, directory)
+            except (OSError, ValueError):
+                continue  # ex. the container stopped
+
+            if row is not None:
+                rows[self._name(id)] = row
+
+        return rows
+
+    def _sample(self, id: str, directory: str) -> tuple | None:
+        now = monotonic_ns() // 1_000  # us
+        usage = _fields(os_path.join(directory, "cpu.stat"))[b"usage_usec"]
+
+        previous = self._usage.get(id)
+        self._usage[id] = (usage, now)
+        if previous is None:
+            return None
+
+        cpu_perc = 0.0
+        if now > previous[1]:
+            cpu_perc = (usage - previous[0]) / (now - previous[1]) * 100
+
+        # page cache is excluded, as `docker stats`
+        mem_usage = int(_read(os_path.join(directory, "memory.current")))
+        inactive = _fields(os_path.join(directory, "memory.stat")).get(b"inactive_file", 0)
+        if inactive < mem_usage:
+            mem_usage -= inactive
+
+        mem_limit = _read(os_path.join(directory, "memory.max")).strip()
+        mem_limit = self._mem_total if mem_limit == b"max" else int(mem_limit)
+        mem_perc = mem_usage / mem_limit * 100 if mem_limit else 0.0
+
+        disk_read, disk_write = 0, 0
+        for line in _optional(os_path.join(directory, "io.stat")).splitlines():  # ex. 8:0 rbytes=1 wbytes=2 ...
+            for field in line.split()[1:]:
+                if field.startswith(b"rbytes="):
+                    disk_read += int(field[7:])
+                elif field.startswith(b"wbytes="):
+                    disk_write += int(field[7:])
+
+        pids = int(_optional(os_path.join(directory, "pids.current")) or 0)
+
+        # any process of the container shares its network namespace
+        net_received, net_transmitted = 0, 0
+        pid = _read(os_path.join(directory, "cgroup.procs")).split(b"\n", 1)[0]
+        if pid:
+            for line in _read(os_path.join(self._proc, pid.decode(), "net", "dev")).splitlines()[2:]:
+                iface, _, counters = line.partition(b":")
+                if iface.strip() == b"lo":
+                    continue
+
+                counters = counters.split()
+                net_received += int(counters[0])
+                net_transmitted += int(counters[8])
+
+        return (cpu_perc, mem_usage, mem_limit, mem_perc, net_received, net_transmitted,
+                disk_read, disk_write, pids)
@@ -0,0 +1,47 @@
+from os import makedirs, path as os_path
+from sys import argv, path as sys_path
+from time import time
+
+sys_path.append(os_path.join(os_path.dirname(os_path.abspath(__file__)), ".."))
+from shared.writer import Column, Writer
+from src.convergence import probe_convergence, report
+from src.script import start_network, stop_network
+
+
+# Measures the time for OSPF to converge on each network configuration from a cold start, ex. to
+# track regressions after changing cost or ECMP settings.
+# ex. make test TEST=convergence.py; python3 scripts/test/convergence.py tests/scale.py
+
+
+CONFIGS = ["examples/network.py", "examples/blackhole.py", "examples/datacenter.py", "examples/lb.py",
+           "examples/tor.py", "tests/scale.py"]
+OUTPUT = "logs/ospf-convergence.csv"  # csv, parquet, or arrow by extension
+WAIT_FOR = 300  # seconds; the maximum time to converge
+
+COLUMNS = [Column("timestamp", float, "{:1f}"), Column("config", str), Column("router", str),
+           Column("time (s)", float, "{:.1f}"), Column("routes"), Column("neighbors")]
+
+
+def benchmark(configs: list[str]):
+    makedirs(os_path.dirname(OUTPUT), exist_ok=True)
+
+    # the output is kept once the network is stopped
+    with Writer(OUTPUT, COLUMNS) as writer:
+        for config in configs:
+            stop_network()  # every router starts without routes
+
+            started = time()
+            start_network(config, None)
+
+            convergence = probe_convergence(wait_for=WAIT_FOR, started=started)
+            report(convergence)
+
+            for router, seconds, routes, neighbors in convergence:
+                writer.write((started, config, router, float("nan") if seconds is None else seconds,
+                              routes, neighbors))
+
+    stop_network()
+
+
+if __name__ == "__main__":
+    benchmark(argv[1:] or CONFIGS)
@@ -9,15 +9,17 @@ def test_connectivity():
 
 
 def create_tcpdump():
-    run_background_command("client-0", "tcpdump -w logs/dump.pcap")
+    jobs = run_background_command("client-0", "tcpdump -w logs/dump.pcap")
 
     test_connectivity()
 
     sleep(5)  # tcpdump is slow and requires time to process packets
-    run_command("client-0", "pkill tcpdump")
+    for job in jobs:
+        job.kill("INT")  # tcpdump writes the remaining packets
+        job.wait(5)
 
 
 if __name__ == "__main__":
-    start_network("examples/server.py", 15)
+    start_network("examples/server.py")
     create_tcpdump()
     stop_network()
@@ -0,0 +1,125 @@
+from hashlib import sha256
+from time import monotonic, sleep, time
+from typing import NamedTuple
+
+from src.script import run_command
+
+
+STABLE_FOR = 10  # seconds; routes unchanged for an OSPF hello interval are converged
+POLL_INTERVAL = 1  # seconds
+
+# the number of routes learned by OSPF, the routes, then the neighbors; see components/bird
+_PROBE = "sh -c 'birdc show route table t_ospf count; echo --; birdc show route table t_ospf; echo --; " \
+         "birdc show ospf neighbors'"
+_FORMING = ("Init", "ExStart", "Exchange", "Loading")  # neighbor states of an adjacency being formed
+
+
+class Convergence(NamedTuple):
+    router: str
+    time: float | None  # seconds from the start until the routes last changed; None if not converged
+    routes: int  # the routes learned by OSPF
+    neighbors: int
+
+
+def _parse(output: str) -> tuple[str, int, int, bool] | None:
+    """
+    @params:
+        - output: The output of _PROBE.
+    @returns: (digest of the routes, routes, neighbors, whether an adjacency is forming), or None if bird
+              is not running.
+    """
+
+    sections = output.split("\n--\n")
+    if len(sections) != 3 or " routes for " not in sections[0]:
+        return None
+
+    count, routes, neighbors = sections
+
+    # ex. "BIRD 2.13 ready.\n12 of 12 routes for 12 networks in table t_ospf"
+    count = int(count.split("\n")[-1].split(" ", 1)[0])
+
+    # ex. "10.0.0.2    1    Full/DR    32.146    eth0_0    10.0.0.2"
+    states = []
+    for line in neighbors.split("\n"):
+        fields = line.split()
+        if len(fields) >= 3 and fields[0][:1].isdigit() and fields[0].count(".") == 3:
+            states.append(fields[2].split("/")[0])
+
+    digest = sha256(routes.encode()).hexdigest()
+    return (digest, count, len(states), any(state in _FORMING for state in states))
+
+
+def probe_convergence(
+        name: str = "router",
+        wait_for: float = 300,
+        started: float | None = None,
+        stable_for: float = STABLE_FOR,
+    ) -> list[Convergence]:
+
+    """
+    @params:
+        - name: The name of the routers. Matches as in run_command.
+        - wait_for: The maximum time to wait for convergence. In seconds.
+        - started: Optional. The time the network was started, as time(); now by default.
+        - stable_for: The time routes must be unchanged to be converged. In seconds.
+    @returns: The convergence of each router, in order of the routers.
+    Note:
+        - Polls the OSPF routes and neighbors of every router concurrently, until no router's routes
+          changed for stable_for seconds and no adjacency is forming, or until wait_for.
+        - The time of a router is when its routes last changed; routers that did not converge
+          have no time.
+    """
+
+    started = time() if started is None else started
+    deadline = monotonic() + wait_for
+
+    states: dict[str, tuple[str, int, int, bool] | None] = {}
+    changed: dict[str, float] = {}  # router: time(), when the routes last changed
+
+    while True:
+        now = time()
+        for router, _, output in run_command(name, _PROBE, exit_on_failure=False, quiet=True):
+            state = _parse(output)
+
+            digest = state[0] if state else None
+            if router not in states or digest != (states[router][0] if states[router] else None):
+                changed[router] = now
+
+            states[router] = state
+
+        stable = all(state and not state[3] and now - changed[router] >= stable_for
+                     for router, state in states.items())
+
+        if stable or monotonic() >= deadline:
+            break
+
+        sleep(POLL_INTERVAL)
+
+    convergence = []
+    for router, state in states.items():
+        converged = state and not state[3] and now - changed[router] >= stable_for
+        convergence.append(Convergence(
+            router,
+            max(changed[router] - started, 0.0) if converged else None,
+            state[1] if state else 0,
+            state[2] if state else 0,
+        ))
+
+    return convergence
+
+
+def report(convergence: list[Convergence]):
+    """
+    Prints the convergence of each router and of the network.
+    """
+
+    for router, seconds, routes, neighbors in convergence:
+        time_str = f"{seconds:.1f} seconds" if seconds is not None else "not converged"
+        print(f"{router}: {time_str}, {routes} routes, {neighbors} neighbors")
+
+    times = [seconds for _, seconds, _, _ in convergence]
+    if convergence and None not in times:
+        print(f"converged after {max(times):.1f} seconds; {sum(c.routes for c in convergence)} routes "
+              f"on {len(convergence)} routers")
+    else:
+        print(f"not converged: {sum(seconds is None for seconds in times)} of {len(times)} routers")
@@ -1,12 +1,63 @@
 
-from subprocess import getstatusoutput, Popen
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from json import load, JSONDecodeError
+from os import path as os_path
+from subprocess import getstatusoutput
+from time import monotonic, sleep, time
+
+from src.session import Job, Session, TIMEOUT_STATUS
+
+
+MAX_WORKERS = 32  # the maximum number of commands run at once
+
+# written by each container once it is ready, ex. {"name": "router-0", "type": "router", "time": 1700000000}
+READY = "logs/{name}/ready"
+CHANGES = "logs/compose-changes"  # the services recreated by `make up`; see scripts/network
+POLL_INTERVAL = 0.5  # seconds
+
+_containers: list[str] | None = None  # cached until the network is started or stopped
+_sessions: dict[str, Session] = {}  # container name: session; closed when the network is started or stopped
+
+
+def _get_containers(name: str) -> list[str]:
+    """
+    @params:
+        - name: Part of the name of the containers.
+    @returns: The running containers that contain the name.
+    """
+
+    global _containers
+
+    if _containers is None:
+        _, o = getstatusoutput("docker container ls --format '{{.Names}}'")
+        _containers = [container for container in o.split("\n") if container]
+
+    return [container for container in _containers if name in container]
+
+
+def _get_session(container: str) -> Session:
+    if container not in _sessions:
+        _sessions[container] = Session(container)
+
+    return _sessions[container]
+
+
+def _close_sessions():
+    global _containers
+    _containers = None
+
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
 
 
 def run_command(
         name: str,
         command: str,
         exit_on_failure: bool = True,
+        timeout: float | None = None,
+        stream: bool = False,
+        quiet: bool = False,
     ) -> list[tuple[str, str, int]]:
 
     """
@@ -15,33 +66,40 @@ def run_command(
                 The name does not need to match exactly and will run for any container
                 that contains the name.
         - command: The command to run. The command must exit and not wait. Uses `sh`.
+        - timeout: Optional. The time for the command to exit on each container. In seconds.
+                   A command that times out has status TIMEOUT_STATUS.
+        - stream: Prints the output of each container as it is written.
+        - quiet: Does not print each command run, ex. when polling.
     Returns: [(container name, status, output), ...]
+    Note:
+        - The command runs on the containers concurrently, up to MAX_WORKERS at once.
+        - Commands run over a session kept open with each container, see Session.
+        - Failures are reported once every container has finished.
     """
 
-    _, o = getstatusoutput("docker container ls")
+    containers = _get_containers(name)
+    if not containers:
+        return []
 
-    containers = []
-    for line in o.split("\n")[1:]:
-        container = line.split(" ")[-1]
-        containers.append(container)
-
-    outputs = []
     for container in containers:
-        if name not in container:
-            continue
+        if not quiet:
+            print(f"running '{command}' on {container}")
+
+    sessions = [_get_session(container) for container in containers]
 
-        print(f"running '{command}' on {container}")
+    with ThreadPoolExecutor(min(len(containers), MAX_WORKERS)) as executor:
+        outputs = [*executor.map(lambda session: (session._container, *session.run(command, timeout, stream)),
+                                 sessions)]
 
-        s, o = getstatusoutput(f"docker exec {container} {command}")
+    for container, s, o in outputs:
         if exit_on_failure and s != 0:
             print(f"{container} failed with status {s}:\ncommand: {command}\noutput: {o}")
             exit(1)
 
-        outputs.append((container, s, o))
     return outputs
 
 
-def run_background_command(name: str, command: str):
+def run_background_command(name: str, command: str) -> list[Job]:
     """
     @params:
         - name: The name of the container, ex. client-0, to run the command in.
@@ -49,44 +107,105 @@ def run_background_command(name: str, command: str):
                 that contains the name.
         - command: The command to run. The command will run in the background. Uses `sh`.
                    Do not use &.
+    Returns: The handle of the job on each container; see Job to wait, kill, or collect output.
     """
 
-    _, o = getstatusoutput("docker container ls")
+    jobs = []
+    for container in _get_containers(name):
+        print(f"running '{command}' in the background on {container}")
+        jobs.append(_get_session(container).start(command))
 
-    containers = []
-    for line in o.split("\n")[1:]:
-        container = line.split(" ")[-1]
-        containers.append(container)
+    return jobs
 
-    for container in containers:
-        if name not in container:
-            continue
 
-        print(f"running '{command}' in the background on {container}")
+def _is_ready(container: str, since: float) -> bool:
+    """
+    @params:
+        - container: The name of the container.
+        - since: The earliest time of the marker; markers of a previous container are stale.
+    """
+
+    try:
+        with open(READY.format(name=container)) as file:
+            return load(file)["time"] >= int(since)
+    except (OSError, JSONDecodeError, KeyError):
+        return False  # not written, or being written
+
+
+def wait_ready(name: str = "", wait_for: float = 120, since: dict[str, float] | None = None) -> list[str]:
+    """
+    @params:
+        - name: The name of the containers to wait for. Matches as in run_command; every container by default.
+        - wait_for: The maximum time to wait. In seconds.
+        - since: Optional. The earliest time of the marker of each container, by name.
+    @returns: The containers that are not ready by the deadline.
+    Note:
+        - Each container writes logs/<name>/ready once ready; ex. routers once OSPF has converged,
+          DNS servers once answering, and HTTP servers and load balancers once answering with 200.
+          See components/.
+        - Returns as soon as every container is ready.
+    """
+
+    since = since or {}
+    deadline = monotonic() + wait_for
 
-        docker_command = f"docker exec {container} {command}"
-        Popen(docker_command.split(" "))
+    pending = _get_containers(name)
+    while True:
+        pending = [container for container in pending if not _is_ready(container, since.get(container, 0))]
+        if not pending or monotonic() >= deadline:
+            return pending
 
+        sleep(POLL_INTERVAL)
 
-def start_network(config: str, wait_for: int = 30):
+
+def start_network(config: str, wait_for: int | None = 120):
     """
     @params:
         - config: The network configuration to start. ex. 'examples/server.py'
-        - wait_for: The time to wait for the network to initialize. In seconds.
+        - wait_for: The maximum time to wait for the network to be ready. In seconds.
+                    None to return once started, ex. to measure convergence.
+    Note:
+        - Returns once every container is ready, see wait_ready. Containers that are not ready
+          by the deadline are reported.
     """
 
+    _close_sessions()  # containers may be recreated
+
     print(f"starting network with config '{config}'")
+    started = time()
     s, o = getstatusoutput(f"make up NETWORK={config}")
 
     if s != 0:
         print(f"failed with status {s}: {o}")
         exit(1)
 
-    print(f"waiting for {wait_for} seconds for the network to initialize")
-    sleep(wait_for)
+    if wait_for is None:
+        return
+
+    # unchanged containers are not recreated and keep their markers
+    since = {}
+    if os_path.exists(CHANGES):
+        with open(CHANGES) as file:
+            changes = [line.split(" ", 1) for line in file.read().splitlines()]
+
+        if any(kind == "network" for kind, _ in changes):  # every container was recreated
+            since = {container: started for container in _get_containers("")}
+        else:
+            since = {name: started for kind, name in changes if kind == "service"}
+
+    print(f"waiting up to {wait_for} seconds for the network to be ready")
+    timer = monotonic()
+    pending = wait_ready(wait_for=wait_for, since=since)
+
+    if pending:
+        print(f"Warning: not ready after {wait_for} seconds: {' '.join(pending)}")
+    else:
+        print(f"ready after {monotonic() - timer:.1f} seconds")
 
 
 def stop_network():
+    _close_sessions()
+
     print("stopping network")
     s, o = getstatusoutput("make down")
 
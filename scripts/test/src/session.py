@@ -0,0 +1,183 @@
+from queue import Empty, Queue
+from subprocess import Popen, PIPE, STDOUT
+from threading import Lock, Thread
+from time import monotonic, sleep
+from uuid import uuid4
+
+
+TIMEOUT_STATUS = 124  # the status of a command that timed out, as `timeout`
+JOBS = "/tmp/jobs"  # the output, pid, and status of each background job within the container; by a unique id
+POLL_INTERVAL = 0.2  # seconds; while waiting for a background job
+
+
+class Session():
+    def __init__(self, container: str):
+        """
+        @params:
+            - container: The name of the container.
+        Note:
+            - A single `docker exec` running `sh` for the lifetime of the session; commands are written
+              to its stdin and their output is read until an end marker with the status. Avoids
+              starting a process for each command.
+            - Commands run one at a time, each in a subshell; ex. `cd` and `exit` do not affect the session.
+            - The shell is restarted if it exits, ex. on a syntax error, or if a command times out.
+        """
+
+        self._container = container
+        self._marker = f"__end_{uuid4().hex}__"
+        self._lock = Lock()
+
+        self._process: Popen | None = None
+        self._lines: Queue[str | None] = Queue()
+
+    def _start(self):
+        self._process = Popen(["docker", "exec", "-i", self._container, "sh"], stdin=PIPE, stdout=PIPE,
+                              stderr=STDOUT, text=True, bufsize=1, errors="replace")
+        self._lines = Queue()
+
+        Thread(target=self._read, args=(self._process, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _read(process: Popen, lines: Queue):
+        try:
+            for line in process.stdout:
+                lines.put(line)
+        finally:
+            lines.put(None)  # exited; run() must not wait forever
+
+    def run(self, command: str, timeout: float | None = None, stream: bool = False) -> tuple[int, str]:
+        """
+        @params:
+            - command: The command to run. Uses `sh`.
+            - timeout: Optional. The time for the command to exit. In seconds.
+            - stream: Prints the output as it is written.
+        @returns: (status, output), as getstatusoutput.
+        """
+
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+
+            try:
+                self._process.stdin.write(f"({command}\n) < /dev/null 2>&1\n"
+                                          f"printf '\\n%s %d\\n' {self._marker} $?\n")
+                self._process.stdin.flush()
+            except BrokenPipeError:
+                pass  # exited; read what was written
+
+            deadline = None if timeout is None else monotonic() + timeout
+            output = []
+            s = None
+
+            while s is None:
+                try:
+                    remaining = None if deadline is None else max(deadline - monotonic(), 0)
+                    line = self._lines.get(timeout=remaining)
+                except Empty:
+                    self.close()  # the command may still be running in the container
+                    s = TIMEOUT_STATUS
+                    break
+
+                if line is None:
+                    s = self._process.wait()
+                    self._process = None
+                elif line.startswith(self._marker):
+                    s = int(line.split()[1])
+                    output[-1:] = [output[-1][:-1]] if output else []  # the newline before the marker
+                else:
+                    if stream:
+                        print(f"{self._container}: {line}", end="")
+                    output.append(line)
+
+        o = "".join(output)
+        if o[-1:] == "\n":  # as getstatusoutput
+            o = o[:-1]
+
+        return (s, o)
+
+    def start(self, command: str) -> "Job":
+        """
+        @params:
+            - command: The command to run in the background. Uses `sh`. Do not use &.
+        @returns: The handle of the job.
+        """
+
+        # unique across sessions, ex. of another process or before start_network, so jobs that
+        # are still running are not overwritten
+        path = f"{JOBS}/{uuid4().hex}"
+
+        s, o = self.run(f"mkdir -p {JOBS}; "
+                        f"(({command}\n) > {path}.out 2>&1 < /dev/null & echo $! > {path}.pid; "
+                        f"wait $!; echo $? > {path}.status) > /dev/null 2>&1 & "
+                        f"while ! [ -s {path}.pid ]; do sleep 0.01; done")
+        assert(s == 0)
+
+        return Job(self, command, path)
+
+    def close(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+class Job():
+    def __init__(self, session: Session, command: str, path: str):
+        """
+        @params:
+            - session: The session of the container.
+            - command: The command of the job.
+            - path: The files of the job within the container, without an extension.
+        Note:
+            - The output is written to a file within the container; see output().
+        """
+
+        self._session = session
+        self._command = command
+        self._path = path
+        self._status: int | None = None
+
+        self.container = session._container
+
+    def poll(self) -> int | None:
+        """
+        @returns: The status of the job, or None if it is running.
+        """
+
+        if self._status is None:
+            s, o = self._session.run(f"cat {self._path}.status")
+            if s == 0 and o.strip():
+                self._status = int(o)
+
+        return self._status
+
+    def wait(self, timeout: float | None = None) -> int | None:
+        """
+        @params:
+            - timeout: Optional. The time for the job to exit. In seconds.
+        @returns: The status of the job, or None if it is still running.
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and monotonic() >= deadline:
+                return None
+            sleep(POLL_INTERVAL)
+
+        return self._status
+
+    def kill(self, signal: str = "TERM"):
+        """
+        @params:
+            - signal: The signal sent to the job and its children, ex. INT to stop tcpdump gracefully.
+        """
+
+        self._session.run(f"PID=$(cat {self._path}.pid); pkill -{signal} -P $PID; kill -{signal} $PID")
+
+    def output(self) -> str:
+        """
+        @returns: The output of the job so far.
+        """
+
+        _, o = self._session.run(f"cat {self._path}.out")
+        return o